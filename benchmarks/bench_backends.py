@@ -0,0 +1,306 @@
+#-----------------------------------------------------------------------------
+# bench_backends.py
+#
+# Compares the two Linux bus backends - smbus2, and the direct ioctl backend 
+# in qwiic_i2c/linux_ioctl.py.
+#
+# Both backends run against the same fake kernel: fcntl.ioctl() is replaced
+# with a function that returns straight away, and the bus is opened on 
+# /dev/null. What's measured is everything each backend does in Python to 
+# build, send and unpack a transfer - the part that differs between them. 
+# Operations are run on the bus objects, and through LinuxI2C.
+#
+# smbus2 must be installed (pip install smbus2). Without it, only the ioctl 
+# backend is measured.
+#
+# Usage:
+#
+#	python benchmarks/bench_backends.py
+#	python benchmarks/bench_backends.py --json results.json
+#	python benchmarks/bench_backends.py --compare results.json --threshold 1.15
+#
+# With --compare, the exit status is 1 if any ioctl backend operation is 
+# slower than the saved results by more than the threshold. Only compare 
+# results from the same machine and Python version.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+_kBenchDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(_kBenchDir))
+
+try:
+	import smbus2
+	import smbus2.smbus2
+except ImportError:
+	smbus2 = None
+
+from qwiic_i2c import linux_i2c
+from qwiic_i2c import linux_ioctl
+from qwiic_i2c.linux_i2c import LinuxI2C
+
+_kAddress = 0x10
+
+# The fake bus device
+_kDevicePath = "/dev/null"
+
+# I2C_FUNCS reports plain I2C and all the SMBus commands
+_kI2CFuncs = 0x0eff0009
+
+_ioctl_count = 0
+
+#-----------------------------------------------------------------------------
+# The fake kernel - answers I2C_FUNCS, and accepts everything else
+def _fake_ioctl(fd, request, arg=0, mutate=True):
+	global _ioctl_count
+	_ioctl_count += 1
+
+	if request == linux_ioctl._kI2CFuncs:
+		arg.value = _kI2CFuncs
+
+	return 0
+
+def _install_fake_kernel():
+	linux_ioctl.ioctl = _fake_ioctl
+	if smbus2 is not None:
+		smbus2.smbus2.ioctl = _fake_ioctl
+
+	# LinuxI2C opens the fake bus device, whatever the bus id
+	def connect(iBus=1, *args, backend=None, **argk):
+		if backend == linux_i2c._kBackendIoctl:
+			return linux_ioctl.IoctlBus(_kDevicePath)
+		return smbus2.SMBus(_kDevicePath)
+
+	linux_i2c._connectToI2CBus = connect
+
+#-----------------------------------------------------------------------------
+# Cases - each returns a dictionary of operation name -> callable, for one 
+# backend. The same names are used for both backends.
+
+def _smbus2_cases():
+	from smbus2 import i2c_msg
+
+	bus = smbus2.SMBus(_kDevicePath)
+	driver = LinuxI2C(1, backend=linux_i2c._kBackendSmbus2)
+
+	data = bytes(range(16))
+	dataList = list(data)
+	buf = bytearray(6)
+	txn = driver.transaction().writeRead(_kAddress, [0x28], 6).writeRead(0x20, [0x68], 6)
+
+	def write_read():
+		write = i2c_msg.write(_kAddress, [0x28])
+		read = i2c_msg.read(_kAddress, 6)
+		bus.i2c_rdwr(write, read)
+		return list(read)
+
+	return {
+		"bus.read_byte_data": lambda: bus.read_byte_data(_kAddress, 0x10),
+		"bus.read_word_data": lambda: bus.read_word_data(_kAddress, 0x10),
+		"bus.read_i2c_block_data(16)": lambda: bus.read_i2c_block_data(_kAddress, 0x10, 16),
+		"bus.write_byte_data": lambda: bus.write_byte_data(_kAddress, 0x10, 0x40),
+		"bus.write_i2c_block_data(16)": lambda: bus.write_i2c_block_data(_kAddress, 0x10, dataList),
+		"bus.write_read(6)": write_read,
+		"driver.readByte": lambda: driver.readByte(_kAddress, 0x10),
+		"driver.readBlock(16)": lambda: driver.readBlock(_kAddress, 0x10, 16),
+		"driver.writeBlock(16)": lambda: driver.writeBlock(_kAddress, 0x10, data),
+		"driver.readBlockInto(6)": lambda: driver.readBlockInto(_kAddress, 0x28, buf),
+		"driver.writeReadBlock(6)": lambda: driver.writeReadBlock(_kAddress, [0x28], 6),
+		"driver.transaction.run": txn.run
+	}
+
+def _ioctl_cases():
+	bus = linux_ioctl.IoctlBus(_kDevicePath)
+	driver = LinuxI2C(1, backend=linux_i2c._kBackendIoctl)
+
+	data = bytes(range(16))
+	dataList = list(data)
+	buf = bytearray(6)
+	txn = driver.transaction().writeRead(_kAddress, [0x28], 6).writeRead(0x20, [0x68], 6)
+
+	command = bytes((0x28,))
+
+	def write_read():
+		read = bytearray(6)
+		bus.transfer(((_kAddress, 0, command), (_kAddress, 1, read)))
+		return read
+
+	return {
+		"bus.read_byte_data": lambda: bus.read_byte_data(_kAddress, 0x10),
+		"bus.read_word_data": lambda: bus.read_word_data(_kAddress, 0x10),
+		"bus.read_i2c_block_data(16)": lambda: bus.read_i2c_block_data(_kAddress, 0x10, 16),
+		"bus.write_byte_data": lambda: bus.write_byte_data(_kAddress, 0x10, 0x40),
+		"bus.write_i2c_block_data(16)": lambda: bus.write_i2c_block_data(_kAddress, 0x10, dataList),
+		"bus.write_read(6)": write_read,
+		"driver.readByte": lambda: driver.readByte(_kAddress, 0x10),
+		"driver.readBlock(16)": lambda: driver.readBlock(_kAddress, 0x10, 16),
+		"driver.writeBlock(16)": lambda: driver.writeBlock(_kAddress, 0x10, data),
+		"driver.readBlockInto(6)": lambda: driver.readBlockInto(_kAddress, 0x28, buf),
+		"driver.writeReadBlock(6)": lambda: driver.writeReadBlock(_kAddress, [0x28], 6),
+		"driver.transaction.run": txn.run
+	}
+
+#-----------------------------------------------------------------------------
+# Measurement
+
+# Returns the time per call in ns (the best of <repeat> runs), and the 
+# ioctls per call
+def _time_op(op, iterations, repeat):
+	best = None
+	startCount = _ioctl_count
+
+	for r in range(repeat):
+		start = time.perf_counter_ns()
+		for i in range(iterations):
+			op()
+		elapsed = time.perf_counter_ns() - start
+
+		if best is None or elapsed < best:
+			best = elapsed
+
+	return best / iterations, (_ioctl_count - startCount) / (iterations * repeat)
+
+#-----------------------------------------------------------------------------
+# Reporting
+
+def _format(value, fmt):
+	return "-" if value is None else fmt % (value,)
+
+def _print_header():
+	print("%-30s %12s %12s %9s %8s" % ("operation", "smbus2 ns", "ioctl ns", "speedup", "ioctls"))
+
+def _print_result(name, result):
+	speedup = None
+	if result["smbus2_ns_per_op"] is not None:
+		speedup = result["smbus2_ns_per_op"] / result["ioctl_ns_per_op"]
+
+	print("%-30s %12s %12s %9s %8s" % (name,
+		_format(result["smbus2_ns_per_op"], "%.0f"),
+		_format(result["ioctl_ns_per_op"], "%.0f"),
+		_format(speedup, "x%.2f"),
+		_format(result["ioctls_per_op"], "%.2f")))
+
+# Returns a list of regressions of the ioctl backend, comparing results with 
+# saved results
+def _compare(results, saved, threshold):
+	regressions = []
+
+	for name in sorted(results):
+		if name not in saved:
+			continue
+
+		new = results[name]["ioctl_ns_per_op"]
+		old = saved[name]["ioctl_ns_per_op"]
+
+		if new > old * threshold:
+			regressions.append("%s: %.0f ns/op, was %.0f ns/op (x%.2f)" % (name, new, old, new / old))
+
+		if results[name]["ioctls_per_op"] > saved[name]["ioctls_per_op"]:
+			regressions.append("%s: %.2f ioctls/op, was %.2f" % (name, results[name]["ioctls_per_op"], saved[name]["ioctls_per_op"]))
+
+	return regressions
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Compare the smbus2 and direct ioctl Linux I2C backends")
+	parser.add_argument("--filter", default=None, help="Only run operations whose name contains this")
+	parser.add_argument("--iterations", type=int, default=20000, help="Calls per timing run")
+	parser.add_argument("--repeat", type=int, default=5, help="Timing runs per operation - the best is kept")
+	parser.add_argument("--json", default=None, help="Save the results to this JSON file")
+	parser.add_argument("--compare", default=None, help="Compare with results saved by --json")
+	parser.add_argument("--threshold", type=float, default=1.15, help="Slowdown ratio reported as a regression (default: 1.15)")
+	args = parser.parse_args(argv)
+
+	_install_fake_kernel()
+
+	if smbus2 is None:
+		print("smbus2 isn't installed - only the ioctl backend is measured\n")
+
+	ioctlCases = _ioctl_cases()
+	smbus2Cases = _smbus2_cases() if smbus2 is not None else {}
+
+	results = {}
+
+	_print_header()
+	for name in ioctlCases:
+		if args.filter is not None and args.filter not in name:
+			continue
+
+		ioctlNs, ioctls = _time_op(ioctlCases[name], args.iterations, args.repeat)
+
+		smbus2Ns = None
+		if name in smbus2Cases:
+			smbus2Ns = _time_op(smbus2Cases[name], args.iterations, args.repeat)[0]
+
+		results[name] = {
+			"ioctl_ns_per_op": round(ioctlNs, 1),
+			"smbus2_ns_per_op": None if smbus2Ns is None else round(smbus2Ns, 1),
+			"ioctls_per_op": round(ioctls, 2)
+		}
+		_print_result(name, results[name])
+
+	if args.json is not None:
+		report = {
+			"python": platform.python_implementation() + " " + platform.python_version(),
+			"machine": platform.machine(),
+			"smbus2": None if smbus2 is None else smbus2.__version__,
+			"iterations": args.iterations,
+			"repeat": args.repeat,
+			"results": results
+		}
+		with open(args.json, "w") as f:
+			json.dump(report, f, indent=2, sort_keys=True)
+
+	if args.compare is not None:
+		with open(args.compare) as f:
+			saved = json.load(f)["results"]
+
+		regressions = _compare(results, saved, args.threshold)
+		if regressions:
+			print("\nRegressions:")
+			for regression in regressions:
+				print("  " + regression)
+			return 1
+
+		print("\nNo regressions")
+
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
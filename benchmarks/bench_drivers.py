@@ -0,0 +1,561 @@
+#-----------------------------------------------------------------------------
+# bench_drivers.py
+#
+# Measures the per-operation cost of the qwiic I2C drivers.
+#
+# Every public driver operation is run against the stub bus backends in
+# stub_backends.py, and compared with a baseline - the same operation done by
+# calling the backend directly, the way code that doesn't use qwiic_i2c would.
+# The difference is the cost the driver adds.
+#
+# For each operation this reports:
+#
+#	ns/op       - time per operation (the best of several runs)
+#	base ns/op  - time per operation for the raw backend baseline
+#	alloc B/op  - bytes allocated (and freed) while running one operation
+#	blocks/op   - memory blocks still allocated after each operation 
+#	xfers/op    - bus transfers (ioctls on Linux) per operation
+#
+# Usage:
+#
+#	python benchmarks/bench_drivers.py
+#	python benchmarks/bench_drivers.py --platforms linux --json results.json
+#	python benchmarks/bench_drivers.py --compare results.json --threshold 1.15
+#
+# With --compare, the exit status is 1 if any operation is slower than the
+# saved results by more than the threshold, or makes more bus transfers or 
+# allocations. Only compare results from the same machine and Python version.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import contextlib
+import io
+
+try:
+	import tracemalloc
+except ImportError:
+	tracemalloc = None
+
+_kBenchDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(_kBenchDir))
+sys.path.insert(0, _kBenchDir)
+
+# The stubs must be in place before the drivers are imported
+import stub_backends
+stub_backends.install()
+
+import qwiic_i2c
+from qwiic_i2c.i2c_transaction import _kFlagRead
+
+# A device that's present on the stub buses, and one that isn't
+_kAddress = 0x10
+_kMissingAddress = 0x11
+
+#-----------------------------------------------------------------------------
+# A benchmark case - an operation and the raw backend baseline it's compared
+# with. Slow operations (like scan) set a scale, to run fewer iterations. 
+# Backends other than the stubs provide their own transfer count.
+#
+class _Case(object):
+
+	def __init__(self, name, op, baseline=None, scale=1, transfers=stub_backends.transfers):
+		self.name = name
+		self.op = op
+		self.baseline = baseline
+		self.scale = scale
+		self.transfers = transfers
+
+#-----------------------------------------------------------------------------
+# Case builders, one per platform. Each returns a list of _Case.
+
+def _linux_cases():
+	from qwiic_i2c.linux_i2c import LinuxI2C
+	from smbus2 import i2c_msg
+
+	driver = LinuxI2C(1)
+	bus = driver._i2cbus
+
+	buf = bytearray(6)
+	data = bytes(range(6))
+	dataList = list(data)
+
+	# Prebuilt messages, for the i2c_rdwr baselines
+	commandMsg = i2c_msg.write(_kAddress, [0x28])
+	readMsg = i2c_msg.read(_kAddress, 6)
+	writeMsg = i2c_msg.write(_kAddress, [0x10] + dataList)
+
+	txn = driver.transaction().writeRead(_kAddress, [0x28], 6).writeRead(0x20, [0x68], 6)
+
+	# The same driver with operation metrics on
+	metricsDriver = LinuxI2C(1)
+	metricsDriver.enableMetrics()
+
+	# And with the fast path on
+	fastDriver = LinuxI2C(1)
+	fastDriver.enableFastPath()
+
+	# And with transfer timestamps
+	stampDriver = LinuxI2C(1)
+	stampDriver.enableTimestamps()
+
+	def raw_update():
+		value = bus.read_byte_data(_kAddress, 0x10)
+		bus.write_byte_data(_kAddress, 0x10, (value & ~0x0F) | 0x05)
+
+	# Long blocks, and the baselines that split them into SMBus block commands
+	# by hand
+	bigBuf = bytearray(4096)
+	bigData = bytes(4096)
+
+	def raw_chunked_read():
+		data = []
+		for offset in range(0, 4096, 32):
+			data += bus.read_i2c_block_data(_kAddress, offset & 0xFF, 32)
+		return data
+
+	def raw_chunked_read_into():
+		for offset in range(0, 4096, 32):
+			bigBuf[offset:offset + 32] = bytes(bus.read_i2c_block_data(_kAddress, offset & 0xFF, 32))
+
+	def raw_chunked_write():
+		for offset in range(0, 4096, 32):
+			bus.write_i2c_block_data(_kAddress, offset & 0xFF, bigData[offset:offset + 32])
+
+	# Four sensors read together, and one after the other
+	snapshotReads = [(_kAddress, 0x28, 6), (_kAddress, 0x22, 6), (0x20, 0x68, 6), (0x70, 0x28, 3)]
+
+	def raw_snapshot():
+		return [bus.read_i2c_block_data(address, register, nBytes) for (address, register, nBytes) in snapshotReads]
+
+	# Three big endian int16 values, decoded by hand
+	def raw_decode():
+		data = bus.read_i2c_block_data(_kAddress, 0x28, 6)
+		return tuple(((data[i] << 8) | data[i + 1]) - (((data[i] & 0x80) << 9)) for i in (0, 2, 4))
+
+	def raw_probe():
+		try:
+			bus.write_quick(_kMissingAddress)
+		except OSError:
+			pass
+
+	def raw_scan():
+		found = []
+		for address in range(0x08, 0x78):
+			try:
+				bus.write_quick(address)
+				found.append(address)
+			except OSError:
+				pass
+		return found
+
+	return [
+		_Case("readByte", lambda: driver.readByte(_kAddress, 0x0F), lambda: bus.read_byte_data(_kAddress, 0x0F)),
+		_Case("read_byte", lambda: driver.read_byte(_kAddress, 0x0F), lambda: bus.read_byte_data(_kAddress, 0x0F)),
+		_Case("readByte(metrics)", lambda: metricsDriver.readByte(_kAddress, 0x0F), lambda: bus.read_byte_data(_kAddress, 0x0F)),
+		_Case("readBlockInto(metrics)", lambda: metricsDriver.readBlockInto(_kAddress, 0x28, buf), lambda: bus.i2c_rdwr(commandMsg, readMsg)),
+		_Case("readByte(timestamps)", lambda: stampDriver.readByte(_kAddress, 0x0F), lambda: bus.read_byte_data(_kAddress, 0x0F)),
+		_Case("readBlockInto(timestamps)", lambda: stampDriver.readBlockInto(_kAddress, 0x28, buf), lambda: bus.i2c_rdwr(commandMsg, readMsg)),
+		_Case("readByte(fast)", lambda: fastDriver.readByte(_kAddress, 0x0F), lambda: bus.read_byte_data(_kAddress, 0x0F)),
+		_Case("read_byte(fast)", lambda: fastDriver.read_byte(_kAddress, 0x0F), lambda: bus.read_byte_data(_kAddress, 0x0F)),
+		_Case("readWord(fast)", lambda: fastDriver.readWord(_kAddress, 0x28), lambda: bus.read_word_data(_kAddress, 0x28)),
+		_Case("readBlock(fast)", lambda: fastDriver.readBlock(_kAddress, 0x28, 6), lambda: bus.read_i2c_block_data(_kAddress, 0x28, 6)),
+		_Case("writeCommand(fast)", lambda: fastDriver.writeCommand(_kAddress, 0x01), lambda: bus.write_byte(_kAddress, 0x01)),
+		_Case("writeByte(fast)", lambda: fastDriver.writeByte(_kAddress, 0x10, 0x40), lambda: bus.write_byte_data(_kAddress, 0x10, 0x40)),
+		_Case("write_byte(fast)", lambda: fastDriver.write_byte(_kAddress, 0x10, 0x40), lambda: bus.write_byte_data(_kAddress, 0x10, 0x40)),
+		_Case("writeWord(fast)", lambda: fastDriver.writeWord(_kAddress, 0x10, 0x1234), lambda: bus.write_word_data(_kAddress, 0x10, 0x1234)),
+		_Case("readByte(no command)", lambda: driver.readByte(_kAddress), lambda: bus.read_byte(_kAddress)),
+		_Case("readWord", lambda: driver.readWord(_kAddress, 0x28), lambda: bus.read_word_data(_kAddress, 0x28)),
+		_Case("read_word", lambda: driver.read_word(_kAddress, 0x28), lambda: bus.read_word_data(_kAddress, 0x28)),
+		_Case("readBlock", lambda: driver.readBlock(_kAddress, 0x28, 6), lambda: bus.read_i2c_block_data(_kAddress, 0x28, 6)),
+		_Case("read_block", lambda: driver.read_block(_kAddress, 0x28, 6), lambda: bus.read_i2c_block_data(_kAddress, 0x28, 6)),
+		_Case("readBlockInto", lambda: driver.readBlockInto(_kAddress, 0x28, buf), lambda: bus.i2c_rdwr(commandMsg, readMsg)),
+		_Case("readStruct", lambda: driver.readStruct(_kAddress, 0x28, ">3h"), raw_decode),
+		_Case("writeCommand", lambda: driver.writeCommand(_kAddress, 0x01), lambda: bus.write_byte(_kAddress, 0x01)),
+		_Case("writeByte", lambda: driver.writeByte(_kAddress, 0x10, 0x40), lambda: bus.write_byte_data(_kAddress, 0x10, 0x40)),
+		_Case("write_byte", lambda: driver.write_byte(_kAddress, 0x10, 0x40), lambda: bus.write_byte_data(_kAddress, 0x10, 0x40)),
+		_Case("writeWord", lambda: driver.writeWord(_kAddress, 0x10, 0x1234), lambda: bus.write_word_data(_kAddress, 0x10, 0x1234)),
+		_Case("writeBlock", lambda: driver.writeBlock(_kAddress, 0x10, data), lambda: bus.i2c_rdwr(writeMsg)),
+		_Case("writeBlock(list)", lambda: driver.writeBlock(_kAddress, 0x10, dataList), lambda: bus.write_i2c_block_data(_kAddress, 0x10, dataList)),
+		_Case("readBlock(4096)", lambda: driver.readBlock(_kAddress, 0x00, 4096), raw_chunked_read, scale=10),
+		_Case("readBlockInto(4096)", lambda: driver.readBlockInto(_kAddress, 0x00, bigBuf), raw_chunked_read_into, scale=10),
+		_Case("writeBlock(4096)", lambda: driver.writeBlock(_kAddress, 0x00, bigData), raw_chunked_write, scale=10),
+		_Case("writeReadBlock", lambda: driver.writeReadBlock(_kAddress, [0x28], 6), lambda: bus.i2c_rdwr(commandMsg, readMsg)),
+		_Case("writeReadInto", lambda: driver.writeReadInto(_kAddress, b"\x28", buf), lambda: bus.i2c_rdwr(commandMsg, readMsg)),
+		_Case("updateBits", lambda: driver.updateBits(_kAddress, 0x10, 0x0F, 0x05), raw_update),
+		_Case("snapshot(4 reads)", lambda: driver.snapshot(snapshotReads), raw_snapshot),
+		_Case("transaction.run", txn.run, lambda: bus.i2c_rdwr(commandMsg, readMsg, commandMsg, readMsg)),
+		_Case("isDeviceConnected", lambda: driver.isDeviceConnected(_kMissingAddress), raw_probe),
+		_Case("scan", driver.scan, raw_scan, scale=100)
+	]
+
+def _circuitpython_cases():
+	from qwiic_i2c.circuitpython_i2c import CircuitPythonI2C
+
+	driver = CircuitPythonI2C()
+	bus = driver._i2cbus
+
+	buf = bytearray(6)
+	data = bytes(range(6))
+	command = bytes((0x28,))
+	writeBuffer = bytes((0x10,)) + data
+
+	def raw_read(nBytes):
+		def read():
+			buffer = bytearray(nBytes)
+			bus.try_lock()
+			try:
+				bus.writeto_then_readfrom(_kAddress, command, buffer)
+			finally:
+				bus.unlock()
+			return buffer
+		return read
+
+	def raw_read_into():
+		bus.try_lock()
+		try:
+			bus.writeto_then_readfrom(_kAddress, command, buf)
+		finally:
+			bus.unlock()
+
+	def raw_write(buffer):
+		def write():
+			bus.try_lock()
+			try:
+				bus.writeto(_kAddress, buffer)
+			finally:
+				bus.unlock()
+		return write
+
+	return [
+		_Case("readByte", lambda: driver.readByte(_kAddress, 0x0F), raw_read(1)),
+		_Case("read_byte", lambda: driver.read_byte(_kAddress, 0x0F), raw_read(1)),
+		_Case("readWord", lambda: driver.readWord(_kAddress, 0x28), raw_read(2)),
+		_Case("readBlock", lambda: driver.readBlock(_kAddress, 0x28, 6), raw_read(6)),
+		_Case("readBlockInto", lambda: driver.readBlockInto(_kAddress, 0x28, buf), raw_read_into),
+		_Case("writeCommand", lambda: driver.writeCommand(_kAddress, 0x01), raw_write(bytes((0x01,)))),
+		_Case("writeByte", lambda: driver.writeByte(_kAddress, 0x10, 0x40), raw_write(bytes((0x10, 0x40)))),
+		_Case("writeWord", lambda: driver.writeWord(_kAddress, 0x10, 0x1234), raw_write(bytes((0x10, 0x34, 0x12)))),
+		_Case("writeBlock", lambda: driver.writeBlock(_kAddress, 0x10, data), raw_write(writeBuffer)),
+		_Case("writeReadBlock", lambda: driver.writeReadBlock(_kAddress, [0x28], 6), raw_read(6)),
+		_Case("writeReadInto", lambda: driver.writeReadInto(_kAddress, command, buf), raw_read_into),
+		_Case("isDeviceConnected", lambda: driver.isDeviceConnected(_kMissingAddress)),
+		_Case("scan", driver.scan, lambda: bus.scan())
+	]
+
+def _micropython_cases():
+	from qwiic_i2c.micropython_i2c import MicroPythonI2C
+	import machine
+
+	# The driver can't find a bus for this (host) platform, so give it the stub
+	with contextlib.redirect_stdout(io.StringIO()):
+		driver = MicroPythonI2C()
+	driver._i2cbus = machine.I2C(0)
+	bus = driver._i2cbus
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		fastDriver = MicroPythonI2C()
+	fastDriver._i2cbus = bus
+	fastDriver.enableFastPath()
+
+	buf = bytearray(6)
+	data = bytes(range(6))
+	command = bytes((0x28,))
+
+	def raw_write_read():
+		bus.writeto(_kAddress, command, False)
+		return bus.readfrom(_kAddress, 6)
+
+	def raw_write_read_into():
+		bus.writeto(_kAddress, command, False)
+		bus.readfrom_into(_kAddress, buf)
+
+	return [
+		_Case("readByte", lambda: driver.readByte(_kAddress, 0x0F), lambda: bus.readfrom_mem(_kAddress, 0x0F, 1)[0]),
+		_Case("read_byte", lambda: driver.read_byte(_kAddress, 0x0F), lambda: bus.readfrom_mem(_kAddress, 0x0F, 1)[0]),
+		_Case("readByte(fast)", lambda: fastDriver.readByte(_kAddress, 0x0F), lambda: bus.readfrom_mem(_kAddress, 0x0F, 1)[0]),
+		_Case("read_byte(fast)", lambda: fastDriver.read_byte(_kAddress, 0x0F), lambda: bus.readfrom_mem(_kAddress, 0x0F, 1)[0]),
+		_Case("readWord", lambda: driver.readWord(_kAddress, 0x28), lambda: bus.readfrom_mem(_kAddress, 0x28, 2)),
+		_Case("readBlock", lambda: driver.readBlock(_kAddress, 0x28, 6), lambda: bus.readfrom_mem(_kAddress, 0x28, 6)),
+		_Case("readBlockInto", lambda: driver.readBlockInto(_kAddress, 0x28, buf), lambda: bus.readfrom_mem_into(_kAddress, 0x28, buf)),
+		_Case("writeCommand", lambda: driver.writeCommand(_kAddress, 0x01), lambda: bus.writeto(_kAddress, bytes((0x01,)))),
+		_Case("writeByte", lambda: driver.writeByte(_kAddress, 0x10, 0x40), lambda: bus.writeto_mem(_kAddress, 0x10, bytes((0x40,)))),
+		_Case("writeWord", lambda: driver.writeWord(_kAddress, 0x10, 0x1234), lambda: bus.writeto_mem(_kAddress, 0x10, bytes((0x34, 0x12)))),
+		_Case("writeBlock", lambda: driver.writeBlock(_kAddress, 0x10, data), lambda: bus.writeto_mem(_kAddress, 0x10, data)),
+		_Case("readBlockInto(fast)", lambda: fastDriver.readBlockInto(_kAddress, 0x28, buf), lambda: bus.readfrom_mem_into(_kAddress, 0x28, buf)),
+		_Case("writeByte(fast)", lambda: fastDriver.writeByte(_kAddress, 0x10, 0x40), lambda: bus.writeto_mem(_kAddress, 0x10, bytes((0x40,)))),
+		_Case("write_byte(fast)", lambda: fastDriver.write_byte(_kAddress, 0x10, 0x40), lambda: bus.writeto_mem(_kAddress, 0x10, bytes((0x40,)))),
+		_Case("writeBlock(fast)", lambda: fastDriver.writeBlock(_kAddress, 0x10, data), lambda: bus.writeto_mem(_kAddress, 0x10, data)),
+		_Case("writeReadBlock", lambda: driver.writeReadBlock(_kAddress, [0x28], 6), raw_write_read),
+		_Case("writeReadInto", lambda: driver.writeReadInto(_kAddress, command, buf), raw_write_read_into),
+		_Case("isDeviceConnected", lambda: driver.isDeviceConnected(_kMissingAddress)),
+		_Case("scan", driver.scan, lambda: bus.scan())
+	]
+
+def _simulated_cases():
+	from qwiic_i2c import simulated_i2c
+
+	simBus = simulated_i2c.getSimulatedBus("bench")
+	simBus.attach(_kAddress, simulated_i2c.SimRegisterDevice())
+	driver = simulated_i2c.SimulatedI2C("bench")
+
+	buf = bytearray(6)
+	readSegments = ((_kAddress, 0, bytes((0x28,))), (_kAddress, _kFlagRead, buf))
+	writeSegments = ((_kAddress, 0, bytes((0x10, 0x40))),)
+
+	# A FIFO of 6 byte frames, refilled with 32 frames before each drain. The
+	# baseline reads the count, then one frame at a time
+	fifo = simBus.attach(0x68, simulated_i2c.SimFifoDevice(0x72, 0x74, 6, depth=32))
+	frames = [bytes((i,)) * 6 for i in range(32)]
+	fifoBuf = bytearray(32 * 6)
+
+	def fill():
+		for frame in frames:
+			fifo.push(frame)
+
+	def drain():
+		fill()
+		driver.drainFifoInto(0x68, 0x72, 0x74, 6, fifoBuf)
+
+	def raw_drain():
+		fill()
+		for i in range(driver.readByte(0x68, 0x72) // 6):
+			driver.readBlockInto(0x68, 0x74, memoryview(fifoBuf)[i * 6:i * 6 + 6])
+
+	# Two same address devices behind a mux. The baseline selects the channel 
+	# with its own write before every read
+	mux = simBus.attach(0x70, simulated_i2c.SimMuxDevice())
+	mux.attach(0, 0x6A, simulated_i2c.SimRegisterDevice())
+	mux.attach(1, 0x6A, simulated_i2c.SimRegisterDevice())
+	muxDriver = qwiic_i2c.MuxI2CDriver(driver)
+	muxDriver.mapAddress(0x100, 0x70, 0, 0x6A)
+	muxDriver.mapAddress(0x101, 0x70, 1, 0x6A)
+	muxReadSegments = ((0x6A, 0, bytes((0x28,))), (0x6A, _kFlagRead, buf))
+
+	def raw_mux_read(channel):
+		simBus.run(((0x70, 0, bytes((1 << channel,))),))
+		simBus.run(muxReadSegments)
+
+	def mux_switch():
+		muxDriver.readBlockInto(0x100, 0x28, buf)
+		muxDriver.readBlockInto(0x101, 0x28, buf)
+
+	def raw_mux_switch():
+		raw_mux_read(0)
+		raw_mux_read(1)
+
+	def transfers():
+		return simBus.transactions
+
+	return [
+		_Case("readByte", lambda: driver.readByte(_kAddress, 0x0F), lambda: simBus.run(readSegments), transfers=transfers),
+		_Case("readBlockInto", lambda: driver.readBlockInto(_kAddress, 0x28, buf), lambda: simBus.run(readSegments), transfers=transfers),
+		_Case("writeByte", lambda: driver.writeByte(_kAddress, 0x10, 0x40), lambda: simBus.run(writeSegments), transfers=transfers),
+		_Case("updateBits", lambda: driver.updateBits(_kAddress, 0x10, 0x0F, 0x05), transfers=transfers),
+		_Case("drainFifoInto(32 frames)", drain, raw_drain, scale=10, transfers=transfers),
+		_Case("readBlockInto(mux)", lambda: muxDriver.readBlockInto(0x100, 0x28, buf), lambda: raw_mux_read(0), transfers=transfers),
+		_Case("readBlockInto(mux, 2 channels)", mux_switch, raw_mux_switch, transfers=transfers)
+	]
+
+# platform name -> case builder
+_kPlatforms = {
+	"linux": _linux_cases,
+	"circuitpython": _circuitpython_cases,
+	"micropython": _micropython_cases,
+	"simulated": _simulated_cases
+}
+
+#-----------------------------------------------------------------------------
+# Measurement
+
+# Returns the best time per call, in nanoseconds, and the number of bus 
+# transfers per call
+def _time_op(op, iterations, repeat, transfers):
+	best = None
+	startTransfers = transfers()
+
+	for r in range(repeat):
+		start = time.perf_counter_ns()
+		for i in range(iterations):
+			op()
+		elapsed = time.perf_counter_ns() - start
+
+		if best is None or elapsed < best:
+			best = elapsed
+
+	return best / iterations, (transfers() - startTransfers) / (iterations * repeat)
+
+# Returns the bytes allocated while running one call (the peak, above what 
+# was allocated before), and the number of memory blocks left allocated per 
+# call
+def _alloc_op(op, iterations):
+	op()
+
+	allocBytes = None
+	if tracemalloc is not None and hasattr(tracemalloc, "reset_peak"):
+		tracemalloc.start()
+		op()
+		tracemalloc.reset_peak()
+		current = tracemalloc.get_traced_memory()[0]
+		op()
+		allocBytes = tracemalloc.get_traced_memory()[1] - current
+		tracemalloc.stop()
+
+	gc.collect()
+	blocks = sys.getallocatedblocks()
+	for i in range(iterations):
+		op()
+	blocks = sys.getallocatedblocks() - blocks
+
+	return allocBytes, blocks / iterations
+
+def _run_case(case, iterations, repeat):
+	iterations = max(1, iterations // case.scale)
+
+	nsPerOp, transfersPerOp = _time_op(case.op, iterations, repeat, case.transfers)
+	allocBytes, blocksPerOp = _alloc_op(case.op, iterations)
+
+	result = {
+		"ns_per_op": round(nsPerOp, 1),
+		"alloc_bytes_per_op": allocBytes,
+		"blocks_per_op": round(blocksPerOp, 3),
+		"transfers_per_op": transfersPerOp,
+		"baseline_ns_per_op": None,
+		"overhead_ns_per_op": None
+	}
+
+	if case.baseline is not None:
+		baselineNs, baselineTransfers = _time_op(case.baseline, iterations, repeat, case.transfers)
+		result["baseline_ns_per_op"] = round(baselineNs, 1)
+		result["overhead_ns_per_op"] = round(nsPerOp - baselineNs, 1)
+
+	return result
+
+#-----------------------------------------------------------------------------
+# Reporting
+
+def _format(value, fmt):
+	return "-" if value is None else fmt % (value,)
+
+def _print_header():
+	print("%-34s %10s %10s %10s %10s %9s %8s" % ("operation", "ns/op", "base ns", "overhead", "alloc B", "blocks", "xfers"))
+
+def _print_result(name, result):
+	print("%-34s %10s %10s %10s %10s %9s %8s" % (name, 
+		_format(result["ns_per_op"], "%.0f"),
+		_format(result["baseline_ns_per_op"], "%.0f"),
+		_format(result["overhead_ns_per_op"], "%.0f"),
+		_format(result["alloc_bytes_per_op"], "%d"),
+		_format(result["blocks_per_op"], "%.2f"),
+		_format(result["transfers_per_op"], "%.2f")))
+
+# Returns a list of regressions, comparing results with saved results
+def _compare(results, saved, threshold):
+	regressions = []
+
+	for name in sorted(results):
+		if name not in saved:
+			continue
+
+		new = results[name]
+		old = saved[name]
+
+		if new["ns_per_op"] > old["ns_per_op"] * threshold:
+			regressions.append("%s: %.0f ns/op, was %.0f ns/op (x%.2f)" % (name, new["ns_per_op"], old["ns_per_op"], new["ns_per_op"] / old["ns_per_op"]))
+
+		if new["transfers_per_op"] > old["transfers_per_op"]:
+			regressions.append("%s: %.2f transfers/op, was %.2f" % (name, new["transfers_per_op"], old["transfers_per_op"]))
+
+		if new["alloc_bytes_per_op"] is not None and old.get("alloc_bytes_per_op") is not None:
+			if new["alloc_bytes_per_op"] > old["alloc_bytes_per_op"] * threshold + 16:
+				regressions.append("%s: %d bytes allocated/op, was %d" % (name, new["alloc_bytes_per_op"], old["alloc_bytes_per_op"]))
+
+	return regressions
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Measure the per-operation cost of the qwiic I2C drivers")
+	parser.add_argument("--platforms", default=",".join(_kPlatforms), help="Comma separated platforms to run (default: all)")
+	parser.add_argument("--filter", default=None, help="Only run operations whose name contains this")
+	parser.add_argument("--iterations", type=int, default=20000, help="Calls per timing run")
+	parser.add_argument("--repeat", type=int, default=5, help="Timing runs per operation - the best is kept")
+	parser.add_argument("--json", default=None, help="Save the results to this JSON file")
+	parser.add_argument("--compare", default=None, help="Compare with results saved by --json")
+	parser.add_argument("--threshold", type=float, default=1.15, help="Slowdown ratio reported as a regression (default: 1.15)")
+	args = parser.parse_args(argv)
+
+	results = {}
+
+	_print_header()
+	for platformName in args.platforms.split(","):
+		for case in _kPlatforms[platformName]():
+			name = "%s.%s" % (platformName, case.name)
+			if args.filter is not None and args.filter not in name:
+				continue
+
+			results[name] = _run_case(case, args.iterations, args.repeat)
+			_print_result(name, results[name])
+
+	if args.json is not None:
+		report = {
+			"python": platform.python_implementation() + " " + platform.python_version(),
+			"machine": platform.machine(),
+			"iterations": args.iterations,
+			"repeat": args.repeat,
+			"results": results
+		}
+		with open(args.json, "w") as f:
+			json.dump(report, f, indent=2, sort_keys=True)
+
+	if args.compare is not None:
+		with open(args.compare) as f:
+			saved = json.load(f)["results"]
+
+		regressions = _compare(results, saved, args.threshold)
+		if regressions:
+			print("\nRegressions:")
+			for regression in regressions:
+				print("  " + regression)
+			return 1
+
+		print("\nNo regressions")
+
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,208 @@
+#-----------------------------------------------------------------------------
+# bench_import.py
+#
+# Measures what it costs to start using the qwiic I2C package.
+#
+# Each scenario runs in a fresh Python process, and times:
+#
+#	import ms  - "import qwiic_i2c"
+#	driver ms  - the first qwiic_i2c.getI2CDriver() call, which loads the 
+#	             platform driver and its bus backend
+#
+# and reports the modules that were loaded by them - only the driver for this
+# platform (and its backend) should be.
+#
+# Usage:
+#
+#	python benchmarks/bench_import.py
+#	python benchmarks/bench_import.py --json results.json
+#	python benchmarks/bench_import.py --compare results.json --threshold 1.25
+#
+# With --compare, the exit status is 1 if any scenario is slower than the 
+# saved results by more than the threshold, or loads a driver module it didn't
+# load before. Only compare results from the same machine and Python version.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+
+
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+
+_kBenchDir = os.path.dirname(os.path.abspath(__file__))
+_kRootDir = os.path.dirname(_kBenchDir)
+
+# The modules reported if qwiic_i2c loads them - the platform drivers, the bus
+# backends, and the heavier standard library modules
+_kWatchedModules = (
+	"qwiic_i2c.simulated_i2c",
+	"qwiic_i2c.linux_i2c",
+	"qwiic_i2c.circuitpython_i2c",
+	"qwiic_i2c.micropython_i2c",
+	"smbus2",
+	"busio",
+	"board",
+	"machine",
+	"ctypes",
+	"threading",
+	"random"
+)
+
+# Run in the child process. The setup code is filled in for each scenario.
+_kChildCode = """
+import sys, time, json
+sys.path.insert(0, %(root)r)
+sys.path.insert(0, %(bench)r)
+%(setup)s
+before = set(sys.modules)
+start = time.perf_counter_ns()
+import qwiic_i2c
+imported = time.perf_counter_ns()
+loadedAtImport = [name for name in %(watched)r if name in sys.modules and name not in before]
+driver = qwiic_i2c.getI2CDriver() if %(driver)r else None
+done = time.perf_counter_ns()
+print(json.dumps({
+	"import_ns": imported - start,
+	"driver_ns": done - imported,
+	"driver": driver.name if driver is not None else None,
+	"loaded_at_import": loadedAtImport,
+	"loaded": [name for name in %(watched)r if name in sys.modules and name not in before]
+}))
+"""
+
+#-----------------------------------------------------------------------------
+# Scenarios - name: (setup code, whether to get a driver)
+#
+# The stub backends stand in for smbus2, busio/board and machine, so the Linux
+# driver can be created without I2C hardware.
+#
+_kScenarios = {
+	"import": ("", False),
+	"linux": ("import stub_backends; stub_backends.install()", True),
+	"simulated": ("import os; os.environ['QWIIC_I2C_SIMULATE'] = '1'", True)
+}
+
+# Runs a scenario once, in a new process, and returns the child's report
+def _run_once(setup, getDriver):
+	code = _kChildCode % {
+		"root": _kRootDir,
+		"bench": _kBenchDir,
+		"setup": setup,
+		"watched": _kWatchedModules,
+		"driver": getDriver
+	}
+
+	env = dict(os.environ)
+	env.pop("QWIIC_I2C_SIMULATE", None)
+
+	output = subprocess.check_output([sys.executable, "-c", code], env=env)
+
+	# The report is the last line - drivers may print before it
+	return json.loads(output.decode().strip().splitlines()[-1])
+
+# Runs a scenario <repeat> times, keeping the best times
+def _run_scenario(setup, getDriver, repeat):
+	runs = [_run_once(setup, getDriver) for i in range(repeat)]
+
+	result = {
+		"import_ms": round(min(run["import_ns"] for run in runs) / 1e6, 3),
+		"driver_ms": round(min(run["driver_ns"] for run in runs) / 1e6, 3) if getDriver else None,
+		"driver": runs[0]["driver"],
+		"loaded_at_import": runs[0]["loaded_at_import"],
+		"loaded": runs[0]["loaded"]
+	}
+
+	return result
+
+#-----------------------------------------------------------------------------
+# Reporting
+
+def _print_result(name, result):
+	print("%-12s %10.3f %10s  %-16s %s" % (name, 
+		result["import_ms"],
+		"-" if result["driver_ms"] is None else "%.3f" % (result["driver_ms"],),
+		result["driver"] or "-",
+		", ".join(result["loaded"]) or "-"))
+
+# Returns a list of regressions, comparing results with saved results
+def _compare(results, saved, threshold):
+	regressions = []
+
+	for name in sorted(results):
+		if name not in saved:
+			continue
+
+		new = results[name]
+		old = saved[name]
+
+		for key in ("import_ms", "driver_ms"):
+			if new[key] is None or old.get(key) is None:
+				continue
+			if new[key] > old[key] * threshold:
+				regressions.append("%s: %s %.3f, was %.3f (x%.2f)" % (name, key, new[key], old[key], new[key] / old[key]))
+
+		for module in new["loaded"]:
+			if module.startswith("qwiic_i2c.") and module not in old["loaded"]:
+				regressions.append("%s: now loads %s" % (name, module))
+
+	return regressions
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Measure the import and first driver cost of the qwiic I2C package")
+	parser.add_argument("--scenarios", default=",".join(_kScenarios), help="Comma separated scenarios to run (default: all)")
+	parser.add_argument("--repeat", type=int, default=10, help="Processes started per scenario - the best times are kept")
+	parser.add_argument("--json", default=None, help="Save the results to this JSON file")
+	parser.add_argument("--compare", default=None, help="Compare with results saved by --json")
+	parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression (default: 1.25)")
+	args = parser.parse_args(argv)
+
+	results = {}
+
+	print("%-12s %10s %10s  %-16s %s" % ("scenario", "import ms", "driver ms", "driver", "modules loaded"))
+	for name in args.scenarios.split(","):
+		setup, getDriver = _kScenarios[name]
+		results[name] = _run_scenario(setup, getDriver, args.repeat)
+		_print_result(name, results[name])
+
+	if args.json is not None:
+		report = {
+			"python": platform.python_implementation() + " " + platform.python_version(),
+			"machine": platform.machine(),
+			"repeat": args.repeat,
+			"results": results
+		}
+		with open(args.json, "w") as f:
+			json.dump(report, f, indent=2, sort_keys=True)
+
+	if args.compare is not None:
+		with open(args.compare) as f:
+			saved = json.load(f)["results"]
+
+		regressions = _compare(results, saved, args.threshold)
+		if regressions:
+			print("\nRegressions:")
+			for regression in regressions:
+				print("  " + regression)
+			return 1
+
+		print("\nNo regressions")
+
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,241 @@
+#-----------------------------------------------------------------------------
+# stub_backends.py
+#
+# Stub versions of the bus modules the platform drivers are built on - smbus2
+# (Linux), busio and board (CircuitPython) and machine (MicroPython). 
+#
+# The stubs do as little as possible, so a benchmark measures the cost of the
+# driver rather than the backend. Every call that would be a bus transfer (an
+# ioctl on Linux) is counted, so benchmarks can report transfers per operation.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+
+import sys
+import types
+import ctypes
+
+# The addresses that acknowledge on every stub bus
+PRESENT = frozenset((0x10, 0x20, 0x70))
+
+# Number of bus transfers (ioctls on Linux) made through the stubs
+_transfers = [0]
+
+def transfers():
+	""" Returns the number of bus transfers made through the stubs """
+	return _transfers[0]
+
+def _nack(address):
+	if address not in PRESENT:
+		raise OSError(121, "Remote I/O error")
+
+#-----------------------------------------------------------------------------
+# smbus2
+#
+# i2c_msg matches the smbus2 structure, as the Linux driver builds messages
+# with ctypes.
+#
+class i2c_msg(ctypes.Structure):
+	_fields_ = [("addr", ctypes.c_uint16), ("flags", ctypes.c_uint16), ("len", ctypes.c_uint16), ("buf", ctypes.POINTER(ctypes.c_char))]
+
+	@staticmethod
+	def read(address, length):
+		return i2c_msg(addr=address, flags=0x0001, len=length, buf=ctypes.create_string_buffer(length))
+
+	@staticmethod
+	def write(address, buf):
+		buf = bytes(buf)
+		return i2c_msg(addr=address, flags=0, len=len(buf), buf=ctypes.create_string_buffer(buf, len(buf)))
+
+	def __iter__(self):
+		for i in range(self.len):
+			yield ord(self.buf[i])
+
+	def __len__(self):
+		return self.len
+
+class SMBus(object):
+
+	def __init__(self, bus=None):
+		self.bus = bus
+		self.fd = -1
+		# I2C_FUNC_I2C | I2C_FUNC_SMBUS_QUICK | I2C_FUNC_SMBUS_READ_BYTE | I2C_FUNC_SMBUS_I2C_BLOCK
+		self.funcs = 0x1 | 0x00010000 | 0x00020000 | 0x0C000000
+
+	def close(self):
+		pass
+
+	def write_quick(self, i2c_addr, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+
+	def read_byte(self, i2c_addr, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+		return 0
+
+	def write_byte(self, i2c_addr, value, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+
+	def read_byte_data(self, i2c_addr, register, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+		return 0
+
+	def write_byte_data(self, i2c_addr, register, value, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+
+	def read_word_data(self, i2c_addr, register, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+		return 0
+
+	def write_word_data(self, i2c_addr, register, value, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+
+	def read_i2c_block_data(self, i2c_addr, register, length, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+		return [0] * length
+
+	def write_i2c_block_data(self, i2c_addr, register, data, force=None):
+		_transfers[0] += 1
+		_nack(i2c_addr)
+
+	def i2c_rdwr(self, *i2c_msgs):
+		_transfers[0] += 1
+		for msg in i2c_msgs:
+			_nack(msg.addr)
+
+#-----------------------------------------------------------------------------
+# busio and board
+#
+class _BusioI2C(object):
+
+	def __init__(self, scl=None, sda=None, frequency=100000):
+		self._locked = False
+
+	def try_lock(self):
+		if self._locked:
+			return False
+		self._locked = True
+		return True
+
+	def unlock(self):
+		self._locked = False
+
+	def deinit(self):
+		pass
+
+	def writeto(self, address, buffer, *, start=0, end=None):
+		_transfers[0] += 1
+		_nack(address)
+
+	def readfrom_into(self, address, buffer, *, start=0, end=None):
+		_transfers[0] += 1
+		_nack(address)
+
+	def writeto_then_readfrom(self, address, buffer_out, buffer_in, *, out_start=0, out_end=None, in_start=0, in_end=None):
+		_transfers[0] += 1
+		_nack(address)
+
+	def scan(self):
+		_transfers[0] += 1
+		return sorted(PRESENT)
+
+#-----------------------------------------------------------------------------
+# machine
+#
+class _Pin(object):
+
+	def __init__(self, id, *args, **kwargs):
+		self.id = id
+
+class _MachineI2C(object):
+
+	def __init__(self, *args, **kwargs):
+		pass
+
+	def readfrom(self, addr, nbytes, stop=True):
+		_transfers[0] += 1
+		_nack(addr)
+		return bytes(nbytes)
+
+	def readfrom_into(self, addr, buf, stop=True):
+		_transfers[0] += 1
+		_nack(addr)
+
+	def writeto(self, addr, buf, stop=True):
+		_transfers[0] += 1
+		_nack(addr)
+		return len(buf)
+
+	def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+		_transfers[0] += 1
+		_nack(addr)
+		return bytes(nbytes)
+
+	def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+		_transfers[0] += 1
+		_nack(addr)
+
+	def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+		_transfers[0] += 1
+		_nack(addr)
+
+	def scan(self):
+		_transfers[0] += 1
+		return sorted(PRESENT)
+
+#-----------------------------------------------------------------------------
+# Installs the stubs in sys.modules. Must be called before qwiic_i2c is
+# imported.
+def install():
+	smbus2 = types.ModuleType("smbus2")
+	smbus2.SMBus = SMBus
+	smbus2.i2c_msg = i2c_msg
+
+	busio = types.ModuleType("busio")
+	busio.I2C = _BusioI2C
+
+	board = types.ModuleType("board")
+	board.SCL = 1
+	board.SDA = 2
+
+	machine = types.ModuleType("machine")
+	machine.I2C = _MachineI2C
+	machine.Pin = _Pin
+
+	sys.modules.update({"smbus2": smbus2, "busio": busio, "board": board, "machine": machine})
@@ -64,27 +64,147 @@ New to qwiic? Take a look at the entire [SparkFun qwiic ecosystem](https://www.s
 #-----------------------------------------------------------------------------
 # Drivers and driver baseclass
 from .i2c_driver import I2CDriver
+from .i2c_transaction import I2CTransaction
+from .i2c_retry import RetryPolicy
 
-# All supported platform module and class names
+# Driver layers
+from .i2c_proxy import I2CDriverProxy
+from .i2c_cache import CachedI2CDriver
+from .i2c_presence import PresenceMonitor
+from .i2c_mux import MuxI2CDriver
+
+from .i2c_lock import _Lock
+
+import sys
+
+#-----------------------------------------------------------------------------
+# Platform detection
+#
+# Each platform has a check that doesn't need its driver module, so only the
+# driver for this platform (and its bus modules) is imported - and only when 
+# the first driver is requested. The checks match the drivers' isPlatform().
+
+def _is_simulated():
+	# Enabled with simulated_i2c.enable() (so the module is loaded already), or
+	# with the environment variable
+	simulated = sys.modules.get(__name__ + ".simulated_i2c")
+	if simulated is not None and simulated._enabled:
+		return True
+
+	try:
+		import os
+		return bool(os.environ.get("QWIIC_I2C_SIMULATE"))
+	except (ImportError, AttributeError):
+		return False
+
+def _is_linux():
+	return sys.platform in ('linux', 'linux2')
+
+def _is_circuitpython():
+	try:
+		return 'circuitpython' in sys.implementation
+	except:
+		return False
+
+def _is_micropython():
+	try:
+		return 'micropython' in sys.implementation
+	except:
+		return False
+
+# All supported platform module and class names. The simulated driver comes
+# first, so it's used instead of the platform's driver once it's enabled
 _supported_platforms = {
+	"simulated_i2c": "SimulatedI2C",
 	"linux_i2c": "LinuxI2C",
 	"circuitpython_i2c": "CircuitPythonI2C",
 	"micropython_i2c": "MicroPythonI2C"
 }
 
-# List of platform drivers found on this system
-_drivers = []
+# The check for each platform
+_platform_checks = {
+	"simulated_i2c": _is_simulated,
+	"linux_i2c": _is_linux,
+	"circuitpython_i2c": _is_circuitpython,
+	"micropython_i2c": _is_micropython
+}
+
+# Platform driver classes imported so far, by module name
+_drivers = {}
+
+#-------------------------------------------------
+# Internal method to find the driver class for this platform, importing its
+# module the first time. Returns None if there isn't one.
+def _get_driver_class():
+	for module_name, class_name in _supported_platforms.items():
+		if not _platform_checks[module_name]():
+			continue
+
+		driverClass = _drivers.get(module_name)
+		if driverClass is None:
+			try:
+				sub_module = __import__(__name__ + "." + module_name, None, None, [None])
+				driverClass = getattr(sub_module, class_name)
+			except:
+				# The driver can't be loaded here - try the next platform
+				continue
+
+			_drivers[module_name] = driverClass
+
+		return driverClass
+
+	return None
+
+# Pool of the drivers handed out by getI2CDriver(), keyed by driver class and
+# bus (the bus id, backend and driver settings on Linux, the pins and 
+# frequency on CircuitPython and MicroPython). Requests for the same bus share
+# one driver - and one open bus handle - which is reference counted and closed
+# by releaseI2CDriver().
+_driver_pool = {}
+
+# Guards the pool and the reference counts, so threads asking for the same bus
+# at once share one driver rather than each opening the bus
+_driver_pool_lock = _Lock()
+
+#-------------------------------------------------
+# Internal method to find (or create) the pooled driver for the provided 
+# arguments. If addRef is set, the driver's reference count is incremented
+def _get_pooled_driver(args, argk, addRef):
+
+	driverClass = _get_driver_class()
+
+	# If we get here, we didn't find a driver for this platform
+	if driverClass is None:
+		return None
+
+	key = (driverClass, driverClass._pool_key(*args, **argk))
 
-# Loop through all supported platform drivers, see if they're included, and
-# append them to the driver list if so
-for module_name, class_name in _supported_platforms.items():
+	_driver_pool_lock.acquire()
 	try:
-		sub_module = __import__("qwiic_i2c." + module_name, None, None, [None])
-		_drivers.append(getattr(sub_module, class_name))
-	except:
-		pass
+		driver = _driver_pool.get(key)
+
+		# A driver that was closed is only replaced once no one holds it - 
+		# otherwise its users would be left with a closed driver, and a 
+		# reference count that's no longer in the pool
+		if driver is not None and driver.i2cbus is None:
+			if driver._refCount > 0:
+				raise RuntimeError("The pooled I2C driver for this bus was closed while in use - release it with releaseI2CDriver() first")
+
+			del _driver_pool[key]
+			driver.close()
+			driver = None
+
+		# Create a new driver if we don't have one for this bus
+		if driver is None:
+			driver = driverClass(*args, **argk)
+			_driver_pool[key] = driver
+
+		if addRef:
+			driver._refCount += 1
+	finally:
+		_driver_pool_lock.release()
 
-_default_driver = None
+	return driver
 
 #-------------------------------------------------
 # Exported method to get the I2C driver for the execution plaform. 
@@ -96,6 +216,13 @@ def getI2CDriver(*args, **argk):
 
 		Returns the qwiic I2C driver object for current platform.
 
+		Drivers are shared - requesting the same bus with the same settings 
+		(iBus, backend, probeMethod and processLock on Linux, or sda, scl and 
+		freq on CircuitPython and MicroPython) returns the same driver object 
+		and open bus handle. Call releaseI2CDriver() when the driver is 
+		no longer needed. If the shared driver was closed while others still
+		hold it, a RuntimeError is raised rather than handing out a new one.
+
 		:return: A qwiic I2C driver object for the current platform.
 		:rtype: object
 
@@ -105,27 +232,7 @@ def getI2CDriver(*args, **argk):
 		>>> i2cDriver = qwiic_i2c.getI2CDriver()
 		>>> myData = i2cDriver.readByte(0x73, 0x34)
 	"""
-
-	# If no parameters are provided, return the default driver if we have it
-	global _default_driver
-	if len(argk) == 0 and _default_driver != None:
-		return _default_driver
-	
-	# Loop through all the drivers to find the one for this platform
-	for driverClass in _drivers:
-		if driverClass.isPlatform():
-			# Found it!
-			driver = driverClass(*args, **argk)
-
-			# If no parameters are provided, set this as the default driver
-			if len(argk) == 0:
-				_default_driver = driver
-			
-			# And return it
-			return driver
-	
-	# If we get here, we didn't find a driver for this platform
-	return None
+	return _get_pooled_driver(args, argk, True)
 
 def get_i2c_driver(*args, **argk):
 	"""
@@ -144,6 +251,95 @@ def get_i2c_driver(*args, **argk):
 	"""
 	return getI2CDriver(*args, **argk)
 
+#-------------------------------------------------
+# Method to release a driver returned by getI2CDriver(). The bus handle is
+# closed once every user of the driver has released it.
+def releaseI2CDriver(driver):
+	"""
+	.. function:: releaseI2CDriver()
+
+		Releases a driver returned by getI2CDriver(). Once every user of the 
+		driver has released it, the driver is closed and removed from the pool.
+
+		:param driver: The driver to release
+
+		:return: True if the driver was closed, otherwise False.
+		:rtype: bool
+
+		:example:
+
+		>>> import qwiic_i2c
+		>>> i2cDriver = qwiic_i2c.getI2CDriver(iBus = 1)
+		>>> myData = i2cDriver.readByte(0x73, 0x34)
+		>>> qwiic_i2c.releaseI2CDriver(i2cDriver)
+	"""
+	_driver_pool_lock.acquire()
+	try:
+		if driver._refCount > 0:
+			driver._refCount -= 1
+
+		if driver._refCount > 0:
+			return False
+
+		for key, pooledDriver in list(_driver_pool.items()):
+			if pooledDriver is driver:
+				del _driver_pool[key]
+	finally:
+		_driver_pool_lock.release()
+
+	driver.close()
+	return True
+
+def release_i2c_driver(driver):
+	"""
+	.. function:: release_i2c_driver()
+
+		Releases a driver returned by get_i2c_driver(). Once every user of the 
+		driver has released it, the driver is closed and removed from the pool.
+
+		:param driver: The driver to release
+
+		:return: True if the driver was closed, otherwise False.
+		:rtype: bool
+
+	"""
+	return releaseI2CDriver(driver)
+
+#-------------------------------------------------
+# Method to close every pooled driver - regardless of how many users it has
+def closeI2CDrivers():
+	"""
+	.. function:: closeI2CDrivers()
+
+		Closes every driver returned by getI2CDriver() and empties the pool.
+
+		:return: None
+
+	"""
+	_driver_pool_lock.acquire()
+	try:
+		drivers = list(_driver_pool.values())
+		_driver_pool.clear()
+
+		for driver in drivers:
+			driver._refCount = 0
+	finally:
+		_driver_pool_lock.release()
+
+	for driver in drivers:
+		driver.close()
+
+def close_i2c_drivers():
+	"""
+	.. function:: close_i2c_drivers()
+
+		Closes every driver returned by get_i2c_driver() and empties the pool.
+
+		:return: None
+
+	"""
+	return closeI2CDrivers()
+
 #-------------------------------------------------
 # Method to determine if a particular device (at the provided address)
 # is connected to the bus.
@@ -160,7 +356,9 @@ def isDeviceConnected(devAddress, *args, **argk):
 		:rtype: bool
 
 	"""
-	i2c = getI2CDriver(*args, **argk)
+	# Use the pooled driver without taking a reference - there's no one to
+	# release it
+	i2c = _get_pooled_driver(args, argk, False)
 
 	if not i2c:
 		print("Unable to load the I2C driver for this device")
@@ -0,0 +1,325 @@
+#-----------------------------------------------------------------------------
+# async_i2c.py
+#
+# asyncio front-end for the qwiic I2C drivers.
+#
+# The platform drivers block while a transfer is on the bus. This wraps any
+# driver with awaitable versions of its operations, run on a worker thread so
+# the event loop never blocks. Each bus has one worker thread and one
+# asyncio.Lock, so operations on a bus are serialized while different buses
+# make progress at the same time.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+async_i2c
+=========
+An asyncio front-end that wraps any qwiic I2C driver with awaitable versions of
+its operations. This module isn't imported by the qwiic_i2c package - import it
+directly.
+
+:example:
+
+	>>> import qwiic_i2c
+	>>> from qwiic_i2c.async_i2c import AsyncI2CDriver
+	>>> i2c = AsyncI2CDriver(qwiic_i2c.getI2CDriver())
+	>>> async def read_sensor():
+	...     async with i2c:
+	...         await i2c.writeByte(0x6B, 0x10, 0x40)
+	...         return await i2c.readBlock(0x6B, 0x28, 6)
+
+"""
+
+import asyncio
+import contextvars
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+#-----------------------------------------------------------------------------
+# The lock for a bus on one event loop. Each time it's acquired it gets a new
+# hold token, which is set in the acquiring task's context.
+#
+class _LoopLock(object):
+
+	def __init__(self):
+		self.lock = asyncio.Lock()
+		self.hold = None
+		self.depth = 0
+
+#-----------------------------------------------------------------------------
+# Per bus state, shared by every AsyncI2CDriver on the same bus.
+#
+# asyncio locks belong to an event loop, so there's a lock for each running 
+# loop - a later asyncio.run() gets a new one. Locks go when their loop does.
+#
+# The lock is re-entrant for the task tree that holds it: the hold token is 
+# kept in a context variable, and tasks copy their context when they're 
+# created. So operations awaited inside an "async with driver:" block - and in
+# tasks created inside it (e.g. by asyncio.gather()) - don't wait on it.
+#
+class _AsyncBus(object):
+
+	def __init__(self, busKey):
+		# One worker thread per bus - transfers on a bus run one at a time, in order
+		self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qwiic_i2c_%s" % (str(busKey),))
+
+		# event loop -> _LoopLock
+		self.loopLocks = weakref.WeakKeyDictionary()
+
+		# The hold token of the lock the current task (tree) holds
+		self.holding = contextvars.ContextVar("qwiic_i2c_hold_%s" % (str(busKey),), default=None)
+
+	def _loop_lock(self):
+		loop = asyncio.get_running_loop()
+
+		loopLock = self.loopLocks.get(loop)
+		if loopLock is None:
+			loopLock = _LoopLock()
+			self.loopLocks[loop] = loopLock
+
+		return loopLock
+
+	async def acquire(self):
+		loopLock = self._loop_lock()
+
+		if loopLock.hold is None or self.holding.get() is not loopLock.hold:
+			await loopLock.lock.acquire()
+			loopLock.hold = object()
+			self.holding.set(loopLock.hold)
+
+		loopLock.depth += 1
+
+	def release(self):
+		loopLock = self._loop_lock()
+
+		loopLock.depth -= 1
+		if loopLock.depth == 0:
+			loopLock.hold = None
+			loopLock.lock.release()
+
+# bus key -> _AsyncBus
+_async_buses = {}
+
+def _get_async_bus(driver):
+	# Drivers that don't identify their bus get a bus of their own
+	busKey = driver._busKey if driver._busKey is not None else id(driver)
+
+	bus = _async_buses.get(busKey)
+	if bus is None:
+		bus = _AsyncBus(busKey)
+		_async_buses[busKey] = bus
+
+	return bus
+
+#-----------------------------------------------------------------------------
+# AsyncI2CDriver
+#
+class AsyncI2CDriver(object):
+	"""
+	AsyncI2CDriver
+
+		Wraps an I2C driver with awaitable versions of its operations. Each call
+		runs on the bus's worker thread while holding the bus's asyncio lock. Use
+		"async with driver:" to hold the lock across several operations.
+
+		The lock is shared with tasks created inside an "async with driver:" 
+		block (e.g. by asyncio.gather()), so they can use the bus without 
+		deadlocking - their operations still run one at a time. It only 
+		excludes tasks on the same event loop.
+
+		:param driver: The I2C driver to wrap
+
+		:return: The asyncio I2C Driver interface for the qwiic system.
+		:rtype: Object
+	"""
+
+	def __init__(self, driver):
+		self._driver = driver
+		self._bus = _get_async_bus(driver)
+		self.name = driver.name
+
+	@property
+	def driver(self):
+		""" The wrapped I2C driver """
+		return self._driver
+
+	async def __aenter__(self):
+		await self._bus.acquire()
+		return self
+
+	async def __aexit__(self, type, value, traceback):
+		self._bus.release()
+
+	# Runs a blocking driver call on the bus's worker thread, holding the bus lock
+	async def _run(self, func, *args):
+		await self._bus.acquire()
+		try:
+			return await asyncio.get_running_loop().run_in_executor(self._bus.executor, func, *args)
+		finally:
+			self._bus.release()
+
+	#-------------------------------------------------------------------------
+	# read Data Command
+
+	async def readWord(self, address, commandCode):
+		return await self._run(self._driver.readWord, address, commandCode)
+
+	async def read_word(self, address, commandCode):
+		return await self.readWord(address, commandCode)
+
+	async def readByte(self, address, commandCode = None):
+		return await self._run(self._driver.readByte, address, commandCode)
+
+	async def read_byte(self, address, commandCode = None):
+		return await self.readByte(address, commandCode)
+
+	async def readBlock(self, address, commandCode, nBytes):
+		return await self._run(self._driver.readBlock, address, commandCode, nBytes)
+
+	async def read_block(self, address, commandCode, nBytes):
+		return await self.readBlock(address, commandCode, nBytes)
+
+	async def readBlockInto(self, address, commandCode, buf):
+		return await self._run(self._driver.readBlockInto, address, commandCode, buf)
+
+	async def read_block_into(self, address, commandCode, buf):
+		return await self.readBlockInto(address, commandCode, buf)
+
+	async def writeReadInto(self, address, writeBytes, buf):
+		return await self._run(self._driver.writeReadInto, address, writeBytes, buf)
+
+	async def write_read_into(self, address, writeBytes, buf):
+		return await self.writeReadInto(address, writeBytes, buf)
+
+	async def readStruct(self, address, register, fmt):
+		return await self._run(self._driver.readStruct, address, register, fmt)
+
+	async def read_struct(self, address, register, fmt):
+		return await self.readStruct(address, register, fmt)
+
+	async def readArray(self, address, register, dtype, count):
+		return await self._run(self._driver.readArray, address, register, dtype, count)
+
+	async def read_array(self, address, register, dtype, count):
+		return await self.readArray(address, register, dtype, count)
+
+	#-------------------------------------------------------------------------
+	# write Data Commands
+
+	async def writeCommand(self, address, commandCode):
+		return await self._run(self._driver.writeCommand, address, commandCode)
+
+	async def write_command(self, address, commandCode):
+		return await self.writeCommand(address, commandCode)
+
+	async def writeWord(self, address, commandCode, value):
+		return await self._run(self._driver.writeWord, address, commandCode, value)
+
+	async def write_word(self, address, commandCode, value):
+		return await self.writeWord(address, commandCode, value)
+
+	async def writeByte(self, address, commandCode, value):
+		return await self._run(self._driver.writeByte, address, commandCode, value)
+
+	async def write_byte(self, address, commandCode, value):
+		return await self.writeByte(address, commandCode, value)
+
+	async def writeBlock(self, address, commandCode, value):
+		return await self._run(self._driver.writeBlock, address, commandCode, value)
+
+	async def write_block(self, address, commandCode, value):
+		return await self.writeBlock(address, commandCode, value)
+
+	async def writeReadBlock(self, address, writeBytes, readNBytes):
+		return await self._run(self._driver.writeReadBlock, address, writeBytes, readNBytes)
+
+	async def write_read_block(self, address, writeBytes, readNBytes):
+		return await self.writeReadBlock(address, writeBytes, readNBytes)
+
+	#-------------------------------------------------------------------------
+	# Bit-field updates
+
+	async def updateBits(self, address, register, mask, value, width=8):
+		return await self._run(self._driver.updateBits, address, register, mask, value, width)
+
+	async def update_bits(self, address, register, mask, value, width=8):
+		return await self.updateBits(address, register, mask, value, width)
+
+	async def updateFields(self, address, register, fields, width=8):
+		return await self._run(self._driver.updateFields, address, register, fields, width)
+
+	async def update_fields(self, address, register, fields, width=8):
+		return await self.updateFields(address, register, fields, width)
+
+	#-------------------------------------------------------------------------
+	# Transactions
+
+	def transaction(self):
+		"""
+			Creates a transaction for the wrapped driver. Send it with
+			runTransaction().
+
+			:return: A new, empty transaction
+			:rtype: I2CTransaction
+
+		"""
+		return self._driver.transaction()
+
+	async def runTransaction(self, transaction):
+		"""
+			Sends all the messages queued in a transaction to the I2C bus.
+
+			:param transaction: The transaction to send
+
+			:return: The buffers for each queued read, in the order they were queued.
+			:rtype: list
+
+		"""
+		return await self._run(transaction.run)
+
+	async def run_transaction(self, transaction):
+		return await self.runTransaction(transaction)
+
+	#-------------------------------------------------------------------------
+	# Device detection
+
+	async def isDeviceConnected(self, devAddress):
+		return await self._run(self._driver.isDeviceConnected, devAddress)
+
+	async def is_device_connected(self, devAddress):
+		return await self.isDeviceConnected(devAddress)
+
+	async def ping(self, devAddress):
+		return await self.isDeviceConnected(devAddress)
+
+	async def scan(self):
+		return await self._run(self._driver.scan)
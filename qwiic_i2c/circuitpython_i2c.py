@@ -37,6 +37,7 @@
 #  NO: There is no future with cicuit py
 
 from .i2c_driver import I2CDriver
+from .i2c_transaction import _kFlagRead, _kFlagStop, _as_write_buffer
 
 import sys
 import os
@@ -100,6 +101,9 @@ class CircuitPythonI2C(I2CDriver):
 	# Constructor
 	name = _PLATFORM_NAME
 
+	# Writes not followed by a read from the same device end with a stop
+	_stopFlag = True
+
 	_i2cbus = None
 
 	def __init__(self, sda=None, scl=None, freq=100000, *args, **argk):
@@ -111,9 +115,15 @@ class CircuitPythonI2C(I2CDriver):
 		self._sda = sda
 		self._scl = scl
 		self._freq = freq
+		self._busKey = (sda, scl, freq)
 
 		self._i2cbus = _connectToI2CBus(sda=self._sda, scl=self._scl, freq=self._freq)
 
+		# Reused to send the command code and block writes, only used while the
+		# bus is locked
+		self._commandBuffer = bytearray(1)
+		self._writeBuffer = bytearray(33)
+
 	# Okay, are we running on a circuit py system?
 	@classmethod
 	def isPlatform(cls):
@@ -126,31 +136,15 @@ class CircuitPythonI2C(I2CDriver):
 	def is_platform(cls):
 		return cls.isPlatform()
 
-#-------------------------------------------------------------------------		
-	# General get attribute method
-	#
-	# Used to intercept getting the I2C bus object - so we can perform a lazy
-	# connect ....
-	#
-	def __getattr__(self, name):
-
-		if(name == "i2cbus"):
-			return self._i2cbus
-
-		else:
-			# Note - we call __getattribute__ to the super class (object).
-			return super(I2CDriver, self).__getattribute__(name)
-
-	#-------------------------------------------------------------------------
-	# General set attribute method
-	#
-	# Basically implemented to make the i2cbus attribute readonly to users 
-	# of this class. 
-	#
-	def __setattr__(self, name, value):
+	# Drivers are pooled by pins and frequency - see getI2CDriver()
+	@classmethod
+	def _pool_key(cls, sda=None, scl=None, freq=100000, *args, **argk):
+		return (sda, scl, freq)
 
-		if(name != "i2cbus"):
-			super(I2CDriver, self).__setattr__(name, value)
+	def close(self):
+		if self._i2cbus is not None:
+			self._i2cbus.deinit()
+			self._i2cbus = None
 
 	#----------------------------------------------------------
 	# read Data Command
@@ -163,9 +157,9 @@ class CircuitPythonI2C(I2CDriver):
 
 		try:
 			if (commandCode == None):
-				self._i2cbus.readfrom_into(address, buffer)
+				self._retry(address, False, self._i2cbus.readfrom_into, address, buffer)
 			else:
-				self._i2cbus.writeto_then_readfrom(address, bytes([commandCode]), buffer)
+				self._retry(address, False, self._i2cbus.writeto_then_readfrom, address, bytes([commandCode]), buffer)
 		except Exception as e:
 			self._i2cbus.unlock()
 			raise e
@@ -187,9 +181,9 @@ class CircuitPythonI2C(I2CDriver):
 
 		try:
 			if (commandCode == None):
-				self._i2cbus.readfrom_into(address, buffer)
+				self._retry(address, False, self._i2cbus.readfrom_into, address, buffer)
 			else:
-				self._i2cbus.writeto_then_readfrom(address, bytes([commandCode]), buffer)
+				self._retry(address, False, self._i2cbus.writeto_then_readfrom, address, bytes([commandCode]), buffer)
 		except Exception as e:
 			self._i2cbus.unlock()
 			raise e
@@ -210,9 +204,9 @@ class CircuitPythonI2C(I2CDriver):
 
 		try:
 			if (commandCode == None):
-				self._i2cbus.readfrom_into(address, buffer)
+				self._retry(address, False, self._i2cbus.readfrom_into, address, buffer)
 			else:
-				self._i2cbus.writeto_then_readfrom(address, bytes([commandCode]), buffer)
+				self._retry(address, False, self._i2cbus.writeto_then_readfrom, address, bytes([commandCode]), buffer)
 		except Exception as e:
 			self._i2cbus.unlock()
 			raise e
@@ -224,6 +218,23 @@ class CircuitPythonI2C(I2CDriver):
 	def read_block(self, address, commandCode, nBytes):
 		return self.readBlock(address, commandCode, nBytes)
 
+	#----------------------------------------------------------
+	def readBlockInto(self, address, commandCode, buf):
+		if not self._i2cbus.try_lock():
+			raise Exception("Unable to lock I2C bus")
+
+		try:
+			if (commandCode == None):
+				self._retry(address, False, self._i2cbus.readfrom_into, address, buf)
+			else:
+				self._commandBuffer[0] = commandCode
+				self._retry(address, False, self._i2cbus.writeto_then_readfrom, address, self._commandBuffer, buf)
+		finally:
+			self._i2cbus.unlock()
+
+	def read_block_into(self, address, commandCode, buf):
+		return self.readBlockInto(address, commandCode, buf)
+
 	#--------------------------------------------------------------------------	
 	# write Data Commands 
 	#
@@ -237,7 +248,7 @@ class CircuitPythonI2C(I2CDriver):
 			raise Exception("Unable to lock I2C bus")
 		
 		try:
-			self._i2cbus.writeto(address, bytes([commandCode]))
+			self._retry(address, True, self._i2cbus.writeto, address, bytes([commandCode]))
 		except Exception as e:
 			self._i2cbus.unlock()
 			raise e
@@ -257,7 +268,7 @@ class CircuitPythonI2C(I2CDriver):
 		buffer[1] = (value >> 8) & 0xFF
 
 		try:
-			self._i2cbus.writeto(address, bytes([commandCode] + buffer))
+			self._retry(address, True, self._i2cbus.writeto, address, bytes([commandCode] + buffer))
 		except Exception as e:
 			self._i2cbus.unlock()
 			raise e
@@ -273,7 +284,7 @@ class CircuitPythonI2C(I2CDriver):
 			raise Exception("Unable to lock I2C bus")
 		
 		try:
-			self._i2cbus.writeto(address, bytes([commandCode] + [value]))
+			self._retry(address, True, self._i2cbus.writeto, address, bytes([commandCode] + [value]))
 		except Exception as e:
 			self._i2cbus.unlock()
 			raise e
@@ -284,16 +295,25 @@ class CircuitPythonI2C(I2CDriver):
 		return self.writeByte(address, commandCode, value)
 
 	#----------------------------------------------------------
-	def writeBlock(self, address, commandCode, value):
+	# Block writes are split into pages by writeBlock() - see setPageSize()
+	def _write_block(self, address, commandCode, value):
+		value = _as_write_buffer(value)
+		nBytes = len(value) + 1
+
 		if not self._i2cbus.try_lock():
 			raise Exception("Unable to lock I2C bus")
 		
 		try:
-			self._i2cbus.writeto(address, bytes([commandCode] + value))
-		except Exception as e:
-			self._i2cbus.unlock()
-			raise e
-		else:
+			# The command code and data are copied into the reused write buffer
+			# so they can be sent in one write
+			if len(self._writeBuffer) < nBytes:
+				self._writeBuffer = bytearray(nBytes)
+
+			self._writeBuffer[0] = commandCode
+			self._writeBuffer[1:nBytes] = value
+
+			self._retry(address, True, self._i2cbus.writeto, address, self._writeBuffer, end=nBytes)
+		finally:
 			self._i2cbus.unlock()
 
 	def write_block(self, address, commandCode, value):
@@ -306,7 +326,7 @@ class CircuitPythonI2C(I2CDriver):
 			raise Exception("Unable to lock I2C bus")
 		
 		try:
-			self._i2cbus.writeto_then_readfrom(address, bytes(writeBytes), read_buffer)
+			self._retry(address, False, self._i2cbus.writeto_then_readfrom, address, _as_write_buffer(writeBytes), read_buffer)
 		except Exception as e:
 			self._i2cbus.unlock()
 			raise e
@@ -319,6 +339,87 @@ class CircuitPythonI2C(I2CDriver):
 	def write_read_block(self, address, writeBytes, readNBytes):
 		return self.writeReadBlock(address, writeBytes, readNBytes)
 
+	def writeReadInto(self, address, writeBytes, buf):
+		writeBytes = _as_write_buffer(writeBytes)
+
+		if not self._i2cbus.try_lock():
+			raise Exception("Unable to lock I2C bus")
+
+		try:
+			self._retry(address, False, self._i2cbus.writeto_then_readfrom, address, writeBytes, buf)
+		finally:
+			self._i2cbus.unlock()
+
+	def write_read_into(self, address, writeBytes, buf):
+		return self.writeReadInto(address, writeBytes, buf)
+
+	#----------------------------------------------------------
+	# Bit-field updates
+	#
+	# The read and the write are done while holding the bus lock once, using 
+	# the reused write buffer - [register, low byte, high byte]
+	#
+	def _update_register(self, address, register, mask, bits, width):
+		nBytes = width // 8
+
+		if not self._i2cbus.try_lock():
+			raise Exception("Unable to lock I2C bus")
+
+		try:
+			buffer = self._writeBuffer
+			buffer[0] = register
+			self._retry(address, False, self._i2cbus.writeto_then_readfrom, address, buffer, buffer, out_end=1, in_start=1, in_end=1 + nBytes)
+
+			oldValue = buffer[1]
+			if nBytes == 2:
+				oldValue |= buffer[2] << 8
+
+			newValue = (oldValue & ~mask) | bits
+			if newValue == oldValue:
+				return False
+
+			buffer[1] = newValue & 0xFF
+			buffer[2] = (newValue >> 8) & 0xFF
+			self._retry(address, True, self._i2cbus.writeto, address, buffer, end=1 + nBytes)
+		finally:
+			self._i2cbus.unlock()
+
+		return True
+
+	#----------------------------------------------------------
+	# Transactions
+	#
+	# busio has no way to send several messages at once, so the segments are
+	# sent one after the other while we hold the bus lock. A write followed by
+	# a read from the same device is sent with a repeated start. If a segment
+	# fails, the whole transaction is retried.
+	#
+	def _run_transaction(self, segments):
+		if not self._i2cbus.try_lock():
+			raise Exception("Unable to lock I2C bus")
+
+		try:
+			self._retry_transaction(self._send_segments, segments)
+		finally:
+			self._i2cbus.unlock()
+
+	# Sends the segments of a transaction - the bus must be locked
+	def _send_segments(self, segments):
+		nSegments = len(segments)
+		i = 0
+		while i < nSegments:
+			address, flags, buffer = segments[i]
+
+			if flags & _kFlagRead:
+				self._i2cbus.readfrom_into(address, buffer)
+			elif not flags & _kFlagStop and i + 1 < nSegments and segments[i + 1][0] == address and segments[i + 1][1] & _kFlagRead:
+				self._i2cbus.writeto_then_readfrom(address, buffer, segments[i + 1][2])
+				i += 1
+			else:
+				self._i2cbus.writeto(address, buffer)
+
+			i += 1
+
 	def isDeviceConnected(self, devAddress):
 		if not self._i2cbus.try_lock():
 			raise Exception("Unable to lock I2C bus")
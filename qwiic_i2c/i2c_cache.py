@@ -0,0 +1,318 @@
+#-----------------------------------------------------------------------------
+# i2c_cache.py
+#
+# Shadow register cache layer for an I2C driver.
+#
+# Device code often reads back configuration registers that only it writes.
+# This layer keeps a copy of the registers marked as non-volatile, filled as
+# they're written (and read), so reading them back doesn't touch the bus.
+# Registers that aren't marked non-volatile always go to the bus.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+i2c_cache
+=========
+A write-through shadow register cache that wraps any I2C driver.
+
+Registers are assumed to be 8 bits wide, with the register address
+auto-incrementing for word and block transfers. Words are little endian, to
+match readWord() and writeWord().
+
+"""
+
+from .i2c_proxy import I2CDriverProxy
+from .i2c_transaction import _kFlagRead
+
+#-----------------------------------------------------------------------------
+# CachedI2CDriver
+#
+# The cache is a dictionary keyed by (bus, address, register), holding the
+# last value written to (or read from) each non-volatile register.
+#
+class CachedI2CDriver(I2CDriverProxy):
+	"""
+	CachedI2CDriver
+
+		Wraps an I2C driver with a write-through shadow register cache.
+
+		Reads of registers marked as non-volatile are answered from the cache
+		once the register has been written or read. All other registers are
+		always read from the bus. Writes always go to the bus.
+
+		:param driver: The I2C driver to wrap
+
+		:return: The I2C Driver interface for the qwiic system.
+		:rtype: Object
+
+		:example:
+
+		>>> import qwiic_i2c
+		>>> i2c = qwiic_i2c.CachedI2CDriver(qwiic_i2c.getI2CDriver())
+		>>> i2c.setNonVolatile(0x6B, range(0x10, 0x1A))
+		>>> i2c.writeByte(0x6B, 0x10, 0x40)
+		>>> i2c.readByte(0x6B, 0x10) # No bus access
+	"""
+
+	def __init__(self, driver):
+		I2CDriverProxy.__init__(self, driver)
+
+		self._cache = {}
+
+		# device address -> set of non-volatile registers
+		self._nonVolatile = {}
+
+	#-------------------------------------------------------------------------
+	# Cache configuration
+
+	def setNonVolatile(self, address, registers):
+		"""
+			Marks registers of a device as non-volatile, so reads of them can be
+			answered from the cache. Only mark registers that the device never
+			changes by itself.
+
+			:param address: The I2C address of the device
+			:param registers: An iterable of register addresses (e.g. a range)
+
+			:return: None
+
+		"""
+		self._nonVolatile.setdefault(address, set()).update(registers)
+
+	def set_non_volatile(self, address, registers):
+		return self.setNonVolatile(address, registers)
+
+	def setVolatile(self, address, registers):
+		"""
+			Marks registers of a device as volatile (the default), so reads of them
+			always go to the bus. Any cached values for the registers are dropped.
+
+			:param address: The I2C address of the device
+			:param registers: An iterable of register addresses (e.g. a range)
+
+			:return: None
+
+		"""
+		nonVolatile = self._nonVolatile.get(address, set())
+		for register in registers:
+			nonVolatile.discard(register)
+			self._cache.pop((self._busKey, address, register), None)
+
+	def set_volatile(self, address, registers):
+		return self.setVolatile(address, registers)
+
+	def invalidate(self, address):
+		"""
+			Drops all the cached register values for a device. The next read of
+			each register goes to the bus.
+
+			:param address: The I2C address of the device
+
+			:return: None
+
+		"""
+		for key in [key for key in self._cache if key[1] == address]:
+			del self._cache[key]
+
+	def invalidateAll(self):
+		"""
+			Drops all the cached register values, for every device.
+
+			:return: None
+
+		"""
+		self._cache.clear()
+
+	def invalidate_all(self):
+		return self.invalidateAll()
+
+	#-------------------------------------------------------------------------
+	# Internal cache helpers
+
+	# Returns True if all nBytes registers starting at commandCode are
+	# non-volatile
+	def _is_cacheable(self, address, commandCode, nBytes):
+		if commandCode == None:
+			return False
+
+		nonVolatile = self._nonVolatile.get(address)
+		if not nonVolatile:
+			return False
+
+		for register in range(commandCode, commandCode + nBytes):
+			if register not in nonVolatile:
+				return False
+
+		return True
+
+	# Returns the cached values of nBytes registers, or None on a miss
+	def _lookup(self, address, commandCode, nBytes):
+		values = []
+		for register in range(commandCode, commandCode + nBytes):
+			value = self._cache.get((self._busKey, address, register))
+			if value is None:
+				return None
+			values.append(value)
+
+		return values
+
+	# Stores the values of the registers starting at commandCode. Only
+	# non-volatile registers are kept
+	def _store(self, address, commandCode, values):
+		nonVolatile = self._nonVolatile.get(address)
+		if not nonVolatile:
+			return
+
+		for i in range(len(values)):
+			if commandCode + i in nonVolatile:
+				self._cache[(self._busKey, address, commandCode + i)] = values[i] & 0xFF
+
+	# Drops the cached values of the registers starting at commandCode
+	def _discard(self, address, commandCode, nBytes):
+		for register in range(commandCode, commandCode + nBytes):
+			self._cache.pop((self._busKey, address, register), None)
+
+	#-------------------------------------------------------------------------
+	# read Data Command
+
+	def readWord(self, address, commandCode):
+		cacheable = self._is_cacheable(address, commandCode, 2)
+		if cacheable:
+			values = self._lookup(address, commandCode, 2)
+			if values is not None:
+				return (values[1] << 8) | values[0]
+
+		data = self._driver.readWord(address, commandCode)
+
+		if cacheable:
+			self._store(address, commandCode, (data & 0xFF, (data >> 8) & 0xFF))
+
+		return data
+
+	def readByte(self, address, commandCode = None):
+		cacheable = self._is_cacheable(address, commandCode, 1)
+		if cacheable:
+			value = self._cache.get((self._busKey, address, commandCode))
+			if value is not None:
+				return value
+
+		data = self._driver.readByte(address, commandCode)
+
+		if cacheable:
+			self._store(address, commandCode, (data,))
+
+		return data
+
+	def readBlock(self, address, commandCode, nBytes):
+		cacheable = self._is_cacheable(address, commandCode, nBytes)
+		if cacheable:
+			values = self._lookup(address, commandCode, nBytes)
+			if values is not None:
+				return values
+
+		data = self._driver.readBlock(address, commandCode, nBytes)
+
+		if cacheable:
+			self._store(address, commandCode, data)
+
+		return data
+
+	def readBlockInto(self, address, commandCode, buf):
+		nBytes = len(buf)
+
+		cacheable = self._is_cacheable(address, commandCode, nBytes)
+		if cacheable:
+			values = self._lookup(address, commandCode, nBytes)
+			if values is not None:
+				for i in range(nBytes):
+					buf[i] = values[i]
+				return None
+
+		self._driver.readBlockInto(address, commandCode, buf)
+
+		if cacheable:
+			self._store(address, commandCode, buf)
+
+	#-------------------------------------------------------------------------
+	# write Data Commands
+	#
+	# Writes always go to the bus. If a write fails, the registers it touched
+	# are dropped from the cache - we don't know what the device has.
+
+	def writeCommand(self, address, commandCode):
+		# A command can change anything on the device
+		self.invalidate(address)
+		return self._driver.writeCommand(address, commandCode)
+
+	def writeWord(self, address, commandCode, value):
+		try:
+			result = self._driver.writeWord(address, commandCode, value)
+		except Exception:
+			self._discard(address, commandCode, 2)
+			raise
+
+		self._store(address, commandCode, (value & 0xFF, (value >> 8) & 0xFF))
+		return result
+
+	def writeByte(self, address, commandCode, value):
+		try:
+			result = self._driver.writeByte(address, commandCode, value)
+		except Exception:
+			self._discard(address, commandCode, 1)
+			raise
+
+		self._store(address, commandCode, (value,))
+		return result
+
+	def writeBlock(self, address, commandCode, value):
+		try:
+			result = self._driver.writeBlock(address, commandCode, value)
+		except Exception:
+			self._discard(address, commandCode, len(value))
+			raise
+
+		self._store(address, commandCode, value)
+		return result
+
+	#-------------------------------------------------------------------------
+	# Transactions
+	#
+	# Writes of more than one byte (a register address and data) in a
+	# transaction can change registers, so those devices are dropped from the
+	# cache. Single byte writes only set the register address for a read.
+
+	def _run_transaction(self, segments):
+		for (address, flags, buffer) in segments:
+			if not flags & _kFlagRead and len(buffer) > 1:
+				self.invalidate(address)
+
+		return self._driver._run_transaction(segments)
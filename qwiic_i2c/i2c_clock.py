@@ -0,0 +1,65 @@
+#-----------------------------------------------------------------------------
+# i2c_clock.py
+#
+# Monotonic clock helpers shared by the qwiic I2C modules. 
+#
+# CPython has time.monotonic_ns(). MicroPython and CircuitPython ports may 
+# only have time.ticks_us() or time.monotonic(), so fall back to those.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+i2c_clock
+=========
+Monotonic clock helpers, in nanoseconds, that work on every supported platform.
+
+"""
+
+import time
+
+try:
+	from time import monotonic_ns as _monotonic_ns
+except ImportError:
+	if hasattr(time, "ticks_us"):
+		# Note - ticks wrap around on MicroPython, so only use this for short intervals
+		def _monotonic_ns():
+			return time.ticks_us() * 1000
+	else:
+		def _monotonic_ns():
+			return int(time.monotonic() * 1000000000)
+
+#-----------------------------------------------------------------------------
+# Internal function to sleep for a number of nanoseconds. Does nothing if the
+# time has already passed.
+def _sleep_ns(nanoseconds):
+	if nanoseconds > 0:
+		time.sleep(nanoseconds / 1000000000)
@@ -59,6 +59,21 @@ New to qwiic? Take a look at the entire [SparkFun qwiic ecosystem](https://www.s
 
 """
 
+import struct
+
+from .i2c_transaction import I2CTransaction, _kFlagRead, _as_write_buffer, _byte_view
+from .i2c_clock import _monotonic_ns, _sleep_ns
+from .i2c_lock import getBusLock
+from .i2c_retry import _kDefaultRetryPolicy, _is_write_transaction
+
+#-----------------------------------------------------------------------------
+# Internal function to check the maxBurst passed to the FIFO drains - a burst
+# must read at least a byte, or the drain never finishes
+#
+def _check_max_burst(maxBurst):
+	if maxBurst is not None and maxBurst < 1:
+		raise ValueError("maxBurst must be at least 1 byte, or None, not %s" % (maxBurst))
+
 #-----------------------------------------------------------------------------
 # Platform
 #
@@ -78,8 +93,46 @@ class I2CDriver(object):
 	# stubs
 	name = 'qwiic I2C abstract base class'
 
+	# The platform's bus object - set by the platform drivers
+	_i2cbus = None
+
+	# Platform limits on transactions - the number of messages, and the length
+	# of each message. None if there is no limit
+	_maxSegments = None
+	_maxMessageBytes = None
+
+	# True if transactions honor the _kFlagStop message flag
+	_stopFlag = False
+
 	def __init__(self, *args, **argk):
-		pass
+		# Number of getI2CDriver() users sharing this driver
+		self._refCount = 0
+
+		# Identifies the bus this driver is connected to. Set by the platform 
+		# drivers (the bus id on Linux, the pins and frequency on 
+		# CircuitPython and MicroPython)
+		self._busKey = None
+
+		# The bus lock - looked up on first use, once the bus is known
+		self._lock = None
+
+		# Operation metrics - see enableMetrics()
+		self._metrics = None
+
+		# Set while the fast path is enabled - see enableFastPath()
+		self._fastPath = False
+
+		# Transfer timestamps - see enableTimestamps()
+		self._timestamps = None
+
+		# How failed operations are retried, and the policies for addresses that 
+		# have their own - see setRetryPolicy()
+		self._retryPolicy = _kDefaultRetryPolicy
+		self._retryOverrides = {}
+
+		# address -> (page size, write cycle time) for devices with write pages
+		# - see setPageSize()
+		self._pages = {}
 
 
 	# A class method is used to determine if the system is executing on the desired platform
@@ -106,17 +159,505 @@ class I2CDriver(object):
 		"""
 		pass
 
+	def close(self):
+		""" 
+			Closes the connection to the I2C bus. The driver can't be used after 
+			it's closed.
+
+			:return: None
+
+		"""
+		pass
+
+	#-------------------------------------------------------------------------
+	# The platform's bus object. Read only to users of the driver - setting it
+	# does nothing.
+	#
+	@property
+	def i2cbus(self):
+		""" The platform's I2C bus object, or `None` if the driver is closed """
+		return self._i2cbus
+
+	@i2cbus.setter
+	def i2cbus(self, value):
+		pass
+
 	#-------------------------------------------------------------------------	
-	# stubs to support Python with statements. 
+	# Support for Python with statements. 
 	#
-	# Helpful for I2C interactions that require a mutex.
+	# Holds the bus lock - a re-entrant lock shared by every driver on the bus -
+	# for I2C interactions that require a mutex. 
 
 	def __enter__(self):
+		self._get_lock().acquire()
 		return self
 
 	def __exit__(self, type, value, traceback):
-		pass
+		self._lock.release()
+
+	# Returns the lock for this drivers bus
+	def _get_lock(self):
+		if self._lock is None:
+			self._lock = getBusLock(self._busKey if self._busKey is not None else id(self))
+
+		return self._lock
+
+	def lockStats(self):
+		"""
+			Returns statistics for the bus lock - how often it was acquired, how often
+			and how long it had to wait for other threads (or processes), and how 
+			long it was held. All times are in nanoseconds.
+
+			:return: A dictionary of the lock statistics
+			:rtype: dict
+
+		"""
+		return self._get_lock().stats()
+
+	def lock_stats(self):
+		"""
+			Returns statistics for the bus lock - how often it was acquired, how often
+			and how long it had to wait for other threads (or processes), and how 
+			long it was held. All times are in nanoseconds.
+
+			:return: A dictionary of the lock statistics
+			:rtype: dict
+
+		"""
+		return self.lockStats()
+
+	def resetLockStats(self):
+		"""
+			Resets the statistics for the bus lock.
+
+			:return: None
+
+		"""
+		self._get_lock().resetStats()
+
+	def reset_lock_stats(self):
+		"""
+			Resets the statistics for the bus lock.
+
+			:return: None
+
+		"""
+		return self.resetLockStats()
+
+	#-------------------------------------------------------------------------
+	# Operation metrics
+	#
+	# Off by default. When enabled, this driver object's operations are 
+	# wrapped to record them - see i2c_metrics. Disabling removes the wrappers.
+	#
+	def enableMetrics(self, enable=True):
+		""" 
+			Enables (or disables) recording metrics for each operation on this 
+			driver - counts, bytes moved, latency histograms, retries and failures,
+			for each device address and operation.
+
+			:param enable: True to enable metrics, False to disable them. Disabling
+				keeps the metrics recorded so far.
+
+			:return: None
+
+		"""
+		from .i2c_metrics import I2CMetrics
+
+		if enable:
+			self.enableFastPath(False)
+
+			if self._metrics is None:
+				self._metrics = I2CMetrics()
+			self._metrics._attach(self)
+		elif self._metrics is not None:
+			self._metrics._detach(self)
+
+	def enable_metrics(self, enable=True):
+		""" 
+			Enables (or disables) recording metrics for each operation on this 
+			driver - counts, bytes moved, latency histograms, retries and failures,
+			for each device address and operation.
+
+			:param enable: True to enable metrics, False to disable them. Disabling
+				keeps the metrics recorded so far.
+
+			:return: None
+
+		"""
+		return self.enableMetrics(enable)
+
+	def metricsSnapshot(self):
+		""" 
+			Returns the operation metrics recorded since metrics were enabled, or 
+			last reset. All times are in nanoseconds.
+
+			:return: A dictionary keyed by (bus, address, operation). Each value is 
+				a dictionary of the count, bytes moved, retries, failures, latency 
+				statistics and histogram.
+			:rtype: dict
+
+			:example:
+
+			>>> i2cDriver.enableMetrics()
+			>>> i2cDriver.readBlock(0x6B, 0x28, 6)
+			>>> i2cDriver.metricsSnapshot()[(1, 0x6B, "readBlock")]["p99Ns"]
+
+		"""
+		if self._metrics is None:
+			return {}
+
+		return self._metrics.snapshot()
+
+	def metrics_snapshot(self):
+		""" 
+			Returns the operation metrics recorded since metrics were enabled, or 
+			last reset. All times are in nanoseconds.
+
+			:return: A dictionary keyed by (bus, address, operation). Each value is 
+				a dictionary of the count, bytes moved, retries, failures, latency 
+				statistics and histogram.
+			:rtype: dict
+
+		"""
+		return self.metricsSnapshot()
+
+	def resetMetrics(self):
+		""" 
+			Clears the recorded operation metrics.
+
+			:return: None
+
+		"""
+		if self._metrics is not None:
+			self._metrics.reset()
+
+	def reset_metrics(self):
+		""" 
+			Clears the recorded operation metrics.
+
+			:return: None
+
+		"""
+		return self.resetMetrics()
+
+	#-------------------------------------------------------------------------
+	# Timestamps
+	#
+	# The bus object is wrapped so each transfer writes its issue and 
+	# completion times into a preallocated array, read with the timestamps 
+	# property.
+	#
+	def enableTimestamps(self, enable=True):
+		""" 
+			Enables (or disables) timestamps for the transfers made by this 
+			driver. After each operation, the timestamps property holds the 
+			monotonic times in nanoseconds just before and just after its bus 
+			transfer - for operations made of several transfers, the last one.
+
+			The array is reused by every operation, so read it before the next 
+			one (hold the bus lock if other threads share the driver).
+
+			:param enable: True to enable timestamps, False to disable them
+
+			:return: None
+
+			:example:
+
+			>>> i2cDriver.enableTimestamps()
+			>>> value = i2cDriver.readByte(0x6B, 0x28)
+			>>> issueNs, completeNs = i2cDriver.timestamps
+
+		"""
+		bus = self._i2cbus
+		if bus is None:
+			# Not connected (or closed)
+			self._timestamps = None
+			return
+
+		if enable and self._timestamps is None:
+			from .i2c_timestamps import _TimestampedBus
+
+			self._i2cbus = _TimestampedBus(bus)
+			self._timestamps = self._i2cbus.stamps
+		elif not enable and self._timestamps is not None:
+			self._i2cbus = bus._bus
+			self._timestamps = None
+		else:
+			return
+
+		# The fast path calls the bus methods it found when it was enabled
+		if self._fastPath:
+			self.enableFastPath()
+
+	def enable_timestamps(self, enable=True):
+		""" 
+			Enables (or disables) timestamps for the transfers made by this 
+			driver. After each operation, the timestamps property holds the 
+			monotonic times in nanoseconds just before and just after its bus 
+			transfer - for operations made of several transfers, the last one.
+
+			The array is reused by every operation, so read it before the next 
+			one (hold the bus lock if other threads share the driver).
+
+			:param enable: True to enable timestamps, False to disable them
+
+			:return: None
+
+		"""
+		return self.enableTimestamps(enable)
+
+	@property
+	def timestamps(self):
+		""" 
+			The [issue, completion] monotonic times in nanoseconds of the last 
+			transfer, as an array('q'), or `None` if timestamps aren't enabled.
+			The same array is updated by every transfer.
+		"""
+		return self._timestamps
+
+	#-------------------------------------------------------------------------
+	# Retries
+	#
+	# Drivers run each bus operation through _retry() (or _retry_transaction()),
+	# which makes the first attempt directly - the retry policy is only looked 
+	# at once an attempt fails. Drivers can also make the first attempt 
+	# themselves, and call _retry_failed() if it fails.
+	#
+	def setRetryPolicy(self, policy, address=None):
+		""" 
+			Sets how failed operations are retried.
+
+			:param policy: The RetryPolicy to use. For an address, `None` removes 
+				its policy, so the driver's policy is used.
+			:param address: The I2C address to set the policy for, or `None` to 
+				set the policy for the driver
+
+			:return: None
+
+		"""
+		if address is not None:
+			if policy is None:
+				self._retryOverrides.pop(address, None)
+			else:
+				self._retryOverrides[address] = policy
+		else:
+			self._retryPolicy = policy if policy is not None else _kDefaultRetryPolicy
+
+	def set_retry_policy(self, policy, address=None):
+		""" 
+			Sets how failed operations are retried.
+
+			:param policy: The RetryPolicy to use. For an address, `None` removes 
+				its policy, so the driver's policy is used.
+			:param address: The I2C address to set the policy for, or `None` to 
+				set the policy for the driver
+
+			:return: None
+
+		"""
+		return self.setRetryPolicy(policy, address)
+
+	def getRetryPolicy(self, address=None):
+		""" 
+			Returns the retry policy used for an address.
+
+			:param address: The I2C address, or `None` for the driver's policy
+
+			:return: The retry policy
+			:rtype: RetryPolicy
+
+		"""
+		return self._retryOverrides.get(address, self._retryPolicy)
+
+	def get_retry_policy(self, address=None):
+		""" 
+			Returns the retry policy used for an address.
+
+			:param address: The I2C address, or `None` for the driver's policy
+
+			:return: The retry policy
+			:rtype: RetryPolicy
+
+		"""
+		return self.getRetryPolicy(address)
+
+	# Calls func, retrying it if it fails, as allowed by the retry policy for 
+	# the address
+	def _retry(self, address, isWrite, func, *args, **argk):
+		try:
+			return func(*args, **argk)
+		except Exception as error:
+			return self.getRetryPolicy(address)._retry(error, isWrite, func, args, argk)
+
+	# Called when the first attempt of func failed with error. Retries it as 
+	# allowed by the retry policy for the address, or raises the error
+	def _retry_failed(self, error, address, isWrite, func, *args, **argk):
+		return self.getRetryPolicy(address)._retry(error, isWrite, func, args, argk)
+
+	# Calls func(segments), retrying it if it fails. The policy of the first 
+	# device in the transaction is used
+	def _retry_transaction(self, func, segments):
+		try:
+			return func(segments)
+		except Exception as error:
+			return self.getRetryPolicy(segments[0][0])._retry(error, _is_write_transaction(segments), func, (segments,), {})
+
+	#-------------------------------------------------------------------------
+	# Write pages
+	#
+	# Devices like EEPROMs write a block within one page, wrapping at the page
+	# boundary. Block writes to a device with a page size are split at the 
+	# page boundaries, waiting for the write cycle between pages.
+	#
+	def setPageSize(self, address, pageSize, writeCycleNs=0):
+		""" 
+			Sets the write page size of a device, so block writes are split at
+			the page boundaries. The command code of a block write is the 
+			address of the first byte written.
+
+			:param address: The I2C address of the device
+			:param pageSize: The page size in bytes, or `None` to remove it
+			:param writeCycleNs: The time to wait between pages for the device 
+				to finish writing, in nanoseconds
+
+			:return: None
+
+		"""
+		if pageSize:
+			self._pages[address] = (pageSize, writeCycleNs)
+		else:
+			self._pages.pop(address, None)
+
+		# The fast path doesn't split block writes - rebuild it
+		if self._fastPath:
+			self.enableFastPath()
+
+	def set_page_size(self, address, pageSize, writeCycleNs=0):
+		""" 
+			Sets the write page size of a device, so block writes are split at
+			the page boundaries. The command code of a block write is the 
+			address of the first byte written.
+
+			:param address: The I2C address of the device
+			:param pageSize: The page size in bytes, or `None` to remove it
+			:param writeCycleNs: The time to wait between pages for the device 
+				to finish writing, in nanoseconds
+
+			:return: None
+
+		"""
+		return self.setPageSize(address, pageSize, writeCycleNs)
+
+	def getPageSize(self, address):
+		""" 
+			Returns the write page size of a device.
+
+			:param address: The I2C address of the device
+
+			:return: The page size in bytes, or `None` if the device has no pages
+			:rtype: int
+
+		"""
+		page = self._pages.get(address)
+		return page[0] if page is not None else None
+
+	def get_page_size(self, address):
+		""" 
+			Returns the write page size of a device.
+
+			:param address: The I2C address of the device
+
+			:return: The page size in bytes, or `None` if the device has no pages
+			:rtype: int
+
+		"""
+		return self.getPageSize(address)
+
+	# Writes a block one page at a time
+	def _write_pages(self, address, commandCode, value):
+		pageSize, writeCycleNs = self._pages[address]
+		value = _as_write_buffer(value)
+
+		offset = 0
+		nBytes = len(value)
+		while offset < nBytes:
+			register = commandCode + offset
+			chunk = min(nBytes - offset, pageSize - register % pageSize)
+
+			if offset and writeCycleNs:
+				_sleep_ns(writeCycleNs)
+
+			self._write_block(address, register, value[offset:offset + chunk])
+			offset += chunk
+
+	#-------------------------------------------------------------------------
+	# Fast path
+	#
+	# Binds the operations of this driver object straight to the backend bus
+	# calls (or to a single small function where the arguments need adjusting),
+	# skipping the snake_case alias, the retry handling and any other layers.
+	# Platform drivers that support it return the functions to bind from 
+	# _fast_path_methods().
+	#
+	def enableFastPath(self, enable=True):
+		""" 
+			Enables (or disables) the fast path, where operations on this driver 
+			object call the platform's bus object directly, with the same API. 
+			
+			On the fast path failed operations aren't retried, and metrics aren't
+			recorded (enabling one turns the other off). Operations the platform 
+			doesn't have a fast path for run as normal.
+
+			:param enable: True to enable the fast path, False to disable it
+
+			:return: True if the platform has a fast path, otherwise False
+			:rtype: bool
+
+		"""
+		methods = self._fast_path_methods()
+
+		if self._fastPath:
+			for name in methods:
+				self.__dict__.pop(name, None)
+			self._fastPath = False
+
+		# Block writes to devices with pages are split - see setPageSize()
+		if self._pages:
+			methods.pop("writeBlock", None)
+			methods.pop("write_block", None)
 
+		if enable and methods:
+			if self._metrics is not None:
+				self._metrics._detach(self)
+
+			for name in methods:
+				setattr(self, name, methods[name])
+			self._fastPath = True
+
+		return len(methods) > 0
+
+	def enable_fast_path(self, enable=True):
+		""" 
+			Enables (or disables) the fast path, where operations on this driver 
+			object call the platform's bus object directly, with the same API. 
+			
+			On the fast path failed operations aren't retried, and metrics aren't
+			recorded (enabling one turns the other off). Operations the platform 
+			doesn't have a fast path for run as normal.
+
+			:param enable: True to enable the fast path, False to disable it
+
+			:return: True if the platform has a fast path, otherwise False
+			:rtype: bool
+
+		"""
+		return self.enableFastPath(enable)
+
+	# Returns the fast path functions for this driver - a dictionary of 
+	# operation name (camelCase and snake_case) to function
+	def _fast_path_methods(self):
+		return {}
 
 	#-------------------------------------------------------------------------		
 	# read Data Command
@@ -201,6 +742,70 @@ class I2CDriver(object):
 		"""
 		return None
 	
+	#--------------------------------------------------------------------------	
+	# read Data Into Commands
+	#
+	# Fill a caller owned buffer (bytearray, memoryview, ...) instead of 
+	# returning a new list, so repeated reads don't allocate.
+
+	def readBlockInto(self, address, commandCode, buf):
+		""" 
+			Called to read a block of bytes from a specific device into a buffer.
+
+			:param address: The I2C address of the device to read from
+			:param commandCode: The "command" or register to read from, or `None` for no command
+			:param buf: A writable buffer (bytearray, memoryview, ...) to read into. 
+				The length of the buffer is the number of bytes read.
+
+			:return: None
+
+		"""
+		return None
+
+	def read_block_into(self, address, commandCode, buf):
+		""" 
+			Called to read a block of bytes from a specific device into a buffer.
+
+			:param address: The I2C address of the device to read from
+			:param commandCode: The "command" or register to read from, or `None` for no command
+			:param buf: A writable buffer (bytearray, memoryview, ...) to read into. 
+				The length of the buffer is the number of bytes read.
+
+			:return: None
+
+		"""
+		return None
+
+	def writeReadInto(self, address, writeBytes, buf):
+		""" 
+			Called to write a block of bytes to a device, send no stop bit, and then read a 
+			block of bytes into a buffer.
+
+			:param address: The I2C address of the device to read from
+			:param writeBytes: The bytes to write - a list of ints, or any bytes-like object
+			:param buf: A writable buffer (bytearray, memoryview, ...) to read into. 
+				The length of the buffer is the number of bytes read.
+
+			:return: None
+
+		"""
+		return None
+
+	def write_read_into(self, address, writeBytes, buf):
+		""" 
+			Called to write a block of bytes to a device, send no stop bit, and then read a 
+			block of bytes into a buffer.
+
+			:param address: The I2C address of the device to read from
+			:param writeBytes: The bytes to write - a list of ints, or any bytes-like object
+			:param buf: A writable buffer (bytearray, memoryview, ...) to read into. 
+				The length of the buffer is the number of bytes read.
+
+			:return: None
+
+		"""
+		return None
+
 	#--------------------------------------------------------------------------	
 	# write Data Commands 
 	#
@@ -289,7 +894,8 @@ class I2CDriver(object):
 
 	def writeBlock(self, address, commandCode, value):
 		""" 
-			Called to write a block of bytes to a device. 
+			Called to write a block of bytes to a device. Writes to a device with
+			a page size are split at the page boundaries - see setPageSize().
 
 			:param address: The I2C address of the device to read from
 			:param commandCode: The "command" or register to read from
@@ -298,6 +904,13 @@ class I2CDriver(object):
 			:return: None
 
 		"""
+		if address in self._pages:
+			return self._write_pages(address, commandCode, value)
+
+		return self._write_block(address, commandCode, value)
+
+	# Implemented by the platform drivers - writes a block, whatever its length
+	def _write_block(self, address, commandCode, value):
 		pass
 
 	def write_block(self, address, commandCode, value):
@@ -341,6 +954,491 @@ class I2CDriver(object):
 		"""
 		return None
 
+	# The results of readBlock() and writeReadBlock() for data read into a 
+	# bytearray, as the platform returns them - for layers that read blocks 
+	# themselves (like the mux layer) but must return what the driver would.
+	# Platforms that return other types override these
+	def _block_result(self, buffer):
+		return list(buffer)
+
+	def _write_read_result(self, address, buffer):
+		return list(buffer)
+
+
+	#-------------------------------------------------------------------------
+	# Bit-field updates
+	#
+	# Read-modify-write of a register, done while holding the bus lock. The 
+	# write is skipped if the register already has the requested value.
+
+	def updateBits(self, address, register, mask, value, width=8):
+		""" 
+			Called to update some of the bits of a register on a device - the register 
+			is read, the bits in mask replaced with those in value, and the result 
+			written back if it changed.
+
+			:param address: The I2C address of the device
+			:param register: The register to update
+			:param mask: The bits to update
+			:param value: The new value of the bits, in position. Only the bits set in 
+				mask are used.
+			:param width: The width of the register in bits - 8 or 16 (a word)
+
+			:return: True if the register was written, False if it was unchanged
+			:rtype: bool
+
+			:example:
+
+			>>> # Set bits 4-6 (e.g. an output data rate field) to 0b011
+			>>> i2cDriver.updateBits(0x6B, 0x10, 0x70, 0x3 << 4)
+
+		"""
+		return self.updateFields(address, register, ((mask, value),), width)
+
+	def update_bits(self, address, register, mask, value, width=8):
+		""" 
+			Called to update some of the bits of a register on a device - the register 
+			is read, the bits in mask replaced with those in value, and the result 
+			written back if it changed.
+
+			:param address: The I2C address of the device
+			:param register: The register to update
+			:param mask: The bits to update
+			:param value: The new value of the bits, in position. Only the bits set in 
+				mask are used.
+			:param width: The width of the register in bits - 8 or 16 (a word)
+
+			:return: True if the register was written, False if it was unchanged
+			:rtype: bool
+
+		"""
+		return self.updateBits(address, register, mask, value, width)
+
+	def updateFields(self, address, register, fields, width=8):
+		""" 
+			Called to update several bit-fields of a register on a device with a single 
+			read-modify-write.
+
+			:param address: The I2C address of the device
+			:param register: The register to update
+			:param fields: A list of (mask, value) tuples - the value of each field is in 
+				position, and only the bits set in its mask are used.
+			:param width: The width of the register in bits - 8 or 16 (a word)
+
+			:return: True if the register was written, False if it was unchanged
+			:rtype: bool
+
+			:example:
+
+			>>> # Set the range field (bits 2-3) and the enable bit (bit 0) at once
+			>>> i2cDriver.updateFields(0x6B, 0x10, [(0x0C, 0x2 << 2), (0x01, 0x01)])
+
+		"""
+		if width not in (8, 16):
+			raise ValueError("Register width must be 8 or 16 bits, not %d" % (width))
+
+		# Combine the fields into one mask and value
+		mask = 0
+		bits = 0
+		for (fieldMask, fieldValue) in fields:
+			mask |= fieldMask
+			bits = (bits & ~fieldMask) | (fieldValue & fieldMask)
+
+		with self:
+			return self._update_register(address, register, mask, bits, width)
+
+	def update_fields(self, address, register, fields, width=8):
+		""" 
+			Called to update several bit-fields of a register on a device with a single 
+			read-modify-write.
+
+			:param address: The I2C address of the device
+			:param register: The register to update
+			:param fields: A list of (mask, value) tuples - the value of each field is in 
+				position, and only the bits set in its mask are used.
+			:param width: The width of the register in bits - 8 or 16 (a word)
+
+			:return: True if the register was written, False if it was unchanged
+			:rtype: bool
+
+		"""
+		return self.updateFields(address, register, fields, width)
+
+	# Performs the read-modify-write for updateFields(). Platform drivers can 
+	# override this to do it more efficiently
+	def _update_register(self, address, register, mask, bits, width):
+		if width == 8:
+			oldValue = self.readByte(address, register)
+		else:
+			oldValue = self.readWord(address, register)
+
+		newValue = (oldValue & ~mask) | bits
+		if newValue == oldValue:
+			return False
+
+		if width == 8:
+			self.writeByte(address, register, newValue)
+		else:
+			self.writeWord(address, register, newValue)
+
+		return True
+
+	#-------------------------------------------------------------------------
+	# Decoded reads
+	#
+	# Read a block of registers and decode it in one step, with struct or 
+	# NumPy, rather than building values from the bytes in Python. The byte
+	# order comes from the format, so the result is the same on every platform.
+	#
+	def readStruct(self, address, register, fmt):
+		""" 
+			Reads a block of registers from a device and decodes it with 
+			struct.unpack_from(). The number of bytes read is the size of the 
+			format.
+
+			:param address: The I2C address of the device to read from
+			:param register: The register to read from, or `None` for no register
+			:param fmt: A struct format string, e.g. '>3h' for three big endian
+				int16 values
+
+			:return: The decoded values
+			:rtype: tuple
+
+			:example:
+
+			>>> x, y, z = i2cDriver.readStruct(0x1E, 0x68, '>3h')
+
+		"""
+		buffer = bytearray(struct.calcsize(fmt))
+		self.readBlockInto(address, register, buffer)
+		return struct.unpack_from(fmt, buffer)
+
+	def read_struct(self, address, register, fmt):
+		""" 
+			Reads a block of registers from a device and decodes it with 
+			struct.unpack_from(). The number of bytes read is the size of the 
+			format.
+
+			:param address: The I2C address of the device to read from
+			:param register: The register to read from, or `None` for no register
+			:param fmt: A struct format string, e.g. '>3h' for three big endian
+				int16 values
+
+			:return: The decoded values
+			:rtype: tuple
+
+		"""
+		return self.readStruct(address, register, fmt)
+
+	def readArray(self, address, register, dtype, count):
+		""" 
+			Reads a block of registers from a device as a NumPy array, decoded 
+			with numpy.frombuffer() without copying. Requires NumPy.
+
+			:param address: The I2C address of the device to read from
+			:param register: The register to read from, or `None` for no register
+			:param dtype: The NumPy dtype of an element, e.g. '>i2' for a big 
+				endian int16, or '>3h' for a triplet of them
+			:param count: The number of elements to read
+
+			:return: The decoded elements
+			:rtype: numpy.ndarray
+
+			:example:
+
+			>>> samples = i2cDriver.readArray(0x6B, 0x28, '<3h', 4)
+			>>> samples.shape
+			(4, 3)
+
+		"""
+		# Imported here, so NumPy is only needed if an array is read
+		import numpy
+
+		dtype = numpy.dtype(dtype)
+		buffer = bytearray(dtype.itemsize * count)
+		self.readBlockInto(address, register, buffer)
+		return numpy.frombuffer(buffer, dtype, count)
+
+	def read_array(self, address, register, dtype, count):
+		""" 
+			Reads a block of registers from a device as a NumPy array, decoded 
+			with numpy.frombuffer() without copying. Requires NumPy.
+
+			:param address: The I2C address of the device to read from
+			:param register: The register to read from, or `None` for no register
+			:param dtype: The NumPy dtype of an element, e.g. '>i2' for a big 
+				endian int16, or '>3h' for a triplet of them
+			:param count: The number of elements to read
+
+			:return: The decoded elements
+			:rtype: numpy.ndarray
+
+		"""
+		return self.readArray(address, register, dtype, count)
+
+	#-------------------------------------------------------------------------
+	# Snapshots
+	#
+	# A snapshot reads registers from several devices as one transaction - a 
+	# single i2c_rdwr call on Linux, and under one bus lock on CircuitPython 
+	# and MicroPython - so the readings are taken as close together as the bus
+	# allows.
+	#
+	def snapshot(self, reads):
+		""" 
+			Reads blocks of registers from one or more devices in a single 
+			transaction, and times it.
+
+			:param reads: A list of (address, register, nBytes) tuples. The 
+				register can be `None` to read without a register address, or a
+				bytes-like object for devices with multi-byte register addresses.
+
+			:return: The buffers read (in the order of reads), and the monotonic
+				times in nanoseconds before the transaction started and after it
+				ended. Every reading was taken between the two.
+			:rtype: (list of bytearray, int, int)
+
+			:example:
+
+			>>> buffers, startNs, endNs = i2cDriver.snapshot([(0x6B, 0x28, 6), (0x1E, 0x68, 6)])
+
+		"""
+		segments = []
+		buffers = []
+		for (address, register, nBytes) in reads:
+			if register is not None:
+				segments.append((address, 0, bytes((register,)) if isinstance(register, int) else _as_write_buffer(register)))
+
+			buffer = bytearray(nBytes)
+			segments.append((address, _kFlagRead, buffer))
+			buffers.append(buffer)
+
+		startNs = _monotonic_ns()
+		self._run_transaction(segments)
+		endNs = _monotonic_ns()
+
+		return buffers, startNs, endNs
+
+	#-------------------------------------------------------------------------
+	# FIFOs
+	#
+	# Sensor FIFOs have a count register, and a data register that pops data
+	# from the FIFO (it doesn't auto-increment). A drain reads the count, then
+	# all the whole frames in as few transactions as the platform allows: one
+	# write of the data register followed by a read for each burst. 
+	#
+	def drainFifo(self, address, countRegister, dataRegister, frameSize, maxBurst=None, countBytes=1, bigEndian=False, countInFrames=False):
+		""" 
+			Reads all the whole frames waiting in a device's FIFO.
+
+			:param address: The I2C address of the device
+			:param countRegister: The register holding the FIFO count
+			:param dataRegister: The register that pops data from the FIFO
+			:param frameSize: The number of bytes in each FIFO entry
+			:param maxBurst: The most bytes to read in one message (rounded down
+				to whole frames, unless a frame is bigger), or `None` to read as 
+				much as the platform allows
+			:param countBytes: The size of the count, in bytes
+			:param bigEndian: True if the count is big endian
+			:param countInFrames: True if the count is the number of frames, 
+				rather than bytes
+
+			:return: The frames read, one after the other
+			:rtype: bytearray
+
+		"""
+		_check_max_burst(maxBurst)
+		frames = self._read_fifo_count(address, countRegister, frameSize, countBytes, bigEndian, countInFrames)
+
+		buffer = bytearray(frames * frameSize)
+		self._drain_fifo(address, dataRegister, frameSize, memoryview(buffer), len(buffer), maxBurst)
+		return buffer
+
+	def drain_fifo(self, address, countRegister, dataRegister, frameSize, maxBurst=None, countBytes=1, bigEndian=False, countInFrames=False):
+		""" 
+			Reads all the whole frames waiting in a device's FIFO.
+
+			:param address: The I2C address of the device
+			:param countRegister: The register holding the FIFO count
+			:param dataRegister: The register that pops data from the FIFO
+			:param frameSize: The number of bytes in each FIFO entry
+			:param maxBurst: The most bytes to read in one message (rounded down
+				to whole frames, unless a frame is bigger), or `None` to read as 
+				much as the platform allows
+			:param countBytes: The size of the count, in bytes
+			:param bigEndian: True if the count is big endian
+			:param countInFrames: True if the count is the number of frames, 
+				rather than bytes
+
+			:return: The frames read, one after the other
+			:rtype: bytearray
+
+		"""
+		return self.drainFifo(address, countRegister, dataRegister, frameSize, maxBurst, countBytes, bigEndian, countInFrames)
+
+	def drainFifoInto(self, address, countRegister, dataRegister, frameSize, buf, maxBurst=None, countBytes=1, bigEndian=False, countInFrames=False):
+		""" 
+			Reads the whole frames waiting in a device's FIFO into a caller owned
+			buffer. Frames that don't fit in the buffer are left in the FIFO.
+
+			:param address: The I2C address of the device
+			:param countRegister: The register holding the FIFO count
+			:param dataRegister: The register that pops data from the FIFO
+			:param frameSize: The number of bytes in each FIFO entry
+			:param buf: A writable buffer (bytearray, NumPy array, ...) to read 
+				the frames into, starting at the beginning
+			:param maxBurst: The most bytes to read in one message (rounded down
+				to whole frames, unless a frame is bigger), or `None` to read as 
+				much as the platform allows
+			:param countBytes: The size of the count, in bytes
+			:param bigEndian: True if the count is big endian
+			:param countInFrames: True if the count is the number of frames, 
+				rather than bytes
+
+			:return: The number of frames read
+			:rtype: int
+
+		"""
+		_check_max_burst(maxBurst)
+		frames = self._read_fifo_count(address, countRegister, frameSize, countBytes, bigEndian, countInFrames)
+
+		view = _byte_view(buf)
+		frames = min(frames, len(view) // frameSize)
+
+		self._drain_fifo(address, dataRegister, frameSize, view, frames * frameSize, maxBurst)
+		return frames
+
+	def drain_fifo_into(self, address, countRegister, dataRegister, frameSize, buf, maxBurst=None, countBytes=1, bigEndian=False, countInFrames=False):
+		""" 
+			Reads the whole frames waiting in a device's FIFO into a caller owned
+			buffer. Frames that don't fit in the buffer are left in the FIFO.
+
+			:param address: The I2C address of the device
+			:param countRegister: The register holding the FIFO count
+			:param dataRegister: The register that pops data from the FIFO
+			:param frameSize: The number of bytes in each FIFO entry
+			:param buf: A writable buffer (bytearray, NumPy array, ...) to read 
+				the frames into, starting at the beginning
+			:param maxBurst: The most bytes to read in one message (rounded down
+				to whole frames, unless a frame is bigger), or `None` to read as 
+				much as the platform allows
+			:param countBytes: The size of the count, in bytes
+			:param bigEndian: True if the count is big endian
+			:param countInFrames: True if the count is the number of frames, 
+				rather than bytes
+
+			:return: The number of frames read
+			:rtype: int
+
+		"""
+		return self.drainFifoInto(address, countRegister, dataRegister, frameSize, buf, maxBurst, countBytes, bigEndian, countInFrames)
+
+	# Returns the number of whole frames in a FIFO
+	def _read_fifo_count(self, address, countRegister, frameSize, countBytes, bigEndian, countInFrames):
+		countBuffer = bytearray(countBytes)
+		self.readBlockInto(address, countRegister, countBuffer)
+
+		count = int.from_bytes(countBuffer, "big" if bigEndian else "little")
+		return count if countInFrames else count // frameSize
+
+	# Reads nBytes from the FIFO data register into view, in bursts of whole 
+	# frames
+	def _drain_fifo(self, address, dataRegister, frameSize, view, nBytes, maxBurst):
+		if nBytes == 0:
+			return
+
+		burst = nBytes
+		if maxBurst is not None:
+			burst = min(burst, maxBurst)
+		if self._maxMessageBytes is not None:
+			burst = min(burst, self._maxMessageBytes)
+
+		# Whole frames per read where they fit - frames bigger than a read can
+		# be are split across reads, which is fine as the FIFO streams bytes
+		if burst >= frameSize:
+			burst -= burst % frameSize
+		burst = max(burst, 1)
+
+		# Reads that fit in a transaction, after the data register write
+		maxReads = self._maxSegments - 1 if self._maxSegments is not None else nBytes
+
+		command = bytes((dataRegister,))
+		offset = 0
+		while offset < nBytes:
+			segments = [(address, 0, command)]
+			while offset < nBytes and len(segments) <= maxReads:
+				segments.append((address, _kFlagRead, view[offset:offset + burst]))
+				offset += burst
+
+			self._run_transaction(segments)
+
+	#-------------------------------------------------------------------------
+	# Periodic sampling
+
+	def sampler(self, address, register, dtype, rate, chunkSize=100):
+		""" 
+			Creates a sampler that reads a block of registers from a device at a 
+			fixed rate, yielding the decoded samples in chunks of NumPy arrays. 
+			Requires NumPy.
+
+			:param address: The I2C address of the device to read from
+			:param register: The register to read from, or `None` for no register
+			:param dtype: The NumPy dtype of a sample - the number of bytes read per 
+				sample is its size. e.g. '>3h' for three big endian int16 values.
+			:param rate: The sample rate in Hz
+			:param chunkSize: The number of samples in each chunk
+
+			:return: The sampler
+			:rtype: I2CSampler
+
+			:example:
+
+			>>> sampler = i2cDriver.sampler(0x6B, 0x28, '<3h', rate = 1000)
+			>>> for chunk in sampler.chunks(10):
+			...     print(chunk.mean(axis = 0))
+
+		"""
+		# Imported here, so NumPy is only needed if a sampler is used
+		from .i2c_sampler import I2CSampler
+
+		return I2CSampler(self, address, register, dtype, rate, chunkSize)
+
+	#-------------------------------------------------------------------------
+	# Transactions
+	#
+	# Queue several reads and writes, to one or more devices, and send them to
+	# the bus together.
+
+	def transaction(self):
+		""" 
+			Creates a transaction, used to queue reads and writes to one or more 
+			devices and send them to the I2C bus together.
+
+			:return: A new, empty transaction for this driver
+			:rtype: I2CTransaction
+
+			:example:
+
+			>>> txn = i2cDriver.transaction()
+			>>> txn.write(0x6B, [0x10, 0x40]).writeRead(0x6B, [0x28], 6)
+			>>> accel, = txn.run()
+
+		"""
+		return I2CTransaction(self)
+
+	# Called by I2CTransaction.run() to send a list of segments to the bus. 
+	# Implemented by the platform drivers
+	def _run_transaction(self, segments):
+		""" 
+			Called to send a list of (address, flags, buffer) segments to the bus, 
+			as one transaction.
+
+			:param segments: The messages of the transaction
+
+			:return: None
+
+		"""
+		return None
 
 	def isDeviceConnected(self, devAddress):
 		"""
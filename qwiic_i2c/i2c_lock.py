@@ -0,0 +1,303 @@
+#-----------------------------------------------------------------------------
+# i2c_lock.py
+#
+# Re-entrant bus lock used by the "with driver:" statement. 
+#
+# There is one lock per bus, shared by every driver on that bus in this 
+# process. On Linux the lock can also take an advisory (flock) lock on the bus
+# device, so separate processes sharing a bus can coordinate. 
+#
+# The lock records how long it waited to be acquired and how long it was held,
+# so bus hogs can be found.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+i2c_lock
+========
+A re-entrant, per bus lock with contention statistics, and optional cross 
+process locking on Linux.
+
+"""
+
+from .i2c_clock import _monotonic_ns
+
+# Threads aren't available on every platform. Without them there is nothing to
+# lock against, so a stand in lock that's always free is used. (_thread is 
+# used rather than threading, which takes much longer to import)
+try:
+	from _thread import allocate_lock as _Lock, get_ident as _get_ident
+except ImportError:
+	class _Lock(object):
+		def acquire(self, blocking=True):
+			return True
+
+		def release(self):
+			pass
+
+	def _get_ident():
+		return 0
+
+#-----------------------------------------------------------------------------
+# I2CBusLock
+#
+class I2CBusLock(object):
+	"""
+	I2CBusLock
+
+		A re-entrant lock for an I2C bus. The thread that holds the lock can 
+		acquire it again; it's released when every acquire has been matched with
+		a release.
+
+		Use getBusLock() to get the lock for a bus, rather than creating one.
+	"""
+
+	def __init__(self, name=None):
+		self.name = name
+
+		self._lock = _Lock()
+		self._owner = None
+		self._depth = 0
+
+		# Advisory cross process lock - a file descriptor for the bus device
+		self._processLockPath = None
+		self._processLockFd = None
+
+		self.resetStats()
+
+	def acquire(self):
+		"""
+			Acquires the lock, waiting if another thread (or process) holds it.
+
+			:return: None
+
+		"""
+		ident = _get_ident()
+		if self._owner == ident:
+			self._depth += 1
+			return
+
+		# Only time the wait if we have to wait
+		if not self._lock.acquire(False):
+			start = _monotonic_ns()
+			self._lock.acquire()
+			waitNs = _monotonic_ns() - start
+
+			self._contended += 1
+			self._waitNs += waitNs
+			if waitNs > self._maxWaitNs:
+				self._maxWaitNs = waitNs
+
+		try:
+			if self._processLockFd is not None:
+				self._acquire_process_lock()
+		except:
+			self._lock.release()
+			raise
+
+		self._owner = ident
+		self._depth = 1
+		self._acquisitions += 1
+		self._acquiredAt = _monotonic_ns()
+
+	def release(self):
+		"""
+			Releases the lock. Must be called by the thread that holds it.
+
+			:return: None
+
+		"""
+		if self._owner != _get_ident():
+			raise RuntimeError("Cannot release an I2C bus lock that isn't held")
+
+		self._depth -= 1
+		if self._depth > 0:
+			return
+
+		self._holdNs += _monotonic_ns() - self._acquiredAt
+
+		self._owner = None
+		try:
+			if self._processLockFd is not None:
+				self._release_process_lock()
+		finally:
+			self._lock.release()
+
+	def __enter__(self):
+		self.acquire()
+		return self
+
+	def __exit__(self, type, value, traceback):
+		self.release()
+
+	#-------------------------------------------------------------------------
+	# Cross process locking (Linux)
+	#
+	# flock() locks belong to the open file, so the lock opens its own file 
+	# for the bus device rather than sharing the driver's.
+
+	def enableProcessLock(self, path):
+		"""
+			Also take an advisory flock() lock on a file (the bus device) whenever 
+			this lock is acquired, so separate processes that do the same can 
+			coordinate. Linux only.
+
+			:param path: The file to lock, e.g. /dev/i2c-1
+
+			:return: None
+
+		"""
+		if self._processLockPath == path:
+			return
+
+		import os
+
+		with self:
+			self.disableProcessLock()
+			# Take the process lock the next time the lock is acquired
+			self._processLockFd = os.open(path, os.O_RDONLY)
+			self._processLockPath = path
+
+	def disableProcessLock(self):
+		"""
+			Stop taking the advisory cross process lock.
+
+			:return: None
+
+		"""
+		if self._processLockFd is None:
+			return
+
+		import os
+
+		with self:
+			# Closing the file releases the flock() lock if we have it
+			os.close(self._processLockFd)
+			self._processLockFd = None
+			self._processLockPath = None
+
+	def _acquire_process_lock(self):
+		import fcntl
+
+		try:
+			fcntl.flock(self._processLockFd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+		except BlockingIOError:
+			# Another process has the bus - wait for it
+			start = _monotonic_ns()
+			fcntl.flock(self._processLockFd, fcntl.LOCK_EX)
+			waitNs = _monotonic_ns() - start
+
+			self._processContended += 1
+			self._processWaitNs += waitNs
+			if waitNs > self._processMaxWaitNs:
+				self._processMaxWaitNs = waitNs
+
+	def _release_process_lock(self):
+		import fcntl
+
+		fcntl.flock(self._processLockFd, fcntl.LOCK_UN)
+
+	#-------------------------------------------------------------------------
+	# Statistics
+
+	def stats(self):
+		"""
+			Returns the lock statistics - how often the lock was acquired, how often
+			and how long it had to wait, and how long it was held. All times are in
+			nanoseconds.
+
+			:return: A dictionary of the lock statistics
+			:rtype: dict
+
+		"""
+		return {
+			"acquisitions": self._acquisitions,
+			"contended": self._contended,
+			"waitNs": self._waitNs,
+			"maxWaitNs": self._maxWaitNs,
+			"holdNs": self._holdNs,
+			"processContended": self._processContended,
+			"processWaitNs": self._processWaitNs,
+			"processMaxWaitNs": self._processMaxWaitNs
+		}
+
+	def resetStats(self):
+		"""
+			Resets the lock statistics.
+
+			:return: None
+
+		"""
+		self._acquisitions = 0
+		self._contended = 0
+		self._waitNs = 0
+		self._maxWaitNs = 0
+		self._holdNs = 0
+		self._processContended = 0
+		self._processWaitNs = 0
+		self._processMaxWaitNs = 0
+		self._acquiredAt = 0
+
+# bus key -> I2CBusLock
+_bus_locks = {}
+
+_bus_locks_lock = _Lock()
+
+#-----------------------------------------------------------------------------
+# Returns the lock for a bus, creating it if needed. Every driver on the same
+# bus shares the lock.
+def getBusLock(busKey):
+	"""
+	.. function:: getBusLock()
+
+		Returns the lock for an I2C bus. Every driver on the same bus shares the
+		lock.
+
+		:param busKey: Identifies the bus (the bus id on Linux)
+
+		:return: The lock for the bus
+		:rtype: I2CBusLock
+
+	"""
+	_bus_locks_lock.acquire()
+	try:
+		lock = _bus_locks.get(busKey)
+		if lock is None:
+			lock = I2CBusLock(busKey)
+			_bus_locks[busKey] = lock
+	finally:
+		_bus_locks_lock.release()
+
+	return lock
+
+def get_bus_lock(busKey):
+	return getBusLock(busKey)
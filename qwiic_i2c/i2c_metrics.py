@@ -0,0 +1,328 @@
+#-----------------------------------------------------------------------------
+# i2c_metrics.py
+#
+# Opt-in operation metrics for the qwiic I2C drivers.
+#
+# When metrics are enabled on a driver, its operations are replaced (on that
+# driver object only) with wrappers that time each call and record it against 
+# the bus, device address and operation. When they're disabled, the wrappers
+# are removed, so drivers without metrics run exactly as before.
+#
+# Latencies are kept in log-linear histograms, like HdrHistogram - each power
+# of two is split into 8 linear buckets, so percentiles are accurate to about 
+# 12% whatever the range of values.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+i2c_metrics
+===========
+Per device operation metrics - counts, bytes moved, latency histograms, 
+retries and failures. Enabled with I2CDriver.enableMetrics().
+
+"""
+
+import struct
+
+from .i2c_clock import _monotonic_ns
+from .i2c_lock import _Lock
+from .i2c_retry import _local, _retryCount
+from .i2c_transaction import _kFlagRead
+
+#-----------------------------------------------------------------------------
+# Log-linear histogram buckets. Values below 16 get a bucket each, and every 
+# power of two above that is split into 8 buckets.
+_kSubBucketBits = 3
+_kLinearLimit = 1 << (_kSubBucketBits + 1)
+
+if hasattr(0, "bit_length"):
+	def _bit_length(value):
+		return value.bit_length()
+else:
+	# MicroPython ints don't have bit_length()
+	def _bit_length(value):
+		nBits = 0
+		while value:
+			value >>= 1
+			nBits += 1
+		return nBits
+
+def _bucket_index(value):
+	if value < _kLinearLimit:
+		return value if value > 0 else 0
+
+	shift = _bit_length(value) - (_kSubBucketBits + 1)
+	return (shift << _kSubBucketBits) + (value >> shift)
+
+# Returns the highest value that falls in a bucket
+def _bucket_limit(index):
+	if index < _kLinearLimit:
+		return index
+
+	shift = (index >> _kSubBucketBits) - 1
+	return ((index - (shift << _kSubBucketBits) + 1) << shift) - 1
+
+#-----------------------------------------------------------------------------
+# The metrics for one (bus, address, operation)
+#
+class _OpMetrics(object):
+
+	def __init__(self):
+		self.count = 0
+		self.bytes = 0
+		self.retries = 0
+		self.failures = 0
+		self.totalNs = 0
+		self.minNs = None
+		self.maxNs = 0
+
+		# bucket index -> count
+		self.histogram = {}
+
+	def record(self, elapsedNs, nBytes, retries, failed):
+		self.count += 1
+		self.retries += retries
+		self.totalNs += elapsedNs
+
+		if failed:
+			self.failures += 1
+		else:
+			self.bytes += nBytes
+
+		if self.minNs is None or elapsedNs < self.minNs:
+			self.minNs = elapsedNs
+		if elapsedNs > self.maxNs:
+			self.maxNs = elapsedNs
+
+		index = _bucket_index(elapsedNs)
+		self.histogram[index] = self.histogram.get(index, 0) + 1
+
+	def percentile(self, percent):
+		target = self.count * percent / 100.0
+		seen = 0
+		for index in sorted(self.histogram):
+			seen += self.histogram[index]
+			if seen >= target:
+				return min(_bucket_limit(index), self.maxNs)
+
+		return self.maxNs
+
+	def snapshot(self):
+		return {
+			"count": self.count,
+			"bytes": self.bytes,
+			"retries": self.retries,
+			"failures": self.failures,
+			"totalNs": self.totalNs,
+			"minNs": self.minNs,
+			"maxNs": self.maxNs,
+			"meanNs": self.totalNs // self.count if self.count else 0,
+			"p50Ns": self.percentile(50),
+			"p90Ns": self.percentile(90),
+			"p99Ns": self.percentile(99),
+			"p999Ns": self.percentile(99.9),
+			"histogram": [(_bucket_limit(index), self.histogram[index]) for index in sorted(self.histogram)]
+		}
+
+#-----------------------------------------------------------------------------
+# The operations that are measured. For each - the reported name, the names 
+# of its arguments (to find keyword arguments), and a function that returns
+# the number of bytes it moves over the bus (not counting address bytes) from 
+# its arguments and result.
+#
+def _command_bytes(commandCode):
+	return 0 if commandCode is None else 1
+
+_kOperations = {
+	"readByte": ("readByte", ("address", "commandCode"), 
+		lambda args, result: 1 + _command_bytes(args[1] if len(args) > 1 else None)),
+	"readWord": ("readWord", ("address", "commandCode"), 
+		lambda args, result: 2 + _command_bytes(args[1])),
+	"readBlock": ("readBlock", ("address", "commandCode", "nBytes"), 
+		lambda args, result: args[2] + _command_bytes(args[1])),
+	"readBlockInto": ("readBlockInto", ("address", "commandCode", "buf"), 
+		lambda args, result: len(args[2]) + _command_bytes(args[1])),
+	"writeCommand": ("writeCommand", ("address", "commandCode"), 
+		lambda args, result: 1),
+	"writeByte": ("writeByte", ("address", "commandCode", "value"), 
+		lambda args, result: 2),
+	"writeWord": ("writeWord", ("address", "commandCode", "value"), 
+		lambda args, result: 3),
+	"writeBlock": ("writeBlock", ("address", "commandCode", "value"), 
+		lambda args, result: 1 + len(args[2])),
+	"writeReadBlock": ("writeReadBlock", ("address", "writeBytes", "readNBytes"), 
+		lambda args, result: len(args[1]) + args[2]),
+	"writeReadInto": ("writeReadInto", ("address", "writeBytes", "buf"), 
+		lambda args, result: len(args[1]) + len(args[2])),
+	"updateFields": ("updateFields", ("address", "register", "fields", "width"), 
+		lambda args, result: (2 if result else 1) * (1 + (args[3] if len(args) > 3 else 8) // 8)),
+	"readStruct": ("readStruct", ("address", "register", "fmt"), 
+		lambda args, result: struct.calcsize(args[2]) + _command_bytes(args[1])),
+	"readArray": ("readArray", ("address", "register", "dtype", "count"), 
+		lambda args, result: result.nbytes + _command_bytes(args[1])),
+	"snapshot": ("snapshot", ("reads",), 
+		lambda args, result: sum(len(buffer) for buffer in result[0]) + sum(_command_bytes(register) for (address, register, nBytes) in args[0])),
+	"drainFifo": ("drainFifo", ("address", "countRegister", "dataRegister", "frameSize"), 
+		lambda args, result: len(result)),
+	"drainFifoInto": ("drainFifoInto", ("address", "countRegister", "dataRegister", "frameSize", "buf"), 
+		lambda args, result: result * args[3]),
+	"_run_transaction": ("transaction", ("segments",), 
+		lambda args, result: sum(len(buffer) for (address, flags, buffer) in args[0])),
+	"isDeviceConnected": ("isDeviceConnected", ("devAddress",), 
+		lambda args, result: 0),
+	"scan": ("scan", (), 
+		lambda args, result: 0)
+}
+
+# Returns the device address an operation is for. Transactions are recorded
+# against the device of their first message, and scans against None.
+def _op_address(args):
+	if not args:
+		return None
+
+	if isinstance(args[0], int):
+		return args[0]
+
+	return args[0][0][0] if args[0] else None
+
+# Adds keyword arguments to the positional arguments, in order
+def _bind_args(argNames, args, argk):
+	return tuple(args) + tuple(argk.get(name) for name in argNames[len(args):])
+
+#-----------------------------------------------------------------------------
+# I2CMetrics
+#
+class I2CMetrics(object):
+	"""
+	I2CMetrics
+
+		Operation metrics for an I2C driver, keyed by (bus, device address, 
+		operation). Created by I2CDriver.enableMetrics().
+
+		Only the outermost operation is recorded - a readBlockInto() that's sent
+		as a transaction is recorded as a readBlockInto(), and an updateBits() as
+		an updateFields(), not as the reads and writes it makes.
+	"""
+
+	def __init__(self):
+		# (bus, address, operation) -> _OpMetrics. Operations on other threads
+		# (or driver layers) sharing these metrics record under the lock
+		self._ops = {}
+		self._lock = _Lock()
+
+		# Per thread nesting depth of the operation in progress
+		self._local = _local()
+
+	# Replaces the driver's operations with measuring wrappers
+	def _attach(self, driver):
+		self._detach(driver)
+
+		for methodName in _kOperations:
+			method = getattr(driver, methodName, None)
+			if method is not None:
+				setattr(driver, methodName, self._wrap(driver, methodName, method))
+
+	# Removes the wrappers, restoring the driver's own operations
+	def _detach(self, driver):
+		for methodName in _kOperations:
+			if methodName in driver.__dict__:
+				delattr(driver, methodName)
+
+	def _wrap(self, driver, methodName, method):
+		opName, argNames, countBytes = _kOperations[methodName]
+		local = self._local
+
+		def measured(*args, **argk):
+			# Nested operations are part of the outer one
+			if getattr(local, "depth", 0):
+				return method(*args, **argk)
+
+			local.depth = 1
+			retries = _retryCount.value
+			failed = True
+			result = None
+			start = _monotonic_ns()
+			try:
+				result = method(*args, **argk)
+				failed = False
+				return result
+			finally:
+				elapsedNs = _monotonic_ns() - start
+				local.depth = 0
+
+				if argk:
+					args = _bind_args(argNames, args, argk)
+
+				self._record(driver._busKey, _op_address(args), opName, elapsedNs, 0 if failed else countBytes(args, result), _retryCount.value - retries, failed)
+
+		return measured
+
+	def _record(self, busKey, address, opName, elapsedNs, nBytes, retries, failed):
+		key = (busKey, address, opName)
+
+		self._lock.acquire()
+		try:
+			op = self._ops.get(key)
+			if op is None:
+				op = _OpMetrics()
+				self._ops[key] = op
+
+			op.record(elapsedNs, nBytes, retries, failed)
+		finally:
+			self._lock.release()
+
+	def snapshot(self):
+		"""
+			Returns the metrics recorded so far. All times are in nanoseconds.
+
+			:return: A dictionary keyed by (bus, address, operation). Each value is 
+				a dictionary of the count, bytes moved, retries, failures, total, 
+				min, max and mean latency, the 50th, 90th, 99th and 99.9th 
+				percentile latency, and the latency histogram - a list of 
+				(bucket upper limit, count) tuples.
+			:rtype: dict
+
+		"""
+		self._lock.acquire()
+		try:
+			return dict((key, op.snapshot()) for (key, op) in self._ops.items())
+		finally:
+			self._lock.release()
+
+	def reset(self):
+		"""
+			Clears all the recorded metrics.
+
+			:return: None
+
+		"""
+		self._ops = {}
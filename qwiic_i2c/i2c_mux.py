@@ -0,0 +1,510 @@
+#-----------------------------------------------------------------------------
+# i2c_mux.py
+#
+# I2C mux (Qwiic Mux, TCA9548A) routing layer for an I2C driver.
+#
+# Devices behind a mux are given virtual addresses, each mapped to a (mux, 
+# channel, address). Operations on a virtual address select the mux channel 
+# first - but the layer tracks the channel each mux has selected, so the 
+# select is only sent when the channel changes.
+#
+# The TCA9548A only switches channel at a stop condition. On drivers whose 
+# transactions can send a stop part way through (the Linux driver, when the 
+# adapter supports protocol mangling), the select is sent in the same 
+# transaction as the device transfer - a single i2c_rdwr call on Linux.
+# Otherwise it's sent as a separate write first.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+
+"""
+i2c_mux
+=======
+A routing layer for devices behind I2C muxes, like the SparkFun Qwiic Mux 
+(TCA9548A), that wraps any I2C driver.
+
+"""
+
+from .i2c_proxy import I2CDriverProxy
+from .i2c_transaction import _kFlagRead, _kFlagStop, _as_write_buffer
+
+# The number of channels on a mux
+_kMuxChannels = 8
+
+# Single byte write buffers - for channel selects and command codes
+_kByteBuffers = [bytes((value,)) for value in range(256)]
+
+# bus key -> {mux address: selected channel bits, or None if unknown}. Shared
+# by every mux layer on the same bus
+_mux_channels = {}
+
+#-----------------------------------------------------------------------------
+# Internal function to get the write buffer for a command code, checking that
+# it's a byte - so a bad code raises a clear error, not an IndexError
+#
+def _command_buffer(commandCode):
+	if commandCode is None or not 0 <= commandCode <= 0xFF:
+		raise ValueError("Command code must be between 0 and 255, not %s" % (commandCode))
+
+	return _kByteBuffers[commandCode]
+
+#-----------------------------------------------------------------------------
+# MuxI2CDriver
+#
+# Routes are (mux address, channel bit, device address) tuples, keyed by 
+# virtual address.
+#
+class MuxI2CDriver(I2CDriverProxy):
+	"""
+	MuxI2CDriver
+
+		Wraps an I2C driver with routing for devices behind I2C muxes. Map a 
+		virtual address to each device with mapAddress(), and use the virtual
+		address with the usual operations. Addresses that aren't mapped go 
+		straight to the wrapped driver.
+
+		The channel each mux has selected is tracked, and only changed when an
+		operation needs a different one. Selecting a channel on one mux turns 
+		off the channels of the other muxes on the bus, so devices with the 
+		same address behind different muxes don't clash. Routed operations 
+		hold the bus lock.
+
+		:param driver: The I2C driver to wrap
+
+		:return: The I2C Driver interface for the qwiic system.
+		:rtype: Object
+
+		:example:
+
+		>>> import qwiic_i2c
+		>>> i2c = qwiic_i2c.MuxI2CDriver(qwiic_i2c.getI2CDriver())
+		>>> i2c.mapAddress(0x100, 0x70, 0, 0x6B) # First IMU, channel 0
+		>>> i2c.mapAddress(0x101, 0x70, 1, 0x6B) # Second IMU, channel 1
+		>>> i2c.readBlock(0x100, 0x28, 6)
+		>>> i2c.readBlock(0x101, 0x28, 6)
+	"""
+
+	def __init__(self, driver):
+		I2CDriverProxy.__init__(self, driver)
+
+		# virtual address -> route
+		self._routes = {}
+
+		busKey = self._busKey if self._busKey is not None else id(driver)
+		self._channels = _mux_channels.setdefault(busKey, {})
+
+	#-------------------------------------------------------------------------
+	# Routing configuration
+
+	def mapAddress(self, virtualAddress, muxAddress, channel, address):
+		"""
+			Maps a virtual address to a device behind a mux. Use an address that
+			isn't used on the bus - e.g. 0x100 and up.
+
+			:param virtualAddress: The address used for the device
+			:param muxAddress: The I2C address of the mux
+			:param channel: The mux channel the device is on (0 - 7)
+			:param address: The I2C address of the device
+
+			:return: None
+
+		"""
+		if channel < 0 or channel >= _kMuxChannels:
+			raise ValueError("Mux channel must be between 0 and %d" % (_kMuxChannels - 1))
+
+		self._routes[virtualAddress] = (muxAddress, 1 << channel, address)
+
+		# Until it's selected, we don't know the mux's channel
+		self._channels.setdefault(muxAddress, None)
+
+	def map_address(self, virtualAddress, muxAddress, channel, address):
+		return self.mapAddress(virtualAddress, muxAddress, channel, address)
+
+	def unmapAddress(self, virtualAddress):
+		"""
+			Removes the mapping of a virtual address.
+
+			:param virtualAddress: The virtual address
+
+			:return: None
+
+		"""
+		self._routes.pop(virtualAddress, None)
+
+	def unmap_address(self, virtualAddress):
+		return self.unmapAddress(virtualAddress)
+
+	def selectChannel(self, muxAddress, channel):
+		"""
+			Selects a mux channel (turning off the channels of the other muxes),
+			unless it's already selected.
+
+			:param muxAddress: The I2C address of the mux
+			:param channel: The channel to select (0 - 7), or `None` to turn off
+				all the channels
+
+			:return: None
+
+		"""
+		with self._get_lock():
+			self._send_selects(self._selects(muxAddress, 0 if channel is None else 1 << channel, self._channels))
+
+	def select_channel(self, muxAddress, channel):
+		return self.selectChannel(muxAddress, channel)
+
+	def invalidateChannels(self):
+		"""
+			Forgets the channels the muxes have selected, so the next operation on
+			each mux selects its channel again. Call this if a mux is reset, or 
+			changed by anything other than a mux layer.
+
+			:return: None
+
+		"""
+		for muxAddress in self._channels:
+			self._channels[muxAddress] = None
+
+	def invalidate_channels(self):
+		return self.invalidateChannels()
+
+	def scanChannels(self, muxAddress, channels=None):
+		"""
+			Scans each channel of a mux for devices. Devices that answer with all
+			the channels turned off (those on the bus itself) aren't included.
+
+			:param muxAddress: The I2C address of the mux
+			:param channels: The channels to scan, or `None` for all of them
+
+			:return: The addresses found on each channel, as a dictionary of 
+				channel: list of addresses
+			:rtype: dict
+
+		"""
+		if channels is None:
+			channels = range(_kMuxChannels)
+
+		self._channels.setdefault(muxAddress, None)
+
+		found = {}
+		with self._get_lock():
+			self.selectChannel(muxAddress, None)
+			upstream = self._driver.scan()
+
+			for channel in channels:
+				self.selectChannel(muxAddress, channel)
+				found[channel] = [address for address in self._driver.scan() if address not in upstream]
+
+		return found
+
+	def scan_channels(self, muxAddress, channels=None):
+		return self.scanChannels(muxAddress, channels)
+
+	#-------------------------------------------------------------------------
+	# Channel selection
+
+	# Returns the (mux address, channel bits) writes needed so a mux has only
+	# the given channels selected, and the other muxes none, and updates 
+	# channels (mux address -> channel bits) to match
+	def _selects(self, muxAddress, bits, channels):
+		selects = []
+		for otherAddress in channels:
+			if otherAddress != muxAddress and channels[otherAddress] != 0:
+				selects.append((otherAddress, 0))
+
+		if channels.get(muxAddress) != bits:
+			selects.append((muxAddress, bits))
+
+		for (otherAddress, otherBits) in selects:
+			channels[otherAddress] = otherBits
+
+		return selects
+
+	# Sends channel selects as separate writes. If one fails, the state of the
+	# mux isn't known
+	def _send_selects(self, selects):
+		for (muxAddress, bits) in selects:
+			try:
+				self._driver.writeCommand(muxAddress, bits)
+			except Exception:
+				self._channels[muxAddress] = None
+				raise
+
+	# Returns True if a mux has only the given channels selected, and the 
+	# other muxes none
+	def _is_selected(self, muxAddress, bits):
+		channels = self._channels
+		if channels.get(muxAddress) != bits:
+			return False
+
+		for otherAddress in channels:
+			if otherAddress != muxAddress and channels[otherAddress] != 0:
+				return False
+
+		return True
+
+	# Gets a route ready for a single operation. Returns True if the channel 
+	# needs selecting and the select can be sent in the same transaction as
+	# the operation - the caller then sends the operation with 
+	# _run_transaction(), which adds the select. Otherwise any select is sent
+	# now, and the caller calls the wrapped driver with the device address.
+	def _prepare(self, route, nBytes=0):
+		(muxAddress, bits, address) = route
+
+		if self._is_selected(muxAddress, bits):
+			return False
+
+		if self._driver._stopFlag and (self._maxMessageBytes is None or nBytes <= self._maxMessageBytes):
+			return True
+
+		self._send_selects(self._selects(muxAddress, bits, self._channels))
+		return False
+
+	#-------------------------------------------------------------------------
+	# read Data Command
+
+	def readWord(self, address, commandCode):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.readWord(address, commandCode)
+
+		with self._get_lock():
+			if self._prepare(route):
+				buffer = bytearray(2)
+				self._read_into(address, commandCode, buffer)
+				return (buffer[1] << 8) | buffer[0]
+
+			return self._driver.readWord(route[2], commandCode)
+
+	def readByte(self, address, commandCode = None):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.readByte(address, commandCode)
+
+		with self._get_lock():
+			if self._prepare(route):
+				buffer = bytearray(1)
+				self._read_into(address, commandCode, buffer)
+				return buffer[0]
+
+			return self._driver.readByte(route[2], commandCode)
+
+	def readBlock(self, address, commandCode, nBytes):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.readBlock(address, commandCode, nBytes)
+
+		with self._get_lock():
+			if self._prepare(route, nBytes):
+				buffer = bytearray(nBytes)
+				self._read_into(address, commandCode, buffer)
+				return self._driver._block_result(buffer)
+
+			return self._driver.readBlock(route[2], commandCode, nBytes)
+
+	def readBlockInto(self, address, commandCode, buf):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.readBlockInto(address, commandCode, buf)
+
+		with self._get_lock():
+			if self._prepare(route, len(buf)):
+				return self._read_into(address, commandCode, buf)
+
+			return self._driver.readBlockInto(route[2], commandCode, buf)
+
+	def writeReadInto(self, address, writeBytes, buf):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.writeReadInto(address, writeBytes, buf)
+
+		with self._get_lock():
+			if self._prepare(route, len(buf)):
+				return self._run_transaction(((address, 0, _as_write_buffer(writeBytes)), (address, _kFlagRead, buf)))
+
+			return self._driver.writeReadInto(route[2], writeBytes, buf)
+
+	# Reads from a device register (or without one) as a transaction, using 
+	# the virtual address
+	def _read_into(self, address, commandCode, buf):
+		if commandCode is None:
+			self._run_transaction(((address, _kFlagRead, buf),))
+		else:
+			self._run_transaction(((address, 0, _command_buffer(commandCode)), (address, _kFlagRead, buf)))
+
+	#-------------------------------------------------------------------------
+	# write Data Commands
+
+	def writeCommand(self, address, commandCode):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.writeCommand(address, commandCode)
+
+		with self._get_lock():
+			if self._prepare(route):
+				return self._run_transaction(((address, 0, _command_buffer(commandCode)),))
+
+			return self._driver.writeCommand(route[2], commandCode)
+
+	def writeWord(self, address, commandCode, value):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.writeWord(address, commandCode, value)
+
+		with self._get_lock():
+			if self._prepare(route):
+				return self._run_transaction(((address, 0, bytes((commandCode, value & 0xFF, (value >> 8) & 0xFF))),))
+
+			return self._driver.writeWord(route[2], commandCode, value)
+
+	def writeByte(self, address, commandCode, value):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.writeByte(address, commandCode, value)
+
+		with self._get_lock():
+			if self._prepare(route):
+				return self._run_transaction(((address, 0, bytes((commandCode, value & 0xFF))),))
+
+			return self._driver.writeByte(route[2], commandCode, value)
+
+	def writeBlock(self, address, commandCode, value):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.writeBlock(address, commandCode, value)
+
+		with self._get_lock():
+			# Block writes to devices with pages are split by the wrapped driver
+			if self._driver.getPageSize(route[2]) is None and self._prepare(route, 1 + len(value)):
+				return self._run_transaction(((address, 0, _command_buffer(commandCode) + _as_write_buffer(value)),))
+
+			self._send_selects(self._selects(route[0], route[1], self._channels))
+			return self._driver.writeBlock(route[2], commandCode, value)
+
+	def writeReadBlock(self, address, writeBytes, readNBytes):
+		route = self._routes.get(address)
+		if route is None:
+			return self._driver.writeReadBlock(address, writeBytes, readNBytes)
+
+		with self._get_lock():
+			if self._prepare(route, readNBytes):
+				buffer = bytearray(readNBytes)
+				self._run_transaction(((address, 0, _as_write_buffer(writeBytes)), (address, _kFlagRead, buffer)))
+				return self._driver._write_read_result(route[2], buffer)
+
+			return self._driver.writeReadBlock(route[2], writeBytes, readNBytes)
+
+	# Block writes are split into pages by the wrapped driver, so pages are set
+	# for the device address
+	def setPageSize(self, address, pageSize, writeCycleNs=0):
+		route = self._routes.get(address)
+		return self._driver.setPageSize(route[2] if route is not None else address, pageSize, writeCycleNs)
+
+	def getPageSize(self, address):
+		route = self._routes.get(address)
+		return self._driver.getPageSize(route[2] if route is not None else address)
+
+	#-------------------------------------------------------------------------
+	# Transactions
+	#
+	# Messages to virtual addresses are sent to their devices, with the 
+	# channel selects they need in between. If the wrapped driver honors 
+	# _kFlagStop, it's all one transaction - a select followed by a stop, so
+	# the mux switches, then the device messages. Otherwise the transaction is
+	# split at each channel change, with the selects sent in between.
+
+	def _run_transaction(self, segments):
+		routes = self._routes
+		for (address, flags, buffer) in segments:
+			if address in routes:
+				break
+		else:
+			return self._driver._run_transaction(segments)
+
+		with self._get_lock():
+			if self._driver._stopFlag:
+				channels = dict(self._channels)
+				folded = []
+				for (address, flags, buffer) in segments:
+					route = routes.get(address)
+					if route is not None:
+						for (muxAddress, bits) in self._selects(route[0], route[1], channels):
+							folded.append((muxAddress, _kFlagStop, _kByteBuffers[bits]))
+						address = route[2]
+
+					folded.append((address, flags, buffer))
+
+				if self._maxSegments is None or len(folded) <= self._maxSegments:
+					try:
+						self._driver._run_transaction(folded)
+					except Exception:
+						# The muxes that were being switched are in an unknown state
+						for (address, flags, buffer) in folded:
+							if flags & _kFlagStop:
+								self._channels[address] = None
+						raise
+
+					self._channels.update(channels)
+					return None
+
+			# Split at each channel change
+			part = []
+			for (address, flags, buffer) in segments:
+				route = routes.get(address)
+				if route is not None:
+					if not self._is_selected(route[0], route[1]):
+						if part:
+							self._driver._run_transaction(part)
+							part = []
+						self._send_selects(self._selects(route[0], route[1], self._channels))
+					address = route[2]
+
+				part.append((address, flags, buffer))
+
+			if part:
+				self._driver._run_transaction(part)
+
+	#-------------------------------------------------------------------------
+	# Device detection
+
+	def isDeviceConnected(self, devAddress):
+		route = self._routes.get(devAddress)
+		if route is None:
+			return self._driver.isDeviceConnected(devAddress)
+
+		with self._get_lock():
+			try:
+				self._send_selects(self._selects(route[0], route[1], self._channels))
+			except Exception:
+				# The mux isn't there
+				return False
+
+			return self._driver.isDeviceConnected(route[2])
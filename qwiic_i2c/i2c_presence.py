@@ -0,0 +1,312 @@
+#-----------------------------------------------------------------------------
+# i2c_presence.py
+#
+# Hot-plug presence monitor layer for an I2C driver.
+#
+# Rather than a full scan every few seconds, the monitor re-probes the 
+# addresses it knows about (devices it has seen, and any it's asked to watch)
+# often, and sweeps the rest of the address range slowly, a few addresses at a
+# time in round-robin. Devices appearing and disappearing fire callbacks, and
+# isDeviceConnected() and scan() answer from the presence table without 
+# touching the bus.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+
+"""
+i2c_presence
+============
+A presence monitor that wraps any I2C driver, tracks which devices are 
+connected and calls back when they're attached or detached.
+
+"""
+
+from .i2c_proxy import I2CDriverProxy
+from .i2c_clock import _monotonic_ns
+
+# The legal device addresses, as swept by scan()
+_kFirstAddress = 0x08
+_kLastAddress = 0x77
+
+#-----------------------------------------------------------------------------
+# PresenceMonitor
+#
+class PresenceMonitor(I2CDriverProxy):
+	"""
+	PresenceMonitor
+
+		Wraps an I2C driver with a presence table, kept up to date by probing 
+		the bus - from a background thread with start(), or by calling poll()
+		from your own loop.
+
+		Known addresses (devices that have been seen, and watched addresses) 
+		are re-probed every knownIntervalNs. The rest of the addresses are 
+		swept sweepBatch at a time every sweepIntervalNs, so a new device at an
+		unknown address is found within one full sweep. Addresses that have 
+		been absent for forgetNs are dropped back to the sweep - watched 
+		addresses are kept.
+
+		Each probe holds the bus lock, so probes don't interleave with 
+		transactions on the same bus from other threads.
+
+		Once the first scan is done, isDeviceConnected() (and ping()) and 
+		scan() answer from the presence table. Asking about an address also 
+		adds it to the known addresses.
+
+		:param driver: The I2C driver to wrap
+		:param knownIntervalNs: How often the known addresses are re-probed, in
+			nanoseconds
+		:param sweepIntervalNs: How often the next batch of unknown addresses 
+			is probed, in nanoseconds
+		:param sweepBatch: The number of unknown addresses probed in each batch
+		:param forgetNs: How long a known address can be absent before it's 
+			dropped from the known addresses, in nanoseconds - or None to keep
+			them
+		:param onAttach: Called with the address of each device that appears
+		:param onDetach: Called with the address of each device that disappears
+
+		:return: The I2C Driver interface for the qwiic system.
+		:rtype: Object
+
+		:example:
+
+		>>> import qwiic_i2c
+		>>> i2c = qwiic_i2c.PresenceMonitor(qwiic_i2c.getI2CDriver(), 
+		...     onAttach=lambda address: print("attached", hex(address)),
+		...     onDetach=lambda address: print("detached", hex(address)))
+		>>> i2c.start()
+		>>> i2c.isDeviceConnected(0x6B) # No bus access
+	"""
+
+	def __init__(self, driver, knownIntervalNs=100000000, sweepIntervalNs=100000000, sweepBatch=4, forgetNs=10000000000, onAttach=None, onDetach=None):
+		I2CDriverProxy.__init__(self, driver)
+
+		self._knownIntervalNs = knownIntervalNs
+		self._sweepIntervalNs = sweepIntervalNs
+		self._sweepBatch = sweepBatch
+		self._forgetNs = forgetNs
+
+		#: Called with the address of each device that appears
+		self.onAttach = onAttach
+
+		#: Called with the address of each device that disappears
+		self.onDetach = onDetach
+
+		# Addresses re-probed every knownIntervalNs, and the devices present.
+		# Known addresses map to when they were last seen (or asked about); 
+		# watched addresses are never forgotten
+		self._known = {}
+		self._watched = set()
+		self._present = set()
+		self._scanned = False
+
+		# The next unknown address to sweep, and when the next probes are due
+		self._sweepAddress = _kFirstAddress
+		self._knownDueNs = 0
+		self._sweepDueNs = 0
+
+		self._thread = None
+		self._stopEvent = None
+
+	#-------------------------------------------------------------------------
+	# Monitoring
+
+	def watch(self, addresses):
+		"""
+			Adds addresses to the known addresses, so they're re-probed every
+			knownIntervalNs - e.g. the addresses of the devices you expect to be
+			plugged in.
+
+			:param addresses: An iterable of device addresses (e.g. a list)
+
+			:return: None
+
+		"""
+		now = _monotonic_ns()
+		for address in addresses:
+			self._watched.add(address)
+			self._known[address] = now
+
+	def refresh(self):
+		"""
+			Scans every address now, updating the presence table and firing the
+			callbacks for any changes.
+
+			:return: The addresses of the devices connected
+			:rtype: list
+
+		"""
+		with self._driver:
+			found = self._driver.scan()
+
+		for address in found:
+			self._update(address, True)
+
+		for address in [address for address in self._present if address not in found]:
+			self._update(address, False)
+
+		self._scanned = True
+		return sorted(self._present)
+
+	def poll(self):
+		"""
+			Does the probing that's due - re-probing the known addresses and 
+			sweeping the next batch of unknown ones - and fires the callbacks for
+			any changes. The first poll scans every address.
+
+			:return: The time until the next probes are due, in nanoseconds
+			:rtype: int
+
+		"""
+		if not self._scanned:
+			self.refresh()
+
+		now = _monotonic_ns()
+
+		if now >= self._knownDueNs:
+			for address in sorted(self._known):
+				self._update(address, self._probe(address))
+			self._forget(now)
+			self._knownDueNs = now + self._knownIntervalNs
+
+		if now >= self._sweepDueNs:
+			self._sweep()
+			self._sweepDueNs = now + self._sweepIntervalNs
+
+		return min(self._knownDueNs, self._sweepDueNs) - _monotonic_ns()
+
+	def start(self):
+		"""
+			Starts polling from a background thread. Needs the threading module
+			- on platforms without it, call poll() from your own loop instead. 
+			The callbacks are called from the thread.
+
+			:return: None
+
+		"""
+		if self._thread is not None:
+			return
+
+		# Imported here, so threading is only needed if the thread is used
+		import threading
+
+		self._stopEvent = threading.Event()
+		self._thread = threading.Thread(target=self._run, args=(self._stopEvent,), name="qwiic_i2c_presence")
+		self._thread.daemon = True
+		self._thread.start()
+
+	def stop(self):
+		"""
+			Stops the background thread started by start(), waiting for it to
+			finish.
+
+			:return: None
+
+		"""
+		if self._thread is None:
+			return
+
+		self._stopEvent.set()
+		self._thread.join()
+		self._thread = None
+
+	def close(self):
+		self.stop()
+		return self._driver.close()
+
+	# The background thread - polls, then sleeps until the next probes are due
+	def _run(self, stopEvent):
+		while not stopEvent.is_set():
+			waitNs = self.poll()
+			stopEvent.wait(max(waitNs, 0) / 1000000000)
+
+	# Probes the next sweepBatch unknown addresses, wrapping around the range
+	def _sweep(self):
+		probed = 0
+		for i in range(_kLastAddress - _kFirstAddress + 1):
+			if probed >= self._sweepBatch:
+				break
+
+			address = self._sweepAddress
+			self._sweepAddress = address + 1 if address < _kLastAddress else _kFirstAddress
+
+			if address not in self._known:
+				self._update(address, self._probe(address))
+				probed += 1
+
+	# Probes an address, holding the bus lock so the probe doesn't land in the
+	# middle of another thread's transaction (or mux channel selection)
+	def _probe(self, address):
+		with self._driver:
+			return self._driver.isDeviceConnected(address)
+
+	# Drops known addresses that have been absent for forgetNs, so they go 
+	# back to being swept with the unknown addresses
+	def _forget(self, now):
+		if self._forgetNs is None:
+			return
+
+		for address, seenNs in list(self._known.items()):
+			if address not in self._present and address not in self._watched and now - seenNs > self._forgetNs:
+				self._known.pop(address, None)
+
+	# Records the result of a probe, firing a callback if it's a change. Seen
+	# devices become known, so they're re-probed often from then on
+	def _update(self, address, present):
+		if present:
+			self._known[address] = _monotonic_ns()
+			if address not in self._present:
+				self._present.add(address)
+				if self.onAttach is not None:
+					self.onAttach(address)
+
+		elif address in self._present:
+			self._present.discard(address)
+			if self.onDetach is not None:
+				self.onDetach(address)
+
+	#-------------------------------------------------------------------------
+	# Device detection
+
+	def isDeviceConnected(self, devAddress):
+		if not self._scanned or devAddress < _kFirstAddress or devAddress > _kLastAddress:
+			return self._driver.isDeviceConnected(devAddress)
+
+		if devAddress not in self._known:
+			self._known[devAddress] = _monotonic_ns()
+		return devAddress in self._present
+
+	def scan(self):
+		if not self._scanned:
+			return self._driver.scan()
+
+		return sorted(self._present)
@@ -0,0 +1,252 @@
+#-----------------------------------------------------------------------------
+# i2c_proxy.py
+#
+# Base class for driver layers - objects that wrap an I2C driver, add some
+# behavior, and present the same I2CDriver interface to device code.
+#
+# Every operation is forwarded to the wrapped driver. Layers override the
+# (camelCase) operations they care about - the snake_case names call the
+# camelCase versions, so overriding one covers both.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+i2c_proxy
+=========
+Base class for layers that wrap an I2C driver and present the same I2CDriver
+interface. Every operation is forwarded to the wrapped driver.
+
+"""
+
+from .i2c_driver import I2CDriver
+
+#-----------------------------------------------------------------------------
+# I2CDriverProxy
+#
+class I2CDriverProxy(I2CDriver):
+	"""
+	I2CDriverProxy
+
+		Wraps an I2C driver and forwards every operation to it. Used as the base
+		class for driver layers.
+
+		:param driver: The I2C driver to wrap
+
+		:return: The I2C Driver interface for the qwiic system.
+		:rtype: Object
+	"""
+
+	def __init__(self, driver):
+		I2CDriver.__init__(self)
+
+		self._driver = driver
+		self._busKey = driver._busKey
+		self.name = driver.name
+
+	# Anything not defined here (platform specific methods like scanAllBuses())
+	# comes from the wrapped driver
+	def __getattr__(self, name):
+		if name == "_driver":
+			raise AttributeError(name)
+
+		return getattr(self._driver, name)
+
+	@property
+	def driver(self):
+		""" The wrapped I2C driver """
+		return self._driver
+
+	@property
+	def i2cbus(self):
+		""" The wrapped driver's I2C bus object """
+		return self._driver.i2cbus
+
+	@i2cbus.setter
+	def i2cbus(self, value):
+		pass
+
+	# The wrapped driver's transaction limits
+	@property
+	def _maxSegments(self):
+		return self._driver._maxSegments
+
+	@property
+	def _maxMessageBytes(self):
+		return self._driver._maxMessageBytes
+
+	@property
+	def _stopFlag(self):
+		return self._driver._stopFlag
+
+	def close(self):
+		return self._driver.close()
+
+	def __enter__(self):
+		self._driver.__enter__()
+		return self
+
+	def __exit__(self, type, value, traceback):
+		return self._driver.__exit__(type, value, traceback)
+
+	def _get_lock(self):
+		return self._driver._get_lock()
+
+	def _block_result(self, buffer):
+		return self._driver._block_result(buffer)
+
+	def _write_read_result(self, address, buffer):
+		return self._driver._write_read_result(address, buffer)
+
+	# Retries are done by the wrapped driver
+	def setRetryPolicy(self, policy, address=None):
+		return self._driver.setRetryPolicy(policy, address)
+
+	def set_retry_policy(self, policy, address=None):
+		return self.setRetryPolicy(policy, address)
+
+	def getRetryPolicy(self, address=None):
+		return self._driver.getRetryPolicy(address)
+
+	def get_retry_policy(self, address=None):
+		return self.getRetryPolicy(address)
+
+	# Transfers are timestamped by the wrapped driver
+	def enableTimestamps(self, enable=True):
+		return self._driver.enableTimestamps(enable)
+
+	def enable_timestamps(self, enable=True):
+		return self.enableTimestamps(enable)
+
+	@property
+	def timestamps(self):
+		""" The wrapped driver's transfer timestamps """
+		return self._driver.timestamps
+
+	# Block writes are split into pages by the wrapped driver
+	def setPageSize(self, address, pageSize, writeCycleNs=0):
+		return self._driver.setPageSize(address, pageSize, writeCycleNs)
+
+	def set_page_size(self, address, pageSize, writeCycleNs=0):
+		return self.setPageSize(address, pageSize, writeCycleNs)
+
+	def getPageSize(self, address):
+		return self._driver.getPageSize(address)
+
+	def get_page_size(self, address):
+		return self.getPageSize(address)
+
+	#-------------------------------------------------------------------------
+	# read Data Command
+
+	def readWord(self, address, commandCode):
+		return self._driver.readWord(address, commandCode)
+
+	def read_word(self, address, commandCode):
+		return self.readWord(address, commandCode)
+
+	def readByte(self, address, commandCode = None):
+		return self._driver.readByte(address, commandCode)
+
+	def read_byte(self, address, commandCode = None):
+		return self.readByte(address, commandCode)
+
+	def readBlock(self, address, commandCode, nBytes):
+		return self._driver.readBlock(address, commandCode, nBytes)
+
+	def read_block(self, address, commandCode, nBytes):
+		return self.readBlock(address, commandCode, nBytes)
+
+	def readBlockInto(self, address, commandCode, buf):
+		return self._driver.readBlockInto(address, commandCode, buf)
+
+	def read_block_into(self, address, commandCode, buf):
+		return self.readBlockInto(address, commandCode, buf)
+
+	def writeReadInto(self, address, writeBytes, buf):
+		return self._driver.writeReadInto(address, writeBytes, buf)
+
+	def write_read_into(self, address, writeBytes, buf):
+		return self.writeReadInto(address, writeBytes, buf)
+
+	#-------------------------------------------------------------------------
+	# write Data Commands
+
+	def writeCommand(self, address, commandCode):
+		return self._driver.writeCommand(address, commandCode)
+
+	def write_command(self, address, commandCode):
+		return self.writeCommand(address, commandCode)
+
+	def writeWord(self, address, commandCode, value):
+		return self._driver.writeWord(address, commandCode, value)
+
+	def write_word(self, address, commandCode, value):
+		return self.writeWord(address, commandCode, value)
+
+	def writeByte(self, address, commandCode, value):
+		return self._driver.writeByte(address, commandCode, value)
+
+	def write_byte(self, address, commandCode, value):
+		return self.writeByte(address, commandCode, value)
+
+	def writeBlock(self, address, commandCode, value):
+		return self._driver.writeBlock(address, commandCode, value)
+
+	def write_block(self, address, commandCode, value):
+		return self.writeBlock(address, commandCode, value)
+
+	def writeReadBlock(self, address, writeBytes, readNBytes):
+		return self._driver.writeReadBlock(address, writeBytes, readNBytes)
+
+	def write_read_block(self, address, writeBytes, readNBytes):
+		return self.writeReadBlock(address, writeBytes, readNBytes)
+
+	#-------------------------------------------------------------------------
+	# Transactions
+
+	def _run_transaction(self, segments):
+		return self._driver._run_transaction(segments)
+
+	#-------------------------------------------------------------------------
+	# Device detection
+
+	def isDeviceConnected(self, devAddress):
+		return self._driver.isDeviceConnected(devAddress)
+
+	def is_device_connected(self, devAddress):
+		return self.isDeviceConnected(devAddress)
+
+	def ping(self, devAddress):
+		return self.isDeviceConnected(devAddress)
+
+	def scan(self):
+		return self._driver.scan()
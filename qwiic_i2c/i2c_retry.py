@@ -0,0 +1,207 @@
+#-----------------------------------------------------------------------------
+# i2c_retry.py
+#
+# Retry policy for the qwiic I2C drivers.
+#
+# A failed operation is retried a limited number of times, waiting longer
+# between each attempt (with some randomness, so devices and threads that
+# fail together don't retry together), and giving up once a deadline passes.
+# Writes are only retried if the policy says they're safe to repeat.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+i2c_retry
+=========
+The retry policy used by the I2C drivers. Set with I2CDriver.setRetryPolicy(),
+for a driver or for a single device address.
+
+"""
+
+from .i2c_clock import _monotonic_ns, _sleep_ns
+from .i2c_transaction import _kFlagRead, _kFlagStop
+
+try:
+	from threading import local as _local
+except ImportError:
+	# No threads - a plain object will do
+	class _local(object):
+		pass
+
+# The number of retries made by each thread. Counted here, where retries are 
+# made, so the metrics on every driver layer see the retries made by the 
+# driver they wrap - see i2c_metrics. The class attribute is the starting 
+# count for each thread, so reading it never misses
+class _RetryCount(_local):
+	value = 0
+
+_retryCount = _RetryCount()
+
+# Returns random bits for the jitter. The random module is only imported once
+# jitter is used, as it's slow to import
+_getrandbits = None
+
+def _random_bits(nBits):
+	global _getrandbits
+
+	if _getrandbits is None:
+		try:
+			from random import getrandbits
+			_getrandbits = getrandbits
+		except ImportError:
+			# No random module - no jitter
+			_getrandbits = lambda nBits: 0
+
+	return _getrandbits(nBits)
+
+#-----------------------------------------------------------------------------
+# Internal function to decide if a transaction writes to a device. A write 
+# followed by a read from the same device only sets the register to read, so
+# isn't counted. Nor are messages ending in a stop - they're the mux channel 
+# selects folded into a transaction (see i2c_mux), and selecting a channel 
+# again does no harm.
+def _is_write_transaction(segments):
+	nSegments = len(segments)
+	for i in range(nSegments):
+		address, flags, buffer = segments[i]
+		if flags & (_kFlagRead | _kFlagStop):
+			continue
+
+		if i + 1 < nSegments and segments[i + 1][0] == address and segments[i + 1][1] & _kFlagRead:
+			continue
+
+		return True
+
+	return False
+
+#-----------------------------------------------------------------------------
+# RetryPolicy
+#
+class RetryPolicy(object):
+	"""
+	RetryPolicy
+
+		How the I2C drivers retry failed operations. 
+
+		The wait before retry n (starting at 1) is backoffNs * backoffFactor ** (n - 1),
+		limited to maxBackoffNs. With jitter, the wait is reduced by a random 
+		amount - up to that fraction of it.
+
+		:param attempts: The number of attempts, including the first. 1 disables
+			retries.
+		:param backoffNs: The wait before the first retry, in nanoseconds
+		:param backoffFactor: How much the wait grows for each retry
+		:param maxBackoffNs: The longest wait between attempts, in nanoseconds, or
+			`None` for no limit
+		:param jitter: The fraction (0 to 1) of each wait that's random
+		:param deadlineNs: The longest time spent retrying after the first 
+			failure, in nanoseconds, or `None` for no limit. No retry is started 
+			if its wait would end after the deadline.
+		:param retryOn: The exception types that are retried. Anything else is
+			raised straight away.
+		:param retryWrites: True if writes can be retried - only set this if 
+			repeating a write is harmless for the devices it's used with.
+
+		:example:
+
+		>>> import qwiic_i2c
+		>>> i2c = qwiic_i2c.getI2CDriver()
+		>>> # Back off from a device that stretches its clock, but give up within 10ms
+		>>> i2c.setRetryPolicy(qwiic_i2c.RetryPolicy(attempts = 5, backoffNs = 500000, 
+		...     jitter = 0.5, deadlineNs = 10000000), address = 0x48)
+	"""
+
+	def __init__(self, attempts=3, backoffNs=0, backoffFactor=2, maxBackoffNs=None, jitter=0, deadlineNs=None, retryOn=(OSError,), retryWrites=False):
+		if attempts < 1:
+			raise ValueError("A retry policy needs at least 1 attempt")
+
+		self.attempts = attempts
+		self.backoffNs = backoffNs
+		self.backoffFactor = backoffFactor
+		self.maxBackoffNs = maxBackoffNs
+		self.jitter = jitter
+		self.deadlineNs = deadlineNs
+		self.retryOn = tuple(retryOn)
+		self.retryWrites = retryWrites
+
+	def delayNs(self, retry):
+		"""
+			Returns the wait before a retry.
+
+			:param retry: The retry number, starting at 1
+
+			:return: The wait, in nanoseconds
+			:rtype: int
+
+		"""
+		delay = self.backoffNs * self.backoffFactor ** (retry - 1)
+		if self.maxBackoffNs is not None and delay > self.maxBackoffNs:
+			delay = self.maxBackoffNs
+
+		if self.jitter:
+			delay -= delay * self.jitter * _random_bits(16) / 65536
+
+		return int(delay)
+
+	def delay_ns(self, retry):
+		return self.delayNs(retry)
+
+	# Retries an operation that failed with error, raising the last error if it
+	# can't be retried or every attempt fails
+	def _retry(self, error, isWrite, func, args, argk):
+		if not isinstance(error, self.retryOn) or (isWrite and not self.retryWrites):
+			raise error
+
+		deadline = None
+		if self.deadlineNs is not None:
+			deadline = _monotonic_ns() + self.deadlineNs
+
+		for retry in range(1, self.attempts):
+			delay = self.delayNs(retry)
+			if deadline is not None and _monotonic_ns() + delay > deadline:
+				break
+
+			_retryCount.value += 1
+			_sleep_ns(delay)
+
+			try:
+				return func(*args, **argk)
+			except Exception as retryError:
+				if not isinstance(retryError, self.retryOn):
+					raise
+				error = retryError
+
+		raise error
+
+# Used by drivers without a policy of their own - 3 attempts, no waiting, and
+# no retried writes
+_kDefaultRetryPolicy = RetryPolicy()
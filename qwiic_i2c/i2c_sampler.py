@@ -0,0 +1,216 @@
+#-----------------------------------------------------------------------------
+# i2c_sampler.py
+#
+# Periodic sampler - reads a block of registers from a device at a fixed 
+# rate and yields the samples in chunks, as NumPy arrays.
+#
+# Samples are taken on an absolute deadline schedule (start + n * period), so
+# timing errors don't accumulate. Missed deadlines are counted as overruns and
+# skipped, and the lateness of each sample is kept so the jitter distribution
+# can be reported.
+#
+# Requires NumPy.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+i2c_sampler
+===========
+Reads a block of registers from a device at a fixed rate, yielding the decoded
+samples in fixed size NumPy arrays. Created with I2CDriver.sampler().
+
+"""
+
+import time
+import numpy
+
+from .i2c_clock import _monotonic_ns
+
+#-----------------------------------------------------------------------------
+# I2CSampler
+#
+class I2CSampler(object):
+	"""
+	I2CSampler
+
+		Reads a block of registers from a device at a fixed rate, and yields the 
+		samples in chunks of chunkSize, decoded as NumPy arrays.
+
+		:param driver: The I2C driver used to read the device
+		:param address: The I2C address of the device to read from
+		:param register: The register to read from, or `None` for no register
+		:param dtype: The NumPy dtype of a sample - the number of bytes read per 
+			sample is its size. e.g. '>3h' for three big endian int16 values.
+		:param rate: The sample rate in Hz
+		:param chunkSize: The number of samples in each chunk
+		:param spinNs: How long (in nanoseconds) before each deadline to stop 
+			sleeping and busy wait, for better accuracy.
+		:param jitterHistory: The number of samples kept for the jitter statistics
+
+		:example:
+
+		>>> sampler = i2cDriver.sampler(0x6B, 0x28, '<3h', rate = 1000, chunkSize = 250)
+		>>> for chunk in sampler.chunks(4):
+		...     print(chunk.mean(axis = 0))
+		>>> print(sampler.overruns, sampler.jitterStats())
+	"""
+
+	def __init__(self, driver, address, register, dtype, rate, chunkSize=100, spinNs=100000, jitterHistory=4096):
+		if rate <= 0:
+			raise ValueError("Sample rate must be greater than 0")
+
+		self._driver = driver
+		self._address = address
+		self._register = register
+		self._dtype = numpy.dtype(dtype)
+		self._periodNs = int(1000000000 / rate)
+		self._chunkSize = chunkSize
+		self._spinNs = spinNs
+
+		# The chunk buffer and a view for each sample, made once so sampling 
+		# doesn't allocate
+		sampleSize = self._dtype.itemsize
+		self._buffer = bytearray(chunkSize * sampleSize)
+		bufferView = memoryview(self._buffer)
+		self._sampleViews = [bufferView[i * sampleSize:(i + 1) * sampleSize] for i in range(chunkSize)]
+
+		#: When each sample in the latest chunk was taken (monotonic, nanoseconds)
+		self.timestamps = numpy.zeros(chunkSize, dtype=numpy.int64)
+
+		#: The number of sample deadlines that were missed and skipped
+		self.overruns = 0
+
+		#: The number of samples taken
+		self.samples = 0
+
+		# Ring of the lateness of recent samples
+		self._jitter = numpy.zeros(jitterHistory, dtype=numpy.int64)
+		self._jitterCount = 0
+
+	def __iter__(self):
+		return self.chunks()
+
+	# Sleeps until close to the deadline, then busy waits for the rest
+	def _wait_until(self, deadline):
+		remaining = deadline - _monotonic_ns()
+		if remaining > self._spinNs:
+			time.sleep((remaining - self._spinNs) / 1000000000)
+
+		while _monotonic_ns() < deadline:
+			pass
+
+	def chunks(self, nChunks=None, copy=True):
+		"""
+			Samples the device, yielding a chunk of samples at a time.
+
+			:param nChunks: The number of chunks to take, or `None` to sample until 
+				the caller stops iterating
+			:param copy: If True each chunk is a new array. If False the chunk is a
+				view of the sample buffer, only valid until the next chunk is taken.
+
+			:return: A generator of NumPy arrays of chunkSize samples
+			:rtype: generator
+
+		"""
+		periodNs = self._periodNs
+		sampleViews = self._sampleViews
+		timestamps = self.timestamps
+		jitter = self._jitter
+		jitterHistory = len(jitter)
+		readBlockInto = self._driver.readBlockInto
+		address = self._address
+		register = self._register
+
+		nTaken = 0
+		deadline = _monotonic_ns()
+
+		while nChunks is None or nTaken < nChunks:
+			for i in range(self._chunkSize):
+				self._wait_until(deadline)
+
+				now = _monotonic_ns()
+				lateness = now - deadline
+
+				# Skip any deadlines we've missed completely, staying on the schedule
+				if lateness >= periodNs:
+					missed = lateness // periodNs
+					self.overruns += missed
+					deadline += missed * periodNs
+					lateness -= missed * periodNs
+
+				readBlockInto(address, register, sampleViews[i])
+
+				timestamps[i] = now
+				jitter[self._jitterCount % jitterHistory] = lateness
+				self._jitterCount += 1
+
+				deadline += periodNs
+
+			self.samples += self._chunkSize
+			nTaken += 1
+
+			chunk = numpy.frombuffer(self._buffer, dtype=self._dtype)
+			yield chunk.copy() if copy else chunk
+
+	def jitterStats(self):
+		"""
+			Returns the distribution of how late recent samples were taken, relative 
+			to their deadlines. All times are in nanoseconds.
+
+			:return: A dictionary with the number of samples, the mean, standard 
+				deviation, min and max, and the 50th, 90th, 99th and 99.9th 
+				percentiles of the lateness, along with the number of overruns.
+			:rtype: dict
+
+		"""
+		count = min(self._jitterCount, len(self._jitter))
+		stats = {"count": count, "overruns": self.overruns}
+		if count == 0:
+			return stats
+
+		jitter = self._jitter[:count]
+		p50, p90, p99, p999 = numpy.percentile(jitter, (50, 90, 99, 99.9))
+
+		stats.update({
+			"mean": float(jitter.mean()),
+			"std": float(jitter.std()),
+			"min": int(jitter.min()),
+			"max": int(jitter.max()),
+			"p50": float(p50),
+			"p90": float(p90),
+			"p99": float(p99),
+			"p999": float(p999)
+		})
+		return stats
+
+	def jitter_stats(self):
+		return self.jitterStats()
@@ -0,0 +1,104 @@
+#-----------------------------------------------------------------------------
+# i2c_timestamps.py
+#
+# Opt-in transfer timestamps for the qwiic I2C drivers.
+#
+# When timestamps are enabled on a driver, its bus object is wrapped so each
+# transfer call (an ioctl on Linux, a busio or machine.I2C call on 
+# CircuitPython and MicroPython) writes the monotonic time just before and just
+# after it into a preallocated array. Nothing is allocated per call, and the
+# driver code is unchanged.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+
+"""
+i2c_timestamps
+==============
+Transfer timestamps, written into a preallocated array. Enabled with 
+I2CDriver.enableTimestamps().
+
+"""
+
+from array import array
+
+from .i2c_clock import _monotonic_ns
+
+# The bus methods that transfer data - for smbus2 and the ioctl backend on 
+# Linux, busio on CircuitPython, machine.I2C on MicroPython, and the simulated
+# bus. Anything else (locking, scans, close) isn't timed.
+_kTransferMethods = (
+	"write_quick", "read_byte", "write_byte", "read_byte_data", "write_byte_data", 
+	"read_word_data", "write_word_data", "read_i2c_block_data", "write_i2c_block_data", 
+	"i2c_rdwr", "transfer",
+	"readfrom_into", "writeto", "writeto_then_readfrom",
+	"readfrom", "readfrom_mem", "readfrom_mem_into", "writeto_mem", "writevto",
+	"run"
+)
+
+#-----------------------------------------------------------------------------
+# _TimestampedBus
+#
+# Wraps a bus object. The transfer methods are replaced with wrappers when the
+# bus is wrapped, so calls don't create anything - everything else is 
+# forwarded to the bus.
+#
+class _TimestampedBus(object):
+
+	def __init__(self, bus):
+		self._bus = bus
+
+		#: [issue time, completion time] of the last transfer, in nanoseconds
+		self.stamps = array("q", (0, 0))
+
+		for name in _kTransferMethods:
+			method = getattr(bus, name, None)
+			if method is not None:
+				setattr(self, name, self._wrap(method))
+
+	def __getattr__(self, name):
+		if name == "_bus":
+			raise AttributeError(name)
+
+		return getattr(self._bus, name)
+
+	def _wrap(self, method):
+		stamps = self.stamps
+
+		def timed(*args, **argk):
+			stamps[0] = _monotonic_ns()
+			try:
+				return method(*args, **argk)
+			finally:
+				stamps[1] = _monotonic_ns()
+
+		return timed
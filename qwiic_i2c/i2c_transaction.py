@@ -0,0 +1,205 @@
+#-----------------------------------------------------------------------------
+# i2c_transaction.py
+#
+# Queue of reads and writes that are sent to the I2C bus together.
+#
+# On Linux, a transaction is sent as a single i2c_rdwr ioctl. Other platforms
+# run the queued messages one after the other while holding the bus lock.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+i2c_transaction
+===============
+A queue of reads and writes, to one or more devices, that are sent to the I2C
+bus together. Transactions are created with I2CDriver.transaction().
+
+"""
+
+# Message flags. These match the Linux i2c_msg flags, so the Linux driver can
+# pass them straight through.
+_kFlagRead = 0x0001
+
+# Ends the transaction's combined transfer with a stop condition after the
+# message, for devices (like I2C muxes) that only act on a stop. Only honored
+# by drivers that have _stopFlag set. Messages with it are taken to be mux 
+# channel selects, which are safe to repeat when retrying.
+_kFlagStop = 0x8000
+
+#-----------------------------------------------------------------------------
+# Internal function to make sure data to be written supports the buffer
+# protocol. Lists of ints are converted once, when they're queued.
+def _as_write_buffer(writeBytes):
+	if isinstance(writeBytes, (bytes, bytearray, memoryview)):
+		return writeBytes
+
+	return bytes(writeBytes)
+
+#-----------------------------------------------------------------------------
+# Internal function to get a flat, unsigned byte view of a buffer (like a 
+# NumPy array), so it can be sliced by byte. MicroPython's memoryview can't be
+# cast, and is used as it is.
+def _byte_view(buffer):
+	view = memoryview(buffer)
+	try:
+		if view.format != "B" or view.ndim != 1:
+			view = view.cast("B")
+	except AttributeError:
+		pass
+
+	return view
+
+#-----------------------------------------------------------------------------
+# I2CTransaction
+#
+# Each queued message is stored as a segment - an (address, flags, buffer)
+# tuple. Drivers implement _run_transaction() to send a list of segments.
+#
+class I2CTransaction(object):
+	"""
+	I2CTransaction
+
+		A queue of reads and writes that are sent to the I2C bus together.
+
+		On Linux the queued messages are sent as a single i2c_rdwr call. On
+		CircuitPython and MicroPython they are sent one after the other under
+		a single bus lock.
+
+		The read buffers are allocated when a read is queued, and are reused
+		each time the transaction is run.
+
+		:param driver: The I2C driver used to run the transaction
+
+		:example:
+
+		>>> import qwiic_i2c
+		>>> i2c = qwiic_i2c.getI2CDriver()
+		>>> txn = i2c.transaction()
+		>>> txn.writeRead(0x6B, [0x28], 6).writeRead(0x1E, [0x68], 6)
+		>>> accel, mag = txn.run()
+	"""
+
+	def __init__(self, driver):
+		self._driver = driver
+		self._segments = []
+
+	def __len__(self):
+		return len(self._segments)
+
+	def write(self, address, writeBytes):
+		"""
+			Queues a write of a block of bytes to a device.
+
+			:param address: The I2C address of the device to write to
+			:param writeBytes: The bytes to write - a list of ints, or any
+				bytes-like object
+
+			:return: This transaction, so calls can be chained
+			:rtype: I2CTransaction
+
+		"""
+		self._segments.append((address, 0, _as_write_buffer(writeBytes)))
+		return self
+
+	def read(self, address, nBytes):
+		"""
+			Queues a read of a block of bytes from a device.
+
+			:param address: The I2C address of the device to read from
+			:param nBytes: The number of bytes to read from the device
+
+			:return: This transaction, so calls can be chained
+			:rtype: I2CTransaction
+
+		"""
+		self._segments.append((address, _kFlagRead, bytearray(nBytes)))
+		return self
+
+	def readInto(self, address, buf):
+		"""
+			Queues a read of a block of bytes from a device into a caller owned 
+			buffer.
+
+			:param address: The I2C address of the device to read from
+			:param buf: A writable buffer (bytearray, memoryview, ...) to read into. 
+				The length of the buffer is the number of bytes read.
+
+			:return: This transaction, so calls can be chained
+			:rtype: I2CTransaction
+
+		"""
+		self._segments.append((address, _kFlagRead, buf))
+		return self
+
+	def read_into(self, address, buf):
+		return self.readInto(address, buf)
+
+	def writeRead(self, address, writeBytes, readNBytes):
+		"""
+			Queues a write of a block of bytes to a device, followed by a read
+			of a block of bytes with no stop bit in between.
+
+			:param address: The I2C address of the device
+			:param writeBytes: The bytes to write - a list of ints, or any
+				bytes-like object
+			:param readNBytes: The number of bytes to read from the device
+
+			:return: This transaction, so calls can be chained
+			:rtype: I2CTransaction
+
+		"""
+		return self.write(address, writeBytes).read(address, readNBytes)
+
+	def write_read(self, address, writeBytes, readNBytes):
+		return self.writeRead(address, writeBytes, readNBytes)
+
+	def clear(self):
+		"""
+			Removes all the queued messages from the transaction.
+
+			:return: None
+
+		"""
+		self._segments = []
+
+	def run(self):
+		"""
+			Sends all the queued messages to the I2C bus.
+
+			:return: The buffers for each queued read, in the order they were queued.
+			:rtype: list of bytearray (or the buffers passed to readInto())
+
+		"""
+		if len(self._segments) > 0:
+			self._driver._run_transaction(self._segments)
+
+		return [buffer for (address, flags, buffer) in self._segments if flags & _kFlagRead]
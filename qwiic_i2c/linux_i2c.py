@@ -37,13 +37,61 @@
 #==================================================================================
 
 from .i2c_driver import I2CDriver
+from .i2c_transaction import _kFlagRead, _as_write_buffer, _byte_view
+from .i2c_retry import _is_write_transaction
 
 import sys
+import os
+import ctypes
+import time
+import threading
+
+# smbus2 is resolved once, when this module is loaded (which only happens on 
+# Linux - see qwiic_i2c/__init__.py), so the operations never look it up
+try:
+	import smbus2 as _smbus2
+	from smbus2 import i2c_msg as _i2c_msg
+except Exception:
+	_smbus2 = None
+	_i2c_msg = None
 
 
 _PLATFORM_NAME = "Linux"
 
-_retry_count = 3
+# The kernel limits the number of messages in a single i2c_rdwr call, and the
+# length of each message
+_kMaxRdwrMessages = 42
+_kMaxMessageBytes = 8192
+
+# The most data an SMBus block command can carry
+_kSmbusBlockMax = 32
+
+# Transaction shapes kept per driver for the smbus2 backend. When full, 
+# they're dropped and built again as they're used
+_kMaxRdwrShapes = 64
+
+# Adapter functionality flag (from linux/i2c.h) - set if the adapter can send
+# plain I2C messages with i2c_rdwr, not just SMBus commands
+_kI2CFuncI2C = 0x00000001
+
+# Set if the adapter honors the i2c_msg flags that change the protocol - like
+# I2C_M_STOP (_kFlagStop), which sends a stop condition after a message
+_kI2CFuncProtocolMangling = 0x00000004
+
+# Bus backends. smbus2 is the default when it's installed; "ioctl" calls the
+# i2c-dev ioctls directly - see linux_ioctl.py
+_kBackendSmbus2 = "smbus2"
+_kBackendIoctl = "ioctl"
+
+_kBackends = (_kBackendSmbus2, _kBackendIoctl)
+
+# Single byte write buffers for each command/register code, so sending a 
+# command doesn't need a new buffer each time
+_kCommandBytes = [bytes((commandCode,)) for commandCode in range(256)]
+
+# Block write data types the bus calls take as they are - other buffers are 
+# sent through a byte view
+_kSequenceTypes = (bytes, bytearray, list, tuple)
 
 # Supported Boards Mappings from Device Base Model Name (Or name fragment) to bus id.
 _kSupportedBoards = {
@@ -53,20 +101,45 @@ _kSupportedBoards = {
 
 _kDefaultBoard = "Raspberry Pi"
 
+# Methods used to probe for a device on the bus. Quick writes are the least
+# intrusive, but some adapters (and some devices) don't support them, so a
+# single byte read can be used instead.
+_kProbeWriteQuick = "write_quick"
+_kProbeReadByte = "read_byte"
+
+_kProbeMethods = (_kProbeWriteQuick, _kProbeReadByte)
+
+# Boards that need something other than the default probe method
+_kBoardProbeMethods = {
+	"Jetson Orin Nano": _kProbeReadByte
+}
+
+_kDefaultProbeMethod = _kProbeWriteQuick
+
+# The board and its default bus don't change while we're running, so they're
+# only looked up once
+_board_name = None
+_default_bus_id = None
+
 #-----------------------------------------------------------------------------
 # Internal function to identify the linux board we are running on. Returns empty string on error
 def _get_board_name():
-	try:
-		with open('/proc/device-tree/model') as f:
-			return f.read()
-	except:
-		#TODO: We could also have this raise/error out here if we'd prefer
-		return ""
+	global _board_name
+	if _board_name is None:
+		try:
+			with open('/proc/device-tree/model') as f:
+				_board_name = f.read()
+		except:
+			#TODO: We could also have this raise/error out here if we'd prefer
+			_board_name = ""
+
+	return _board_name
 
 #-----------------------------------------------------------------------------
 # Internal function to identify the i2c Bus ID based on platform
-def _get_i2c_bus_id():
-	foundBoardName = _get_board_name()
+def _get_i2c_bus_id(foundBoardName=None):
+	if foundBoardName is None:
+		foundBoardName = _get_board_name()
 
 	for board in _kSupportedBoards.keys():
 		if board in foundBoardName:
@@ -76,19 +149,61 @@ def _get_i2c_bus_id():
 	print(f"Unable to automatically detect Linux board in i2c driver. Assuming {_kDefaultBoard}...")
 	return _kSupportedBoards[_kDefaultBoard]
 
+#-----------------------------------------------------------------------------
+# Internal function to get the default i2c Bus ID for this board
+def _get_default_i2c_bus_id():
+	global _default_bus_id
+	if _default_bus_id is None:
+		_default_bus_id = _get_i2c_bus_id()
+
+	return _default_bus_id
+
+#-----------------------------------------------------------------------------
+# Internal function to identify the probe method to use based on platform
+def _get_probe_method(foundBoardName=None):
+	if foundBoardName is None:
+		foundBoardName = _get_board_name()
+
+	for board in _kBoardProbeMethods.keys():
+		if board in foundBoardName:
+			return _kBoardProbeMethods[board]
+
+	return _kDefaultProbeMethod
+
+#-----------------------------------------------------------------------------
+# Internal function to list the ids of all the i2c adapters (/dev/i2c-N) on 
+# the system. Returns an empty list on error
+def _get_i2c_bus_ids():
+	busIds = []
+	try:
+		deviceNames = os.listdir("/dev")
+	except OSError:
+		return busIds
+
+	for deviceName in deviceNames:
+		if deviceName.startswith("i2c-") and deviceName[4:].isdigit():
+			busIds.append(int(deviceName[4:]))
+
+	return sorted(busIds)
+
 #-----------------------------------------------------------------------------
 # Internal function to connect to the systems I2C bus.
 #
 # Attempts to fail elegantly - often an issue with permissions with the I2C 
 # bus. Users of this system should be added to the system i2c group
 #
-def _connectToI2CBus(iBus=1, *args, **argk):
+def _connectToI2CBus(iBus=1, *args, backend=None, **argk):
 
-	try:
-		import smbus2
-	except Exception as ee:
+	backend = _resolve_backend(backend)
+
+	if backend == _kBackendIoctl:
+		from .linux_ioctl import IoctlBus
+		busClass = IoctlBus
+	elif _smbus2 is None:
 		print("Error: Unable to load smbus module. Unable to continue", file=sys.stderr)
 		return None
+	else:
+		busClass = _smbus2.SMBus
 
 	daBus = None
 
@@ -97,7 +212,7 @@ def _connectToI2CBus(iBus=1, *args, **argk):
 	# Connect - catch errors 
 
 	try:
-		daBus =  smbus2.SMBus(iBus)
+		daBus =  busClass(iBus)
 	except Exception as ee:
 		if(type(ee) is IOError and ee.errno == 13):
 			print("Error:\tUnable to connect to I2C bus %d: Permission denied.\n\tVerify you have permissoin to access the I2C bus" % (iBus), file=sys.stderr)
@@ -116,6 +231,63 @@ def _connectToI2CBus(iBus=1, *args, **argk):
 def _connect_to_i2c_bus(*args, **argk):
 	return _connectToI2CBus(*args, **argk)
 
+#-----------------------------------------------------------------------------
+# Internal function to resolve the bus backend to use - smbus2 if it's 
+# installed, unless one is asked for
+def _resolve_backend(backend=None):
+	if backend is None:
+		return _kBackendSmbus2 if _smbus2 is not None else _kBackendIoctl
+
+	if backend not in _kBackends:
+		raise ValueError("Unsupported Linux I2C backend: %s" % (backend))
+
+	return backend
+
+#-----------------------------------------------------------------------------
+# The smbus2 messages for one transaction shape - a tuple of (address, flags,
+# length) - each with a buffer of its own. Built once per shape, so 
+# transactions don't build ctypes objects on every call. Like the ioctl 
+# backend's shapes, write data is copied into the message buffers before the
+# transfer, and read data is copied out after it.
+#
+class _RdwrMsgs(object):
+
+	def __init__(self, shape):
+		self.buffers = []
+		self.views = []
+		self.writes = []
+		self.reads = []
+
+		msgs = []
+		for i, (address, flags, nBytes) in enumerate(shape):
+			buffer = ctypes.create_string_buffer(nBytes or 1)
+			msgs.append(_i2c_msg(addr=address, flags=flags, len=nBytes, buf=buffer))
+
+			self.buffers.append(buffer)
+			self.views.append(memoryview(buffer).cast("B")[:nBytes])
+
+			if flags & _kFlagRead:
+				self.reads.append(i)
+			else:
+				self.writes.append(i)
+
+		self.msgs = tuple(msgs)
+
+#-----------------------------------------------------------------------------
+# Internal function to build the segments of a block read into buf - the
+# command code (if any), then reads of up to _kMaxMessageBytes. Longer reads 
+# are split into several read messages in the same i2c_rdwr call, and the 
+# device continues from where the last one ended. 
+#
+def _read_segments(address, commandCode, buf):
+	segments = [] if commandCode is None else [(address, 0, _kCommandBytes[commandCode])]
+
+	view = memoryview(buf).cast("B")
+	for offset in range(0, view.nbytes, _kMaxMessageBytes):
+		segments.append((address, _kFlagRead, view[offset:offset + _kMaxMessageBytes]))
+
+	return segments
+
 # notes on determining Linux platform
 #
 # - sys.platform == 'linux' or 'linux2', os.uname ->> res.sysname or res[0]=='Linux'
@@ -126,23 +298,55 @@ def _connect_to_i2c_bus(*args, **argk):
 # 	- Need to start looking at particular hardware classes in /proc/cpuinfo
 # 
 class LinuxI2C(I2CDriver):
-	global _i2c_msg
 
 	# Constructor
 	name = _PLATFORM_NAME
 
 	_i2cbus = None
-	_i2c_msg = None
 
-	def __init__(self, iBus=1, *args, **argk):
+	_maxSegments = _kMaxRdwrMessages
+	_maxMessageBytes = _kMaxMessageBytes
+
+	def __init__(self, iBus=None, *args, probeMethod=None, processLock=False, backend=None, **argk):
 
 		# Call the super class. The super calss will use default values if not 
 		# proviced
 		I2CDriver.__init__(self)
 
-		self._iBus = _get_i2c_bus_id()
+		# Identify the board once - reading /proc on every call is expensive
+		self._boardName = _get_board_name()
+
+		# If no bus is provided, use the default bus for this board
+		self._iBus = iBus if iBus is not None else _get_default_i2c_bus_id()
+		self._busKey = self._iBus
+
+		# The bus backend - smbus2, or direct ioctl calls
+		self._backend = _resolve_backend(backend)
+		self._ioctl = self._backend == _kBackendIoctl
+
+		self._i2cbus = _connectToI2CBus(self._iBus, backend=self._backend)
+
+		# smbus2 messages for each transaction shape - see _rdwr()
+		self._rdwrShapes = {}
+		self._rdwrLock = threading.Lock()
 
-		self._i2cbus = _connectToI2CBus(self._iBus)
+		# Can the adapter send plain I2C messages? If not, we're limited to SMBus
+		# commands
+		funcs = getattr(self._i2cbus, "funcs", 0)
+		self._plainI2C = (funcs & _kI2CFuncI2C) != 0
+
+		# Can a transaction send a stop condition part way through?
+		self._stopFlag = self._plainI2C and (funcs & _kI2CFuncProtocolMangling) != 0
+
+		# Resolve how devices are probed. Per address overrides are for devices
+		# that don't respond well to the default method
+		self._probeOverrides = {}
+		if probeMethod is None:
+			probeMethod = _get_probe_method(self._boardName)
+		self.setProbeMethod(probeMethod)
+
+		if processLock:
+			self.enableProcessLock()
 
 	# Okay, are we running on a Linux system?
 	@classmethod
@@ -154,113 +358,121 @@ class LinuxI2C(I2CDriver):
 	def is_platform(cls):
 		return cls.isPlatform()
 
-#-------------------------------------------------------------------------		
-	# General get attribute method
-	#
-	# Used to intercept getting the I2C bus object - so we can perform a lazy
-	# connect ....
-	#
-	def __getattr__(self, name):
-
-		if(name == "i2cbus"):
-			return self._i2cbus
-
-		else:
-			# Note - we call __getattribute__ to the super class (object).
-			return super(I2CDriver, self).__getattribute__(name)
-
-	#-------------------------------------------------------------------------
-	# General set attribute method
-	#
-	# Basically implemented to make the i2cbus attribute readonly to users 
-	# of this class. 
-	#
-	def __setattr__(self, name, value):
+	# Drivers are pooled by bus id, backend and settings - see getI2CDriver().
+	# Callers asking for a different probe method or process lock get a driver
+	# of their own, rather than one set up for someone else
+	@classmethod
+	def _pool_key(cls, iBus=None, *args, probeMethod=None, processLock=False, backend=None, **argk):
+		return (iBus if iBus is not None else _get_default_i2c_bus_id(), _resolve_backend(backend), probeMethod, bool(processLock))
 
-		if(name != "i2cbus"):
-			super(I2CDriver, self).__setattr__(name, value)
+	def close(self):
+		if self._i2cbus is not None:
+			self._i2cbus.close()
+			self._i2cbus = None
 
 #-------------------------------------------------------------------------	
 	# read Data Command
 
 	# Performs a general read of <nBytes> from the device at <address> without a command/register code
 	def _read_no_command(self, address, nBytes):
-		from smbus2 import i2c_msg
+		if self._ioctl or nBytes > _kMaxMessageBytes:
+			buffer = bytearray(nBytes)
+			self._send_segments(_read_segments(address, None, buffer))
+			return list(buffer)
 
-		full_read_msg = i2c_msg.read(address, nBytes)
+		full_read_msg = _i2c_msg.read(address, nBytes)
 		self._i2cbus.i2c_rdwr(full_read_msg)
 
 		return list(full_read_msg)
 
-	def readWord(self, address, commandCode):
-
-		data = 0
+	# Reads are retried, as allowed by the retry policy - see setRetryPolicy().
+	# The first attempt is made directly, so the retry policy costs nothing 
+	# until something fails.
 
-		# add some error handling and recovery....
-		for i in range(_retry_count):
-			try:
-				if commandCode == None:
-					data = self._read_no_command(address, 2) # TODO: Check this, we may need to switch endianess
-				else:
-					data = self._i2cbus.read_word_data(address, commandCode)
-			
-				break # break if try succeeds
-
-			except IOError as ioErr:
-				# we had an error - let's try again
-				if i == _retry_count-1:
-					raise ioErr
-				pass
+	def readWord(self, address, commandCode):
+		if commandCode == None:
+			func, args = self._read_no_command, (address, 2) # TODO: Check this, we may need to switch endianess
+		else:
+			func, args = self._i2cbus.read_word_data, (address, commandCode)
 
-		return data
+		try:
+			return func(*args)
+		except Exception as error:
+			return self._retry_failed(error, address, False, func, *args)
 
 	def read_word(self, address, commandCode):
 		return self.readWord(address, commandCode)
 
 	def readByte(self, address, commandCode = None):
-		data = 0
-		for i in range(_retry_count):
-			try:
-				if commandCode == None:
-					data = self._i2cbus.read_byte(address)
-				elif commandCode != None:
-					data = self._i2cbus.read_byte_data(address, commandCode)
-			
-				break # break if try succeeds
-
-			except IOError as ioErr:
-				# we had an error - let's try again
-				if i == _retry_count-1:
-					raise ioErr
-				pass
+		if commandCode == None:
+			func, args = self._i2cbus.read_byte, (address,)
+		else:
+			func, args = self._i2cbus.read_byte_data, (address, commandCode)
 
-		return data
+		try:
+			return func(*args)
+		except Exception as error:
+			return self._retry_failed(error, address, False, func, *args)
 
 	def read_byte(self, address, commandCode = None):
 		return self.readByte(address, commandCode)
 
+	# Blocks longer than an SMBus block command can carry are read in one 
+	# i2c_rdwr call when the adapter can send plain I2C messages, or in SMBus
+	# block sized chunks otherwise - see readBlockInto()
 	def readBlock(self, address, commandCode, nBytes):
-		data = 0
-		for i in range(_retry_count):
-			try:
-				if commandCode == None:
-					data = self._read_no_command(address, nBytes)
-				else:
-					data = self._i2cbus.read_i2c_block_data(address, commandCode, nBytes)
-			
-				break # break if try succeeds
-
-			except IOError as ioErr:
-				# we had an error - let's try again
-				if i == _retry_count-1:
-					raise ioErr
-				pass
+		if commandCode == None:
+			func, args = self._read_no_command, (address, nBytes)
+		elif nBytes <= _kSmbusBlockMax:
+			func, args = self._i2cbus.read_i2c_block_data, (address, commandCode, nBytes)
+		else:
+			buffer = bytearray(nBytes)
+			self.readBlockInto(address, commandCode, buffer)
+			return list(buffer)
 
-		return data
+		try:
+			return func(*args)
+		except Exception as error:
+			return self._retry_failed(error, address, False, func, *args)
 
 	def read_block(self, address, commandCode, nBytes):
 		return self.readBlock(address, commandCode, nBytes)
 
+	def readBlockInto(self, address, commandCode, buf):
+		if not self._plainI2C:
+			self._read_block_chunks(address, commandCode, buf)
+		elif len(buf) > _kMaxMessageBytes:
+			self._run_transaction(_read_segments(address, commandCode, buf))
+		elif commandCode == None:
+			self._run_transaction(((address, _kFlagRead, buf),))
+		elif not self._ioctl and len(buf) <= _kSmbusBlockMax:
+			self._read_smbus_block_into(address, commandCode, buf)
+		else:
+			self._run_transaction(((address, 0, _kCommandBytes[commandCode]), (address, _kFlagRead, buf)))
+
+	def read_block_into(self, address, commandCode, buf):
+		return self.readBlockInto(address, commandCode, buf)
+
+	# Reads a block with SMBus commands, for adapters that can't send plain I2C
+	# messages. Each chunk starts at the next register, so the device's 
+	# register address must auto-increment (an 8 bit register wraps around). 
+	# SMBus has no block read without a command code, so only a single byte 
+	# can be read without one.
+	def _read_block_chunks(self, address, commandCode, buf):
+		view = _byte_view(buf)
+		nBytes = view.nbytes
+
+		if commandCode == None:
+			if nBytes > 1:
+				raise ValueError("Reads without a command code are limited to 1 byte on adapters that only support SMBus")
+			if nBytes:
+				view[0] = self.readByte(address)
+			return
+
+		for offset in range(0, nBytes, _kSmbusBlockMax):
+			chunk = min(_kSmbusBlockMax, nBytes - offset)
+			view[offset:offset + chunk] = bytes(self.readBlock(address, (commandCode + offset) & 0xFF, chunk))
+
 	#--------------------------------------------------------------------------	
 	# write Data Commands 
 	#
@@ -268,34 +480,79 @@ class LinuxI2C(I2CDriver):
 	#
 	# value = 16 bits of valid data..
 	#
+	# Writes are only retried if the retry policy allows it.
+	#
 
 	def writeCommand(self, address, commandCode):
 
-		return self._i2cbus.write_byte(address, commandCode)
+		try:
+			return self._i2cbus.write_byte(address, commandCode)
+		except Exception as error:
+			return self._retry_failed(error, address, True, self._i2cbus.write_byte, address, commandCode)
 
 	def write_command(self, address, commandCode):
 		return self.writeCommand(address, commandCode)
 
 	def writeWord(self, address, commandCode, value):
 
-		return self._i2cbus.write_word_data(address, commandCode, value)
+		try:
+			return self._i2cbus.write_word_data(address, commandCode, value)
+		except Exception as error:
+			return self._retry_failed(error, address, True, self._i2cbus.write_word_data, address, commandCode, value)
 
 	def write_word(self, address, commandCode, value):
 		return self.writeWord(address, commandCode, value)
 
 	def writeByte(self, address, commandCode, value):
 
-		return self._i2cbus.write_byte_data(address, commandCode, value)
+		try:
+			return self._i2cbus.write_byte_data(address, commandCode, value)
+		except Exception as error:
+			return self._retry_failed(error, address, True, self._i2cbus.write_byte_data, address, commandCode, value)
 
 	def write_byte(self, address, commandCode, value):
 		return self.writeByte(address, commandCode, value)
 
-	def writeBlock(self, address, commandCode, value):
+	# Block writes are split into pages by writeBlock() - see setPageSize()
+	def _write_block(self, address, commandCode, value):
+
+		# Blocks that fit an SMBus block command are sent with one - on an 
+		# adapter that can send plain I2C messages, the kernel sends it as the
+		# same single write. Longer blocks are sent as a single message when 
+		# the adapter supports it, with the data copied straight into a reused
+		# message buffer, whatever type it is. Blocks longer than a message 
+		# (or an SMBus block command) can carry are sent in chunks, each 
+		# starting at the next register - an 8 bit register wraps around, as 
+		# it does on the device.
+		#
+		# Other buffers (like NumPy arrays) are sent byte by byte, whatever 
+		# their element type.
+		if not isinstance(value, _kSequenceTypes):
+			value = _byte_view(value)
+
+		nBytes = len(value)
+		if nBytes <= _kSmbusBlockMax:
+			try:
+				return self._i2cbus.write_i2c_block_data(address, commandCode, value)
+			except Exception as error:
+				return self._retry_failed(error, address, True, self._i2cbus.write_i2c_block_data, address, commandCode, value)
 
-		# if value is a bytearray - convert to list of ints (it's what 
-		# required by this call)
-		tmpVal = list(value) if type(value) == bytearray else value
-		self._i2cbus.write_i2c_block_data(address, commandCode, tmpVal)
+		chunkMax = _kMaxMessageBytes - 1 if self._plainI2C else _kSmbusBlockMax
+
+		if nBytes > chunkMax:
+			for offset in range(0, nBytes, chunkMax):
+				self._write_block(address, (commandCode + offset) & 0xFF, value[offset:offset + chunkMax])
+			return
+
+		if self._ioctl:
+			func, args = self._i2cbus.transfer, (((address, 0, _kCommandBytes[commandCode] + _as_write_buffer(value)),),)
+		else:
+			func, args = self._rdwr_command_write, (address, commandCode, value)
+
+		try:
+			func(*args)
+		except Exception as error:
+			self._retry_failed(error, address, True, func, *args)
 
 	def write_block(self, address, commandCode, value):
 		return self.writeBlock(address, commandCode, value)
@@ -306,22 +563,238 @@ class LinuxI2C(I2CDriver):
 	def write_read_block(self, address, writeBytes, readNBytes):
 		return self.writeReadBlock(address, writeBytes, readNBytes)
 
-	def isDeviceConnected(self, devAddress):
-		isConnected = False
+	def writeReadInto(self, address, writeBytes, buf):
+		if not self._ioctl and len(writeBytes) == 1 and len(buf) <= _kSmbusBlockMax:
+			self._read_smbus_block_into(address, writeBytes[0], buf)
+		else:
+			self._run_transaction(((address, 0, _as_write_buffer(writeBytes)), (address, _kFlagRead, buf)))
+
+	# Reads up to an SMBus block from a register into a caller buffer, with the
+	# smbus2 backend. On adapters that can send plain I2C messages the kernel
+	# sends it as the same write and read as i2c_rdwr would, and it's the 
+	# quickest smbus2 call for short reads
+	def _read_smbus_block_into(self, address, commandCode, buf):
+		try:
+			data = self._i2cbus.read_i2c_block_data(address, commandCode, len(buf))
+		except Exception as error:
+			data = self._retry_failed(error, address, False, self._i2cbus.read_i2c_block_data, address, commandCode, len(buf))
+
+		if type(buf) is bytearray:
+			buf[:] = data
+		else:
+			_byte_view(buf)[:] = bytes(data)
+
+	def write_read_into(self, address, writeBytes, buf):
+		return self.writeReadInto(address, writeBytes, buf)
+
+	#-----------------------------------------------------------------------
+	# Fast path - see enableFastPath()
+	#
+	# The SMBus commands have the same arguments as the driver operations, so
+	# they're bound directly. Reads that take a `None` command code go through
+	# one small function. Block writes that are sent with i2c_rdwr, and the 
+	# buffer based operations, are left as they are.
+	#
+	def _fast_path_methods(self):
+		bus = self._i2cbus
+		if bus is None:
+			return {}
+
+		read_byte = bus.read_byte
+		read_byte_data = bus.read_byte_data
+		read_word_data = bus.read_word_data
+		read_i2c_block_data = bus.read_i2c_block_data
+		read_no_command = self._read_no_command
+
+		def readByte(address, commandCode = None):
+			if commandCode is None:
+				return read_byte(address)
+			return read_byte_data(address, commandCode)
+
+		def readWord(address, commandCode):
+			if commandCode is None:
+				return read_no_command(address, 2)
+			return read_word_data(address, commandCode)
+
+		def readBlock(address, commandCode, nBytes):
+			if commandCode is None:
+				return read_no_command(address, nBytes)
+			return read_i2c_block_data(address, commandCode, nBytes)
+
+		methods = {
+			"readByte": readByte, "read_byte": readByte,
+			"readWord": readWord, "read_word": readWord,
+			"readBlock": readBlock, "read_block": readBlock,
+			"writeCommand": bus.write_byte, "write_command": bus.write_byte,
+			"writeByte": bus.write_byte_data, "write_byte": bus.write_byte_data,
+			"writeWord": bus.write_word_data, "write_word": bus.write_word_data
+		}
+
+		if not self._plainI2C:
+			methods["writeBlock"] = methods["write_block"] = bus.write_i2c_block_data
+
+		return methods
+
+	#-----------------------------------------------------------------------
+	# Cross process locking
+	#
+	# The bus lock ("with driver:") can also take an advisory flock() lock on
+	# the bus device, so separate processes sharing the bus can coordinate.
+	#
+	def enableProcessLock(self, enable=True):
+		"""
+			Enables (or disables) the advisory cross process lock on the bus device. 
+			When enabled, "with driver:" also locks /dev/i2c-N, so processes that 
+			do the same wait for each other.
+
+			:param enable: True to enable the lock, False to disable it
+
+			:return: None
+
+		"""
+		if enable:
+			self._get_lock().enableProcessLock("/dev/i2c-%d" % (self._iBus))
+		else:
+			self._get_lock().disableProcessLock()
+
+	def enable_process_lock(self, enable=True):
+		return self.enableProcessLock(enable)
+
+	#-----------------------------------------------------------------------
+	# Transactions
+	#
+	# All the segments are sent in a single i2c_rdwr call. The ioctl backend
+	# takes the segments as they are.
+	#
+	# Sends the segments without retrying - for operations that retry the
+	# whole call themselves
+	def _send_segments(self, segments):
+		if self._ioctl:
+			self._i2cbus.transfer(segments)
+		else:
+			self._rdwr(segments)
+
+	def _run_transaction(self, segments):
+		if len(segments) > _kMaxRdwrMessages:
+			raise ValueError("Transactions are limited to %d messages on Linux" % (_kMaxRdwrMessages))
+
+		func = self._i2cbus.transfer if self._ioctl else self._rdwr
+
+		try:
+			func(segments)
+		except Exception as error:
+			self._retry_failed(error, segments[0][0], _is_write_transaction(segments), func, segments)
+
+	# Sends segments with smbus2's i2c_rdwr, using the messages built for the
+	# transaction's shape
+	def _rdwr(self, segments):
+		views = []
+		shape = []
+		for (address, flags, buffer) in segments:
+			view = _byte_view(buffer)
+			views.append(view)
+			shape.append((address, flags, view.nbytes))
+		shape = tuple(shape)
+
+		with self._rdwrLock:
+			rdwr = self._rdwr_msgs(shape)
+
+			msgViews = rdwr.views
+			for i in rdwr.writes:
+				msgViews[i][:] = views[i]
+
+			self._i2cbus.i2c_rdwr(*rdwr.msgs)
+
+			for i in rdwr.reads:
+				views[i][:] = msgViews[i]
+
+	# Writes a command code followed by a block of data as a single message, 
+	# copying both straight into the message buffer built for its length
+	def _rdwr_command_write(self, address, commandCode, value):
+		view = _byte_view(_as_write_buffer(value))
+
+		with self._rdwrLock:
+			rdwr = self._rdwr_msgs(((address, 0, view.nbytes + 1),))
+
+			msgView = rdwr.views[0]
+			msgView[0] = commandCode
+			msgView[1:] = view
+
+			self._i2cbus.i2c_rdwr(*rdwr.msgs)
+
+	# Returns the smbus2 messages for a transaction shape, building them the 
+	# first time the shape is used. Called holding _rdwrLock
+	def _rdwr_msgs(self, shape):
+		rdwr = self._rdwrShapes.get(shape)
+		if rdwr is None:
+			if len(self._rdwrShapes) >= _kMaxRdwrShapes:
+				self._rdwrShapes.clear()
+			rdwr = _RdwrMsgs(shape)
+			self._rdwrShapes[shape] = rdwr
+
+		return rdwr
+
+	#-----------------------------------------------------------------------
+	# Device probing
+	#
+	# The probe method is resolved when the driver is built, and can be 
+	# overridden for the whole driver or for specific addresses.
+	#
+	def setProbeMethod(self, method, devAddress=None):
+		"""
+			Sets the method used to determine if a device is connected to the bus.
+
+			:param method: Either "write_quick" or "read_byte"
+			:param devAddress: The I2C address to set the method for, or `None` 
+				to set the default for this driver
+
+			:return: None
+
+		"""
+		if method not in _kProbeMethods:
+			raise ValueError("Unsupported probe method: %s" % (method))
+
+		if devAddress is None:
+			self._probeMethod = method
+		else:
+			self._probeOverrides[devAddress] = method
+
+	def set_probe_method(self, method, devAddress=None):
+		return self.setProbeMethod(method, devAddress)
+
+	def getProbeMethod(self, devAddress=None):
+		"""
+			Returns the method used to determine if a device is connected to the bus.
+
+			:param devAddress: The I2C address to get the method for, or `None` 
+				to get the default for this driver
+
+			:return: Either "write_quick" or "read_byte"
+			:rtype: string
+
+		"""
+		return self._probeOverrides.get(devAddress, self._probeMethod)
+
+	def get_probe_method(self, devAddress=None):
+		return self.getProbeMethod(devAddress)
+
+	# Returns True if the provided (resolved) probe call succeeds for the address
+	def _probe(self, probe, devAddress):
 		try:
-			# Try to write nothing to the device
 			# If it throws an I/O error - the device isn't connected
+			probe(devAddress)
+			return True
+		except Exception:
+			return False
 
-			if "Jetson Orin Nano" in _get_board_name():
-				self._i2cbus.read_byte(devAddress)
-			else:
-				self._i2cbus.write_quick(devAddress)
+	def isDeviceConnected(self, devAddress):
+		try:
+			probe = getattr(self._i2cbus, self.getProbeMethod(devAddress))
+		except AttributeError:
+			# No bus connection
+			return False
 
-			isConnected = True
-		except:
-			pass
-		
-		return isConnected
+		return self._probe(probe, devAddress)
 
 	def is_device_connected(self, devAddress):
 		return self.isDeviceConnected(devAddress)
@@ -336,13 +809,93 @@ class LinuxI2C(I2CDriver):
 	#
 	def scan(self):
 		""" Returns a list of addresses for the devices connected to the I2C bus."""
+		return self._scan_bus(self._i2cbus)
+
+	# Sweeps the provided bus connection using this drivers probe methods
+	def _scan_bus(self, i2cbus):
 		foundDevices = []
+
+		# Resolve the default probe once for the whole sweep
+		try:
+			defaultProbe = getattr(i2cbus, self._probeMethod)
+		except AttributeError:
+			# No bus connection
+			return foundDevices
+
+		overrides = self._probeOverrides
+
 		# Loop over the list of legal addresses (0x08 - 0x77)
 		for currAddress in range(0x08, 0x78):
-			if self.ping(currAddress) == True:
+			probe = defaultProbe
+			if currAddress in overrides:
+				probe = getattr(i2cbus, overrides[currAddress])
+
+			if self._probe(probe, currAddress):
 				foundDevices.append(currAddress)
 		return foundDevices
 
+	#-----------------------------------------------------------------------
+	# scanAllBuses()
+	#
+	# Scans every I2C adapter on the system at the same time - one worker
+	# thread per bus - so the total time is close to a single bus sweep.
+	#
+	def scanAllBuses(self, busIds=None, timeout=None):
+		"""
+			Scans all the I2C buses on the system in parallel.
+
+			:param busIds: A list of bus ids to scan, or `None` to scan every 
+				/dev/i2c-N adapter found on the system
+			:param timeout: The time in seconds to wait for each bus to finish, or 
+				`None` to wait indefinitely. 
+
+			:return: A dictionary mapping each bus id to a list of I2C addresses. 
+				Buses that couldn't be opened or didn't finish within the timeout 
+				map to `None`.
+			:rtype: dict
+
+		"""
+		if busIds is None:
+			busIds = _get_i2c_bus_ids()
+
+		# Workers write into their own dictionary, so a bus that finishes after
+		# the timeout can't change the result we return
+		results = {}
+		workers = []
+		for busId in busIds:
+			worker = threading.Thread(target=self._scan_bus_worker, args=(busId, results))
+			# Don't let a stuck adapter hold up interpreter exit
+			worker.daemon = True
+			worker.start()
+			workers.append((busId, worker))
+
+		deadline = None if timeout is None else time.monotonic() + timeout
+
+		foundDevices = {}
+		for busId, worker in workers:
+			if deadline is None:
+				worker.join()
+			else:
+				worker.join(max(0, deadline - time.monotonic()))
+
+			foundDevices[busId] = None if worker.is_alive() else results.get(busId)
+
+		return foundDevices
+
+	def scan_all_buses(self, busIds=None, timeout=None):
+		return self.scanAllBuses(busIds, timeout)
+
+	# Worker used by scanAllBuses() - each bus gets its own connection
+	def _scan_bus_worker(self, busId, results):
+		i2cbus = _connectToI2CBus(busId, backend=self._backend)
+		if i2cbus is None:
+			return
+
+		try:
+			results[busId] = self._scan_bus(i2cbus)
+		finally:
+			i2cbus.close()
+
 	#-----------------------------------------------------------------------
 	# Custom method for reading +8-bit register using `i2c_msg` from `smbus2`
 	#
@@ -356,30 +909,35 @@ class LinuxI2C(I2CDriver):
 		:return: response of read transaction
 		:rtype: list
 		"""
-		global _i2c_msg
-		
-		# Loads i2c_msg if not previously loaded
-		if _i2c_msg == None:
-			from smbus2 import i2c_msg
-			_i2c_msg = i2c_msg
-        
+		if self._ioctl:
+			read = bytearray(read_nbytes)
+			segments = ((address, 0, _as_write_buffer(write_message)), (address, _kFlagRead, read))
+			try:
+				self._i2cbus.transfer(segments)
+			except Exception as error:
+				self._retry_failed(error, address, False, self._i2cbus.transfer, segments)
+			return read
+
 		# Sets up write and read transactions for reading a register
 		write = _i2c_msg.write(address, write_message)
 		read = _i2c_msg.read(address, read_nbytes)
 
 		# Read Register
-		for i in range(_retry_count):
-			try:
-				self._i2cbus.i2c_rdwr(write, read)
-			
-				break # break if try succeeds
-
-			except IOError as ioErr:
-				# we had an error - let's try again
-				if i == _retry_count-1:
-					raise ioErr
-				pass
+		try:
+			self._i2cbus.i2c_rdwr(write, read)
+		except Exception as error:
+			self._retry_failed(error, address, False, self._i2cbus.i2c_rdwr, write, read)
 		
 		# Return read transaction (list)
 		# Note - To retreive values, list the return: list(read)
 		return read
+
+	# writeReadBlock() returns the read bytearray with the ioctl backend, and
+	# the read i2c_msg with smbus2
+	def _write_read_result(self, address, buffer):
+		if self._ioctl:
+			return buffer
+
+		read = _i2c_msg.read(address, len(buffer))
+		ctypes.memmove(read.buf, bytes(buffer), len(buffer))
+		return read
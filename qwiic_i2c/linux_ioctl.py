@@ -0,0 +1,383 @@
+#-----------------------------------------------------------------------------
+# linux_ioctl.py
+#
+# Direct ioctl I2C bus backend for Linux.
+#
+# Talks to /dev/i2c-N with fcntl.ioctl() - I2C_RDWR for plain I2C messages,
+# I2C_SMBUS for SMBus commands and I2C_FUNCS for the adapter functionality -
+# without smbus2. The ioctl argument structures are built once and reused:
+# each SMBus command has its own argument block, and each transaction shape
+# (the address, flags and length of every message) gets a message array and
+# message buffers the first time it's sent.
+#
+# The bus object has the same methods as the smbus2 SMBus calls used by the
+# Linux driver, so LinuxI2C(backend="ioctl") works the same way.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+
+"""
+linux_ioctl
+===========
+A Linux I2C bus backend that calls the i2c-dev ioctls directly. Used by 
+LinuxI2C(backend="ioctl").
+
+:example:
+
+	>>> from qwiic_i2c.linux_i2c import LinuxI2C
+	>>> i2c = LinuxI2C(1, backend="ioctl")
+	>>> i2c.readBlock(0x6B, 0x28, 6)
+
+"""
+
+import os
+import ctypes
+import _thread
+from fcntl import ioctl
+
+from .i2c_transaction import _kFlagRead, _byte_view
+
+# ioctl requests (from linux/i2c-dev.h)
+_kI2CSlave = 0x0703
+_kI2CFuncs = 0x0705
+_kI2CRdwr = 0x0707
+_kI2CSmbus = 0x0720
+
+# SMBus transfer directions and sizes (from linux/i2c.h)
+_kSmbusRead = 1
+_kSmbusWrite = 0
+
+_kSmbusQuick = 0
+_kSmbusByte = 1
+_kSmbusByteData = 2
+_kSmbusWordData = 3
+_kSmbusI2CBlockData = 8
+
+_kSmbusBlockMax = 32
+
+# Transaction shapes kept per bus. When full, the shapes are dropped and built
+# again as they're used
+_kMaxTransferShapes = 64
+
+# Reads of at least this many bytes go straight into the caller's buffer. 
+# Shorter ones are quicker to copy than to point a message at
+_kDirectReadMin = 256
+
+#-----------------------------------------------------------------------------
+# Kernel structures (from linux/i2c.h and linux/i2c-dev.h)
+#
+class _I2CMsg(ctypes.Structure):
+	_fields_ = [
+		("addr", ctypes.c_uint16),
+		("flags", ctypes.c_uint16),
+		("len", ctypes.c_uint16),
+		("buf", ctypes.c_void_p)
+	]
+
+class _I2CRdwrIoctlData(ctypes.Structure):
+	_fields_ = [
+		("msgs", ctypes.c_void_p),
+		("nmsgs", ctypes.c_uint32)
+	]
+
+class _I2CSmbusData(ctypes.Union):
+	_fields_ = [
+		("byte", ctypes.c_uint8),
+		("word", ctypes.c_uint16),
+		("block", ctypes.c_uint8 * (_kSmbusBlockMax + 2))
+	]
+
+class _I2CSmbusIoctlData(ctypes.Structure):
+	_fields_ = [
+		("read_write", ctypes.c_uint8),
+		("command", ctypes.c_uint8),
+		("size", ctypes.c_uint32),
+		("data", ctypes.c_void_p)
+	]
+
+#-----------------------------------------------------------------------------
+# The ioctl argument for one transaction shape - the message array, and a 
+# buffer for each message. Write data is copied into the message buffers 
+# before the ioctl, and read data is copied out of them after it.
+#
+class _RdwrShape(object):
+
+	def __init__(self, shape):
+		self.msgs = (_I2CMsg * len(shape))()
+		self.buffers = []
+		self.addresses = []
+		self.views = []
+		self.writes = []
+		self.reads = []
+
+		for i, (address, flags, nBytes) in enumerate(shape):
+			buffer = ctypes.create_string_buffer(nBytes or 1)
+
+			msg = self.msgs[i]
+			msg.addr = address
+			msg.flags = flags
+			msg.len = nBytes
+			msg.buf = ctypes.addressof(buffer)
+
+			self.buffers.append(buffer)
+			self.addresses.append(msg.buf)
+			self.views.append(memoryview(buffer).cast("B")[:nBytes])
+
+			if flags & _kFlagRead:
+				self.reads.append(i)
+			else:
+				self.writes.append(i)
+
+		self.data = _I2CRdwrIoctlData(ctypes.addressof(self.msgs), len(shape))
+
+#-----------------------------------------------------------------------------
+# IoctlBus
+#
+# The method names and arguments follow smbus2's SMBus, so the Linux driver 
+# can use either one.
+#
+class IoctlBus(object):
+	"""
+	IoctlBus
+
+		An I2C bus connection that uses the Linux i2c-dev ioctls directly.
+
+		Operations on the bus object are serialized, so it can be shared between
+		threads.
+
+		:param bus: The I2C bus id (N in /dev/i2c-N), or the path of the bus 
+			device
+
+		:return: The bus connection
+		:rtype: Object
+	"""
+
+	def __init__(self, bus):
+		path = bus if isinstance(bus, str) else "/dev/i2c-%d" % (bus)
+		self.fd = os.open(path, os.O_RDWR)
+
+		self._lock = _thread.allocate_lock()
+
+		# The device address SMBus commands go to (set with I2C_SLAVE)
+		self._address = None
+
+		# One data block shared by the SMBus commands, and an argument block for
+		# each command, pointing at it
+		self._data = _I2CSmbusData()
+		dataAddress = ctypes.addressof(self._data)
+		self._block = self._data.block
+
+		self._quick = _I2CSmbusIoctlData(_kSmbusWrite, 0, _kSmbusQuick, None)
+		self._readByte = _I2CSmbusIoctlData(_kSmbusRead, 0, _kSmbusByte, dataAddress)
+		self._writeByte = _I2CSmbusIoctlData(_kSmbusWrite, 0, _kSmbusByte, None)
+		self._readByteData = _I2CSmbusIoctlData(_kSmbusRead, 0, _kSmbusByteData, dataAddress)
+		self._writeByteData = _I2CSmbusIoctlData(_kSmbusWrite, 0, _kSmbusByteData, dataAddress)
+		self._readWordData = _I2CSmbusIoctlData(_kSmbusRead, 0, _kSmbusWordData, dataAddress)
+		self._writeWordData = _I2CSmbusIoctlData(_kSmbusWrite, 0, _kSmbusWordData, dataAddress)
+		self._readBlockData = _I2CSmbusIoctlData(_kSmbusRead, 0, _kSmbusI2CBlockData, dataAddress)
+		self._writeBlockData = _I2CSmbusIoctlData(_kSmbusWrite, 0, _kSmbusI2CBlockData, dataAddress)
+
+		# transaction shape -> _RdwrShape
+		self._shapes = {}
+
+		self.funcs = self._get_funcs()
+
+	def close(self):
+		""" Closes the bus device """
+		if self.fd is not None:
+			os.close(self.fd)
+			self.fd = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, type, value, traceback):
+		self.close()
+
+	def _get_funcs(self):
+		funcs = ctypes.c_ulong()
+		ioctl(self.fd, _kI2CFuncs, funcs)
+		return funcs.value
+
+	# Sets the device address for the SMBus commands. Called with the lock held
+	def _set_address(self, i2c_addr):
+		ioctl(self.fd, _kI2CSlave, i2c_addr)
+		self._address = i2c_addr
+
+	#-------------------------------------------------------------------------
+	# SMBus commands
+
+	def write_quick(self, i2c_addr):
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			ioctl(self.fd, _kI2CSmbus, self._quick)
+
+	def read_byte(self, i2c_addr):
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			ioctl(self.fd, _kI2CSmbus, self._readByte)
+			return self._data.byte
+
+	def write_byte(self, i2c_addr, value):
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			args = self._writeByte
+			args.command = value
+			ioctl(self.fd, _kI2CSmbus, args)
+
+	def read_byte_data(self, i2c_addr, register):
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			args = self._readByteData
+			args.command = register
+			ioctl(self.fd, _kI2CSmbus, args)
+			return self._data.byte
+
+	def write_byte_data(self, i2c_addr, register, value):
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			args = self._writeByteData
+			args.command = register
+			self._data.byte = value
+			ioctl(self.fd, _kI2CSmbus, args)
+
+	def read_word_data(self, i2c_addr, register):
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			args = self._readWordData
+			args.command = register
+			ioctl(self.fd, _kI2CSmbus, args)
+			return self._data.word
+
+	def write_word_data(self, i2c_addr, register, value):
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			args = self._writeWordData
+			args.command = register
+			self._data.word = value
+			ioctl(self.fd, _kI2CSmbus, args)
+
+	def read_i2c_block_data(self, i2c_addr, register, length):
+		if length > _kSmbusBlockMax:
+			raise ValueError("Desired block length over %d bytes" % (_kSmbusBlockMax))
+
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			args = self._readBlockData
+			args.command = register
+			block = self._block
+			block[0] = length
+			ioctl(self.fd, _kI2CSmbus, args)
+			return block[1:length + 1]
+
+	def write_i2c_block_data(self, i2c_addr, register, data):
+		length = len(data)
+		if length > _kSmbusBlockMax:
+			raise ValueError("Data length cannot exceed %d bytes" % (_kSmbusBlockMax))
+
+		with self._lock:
+			if i2c_addr != self._address:
+				self._set_address(i2c_addr)
+			args = self._writeBlockData
+			args.command = register
+			block = self._block
+			block[0] = length
+			block[1:length + 1] = data
+			ioctl(self.fd, _kI2CSmbus, args)
+
+	#-------------------------------------------------------------------------
+	# Plain I2C messages
+
+	def transfer(self, segments):
+		"""
+			Sends a list of messages in a single I2C_RDWR call. Each message is
+			an (address, flags, buffer) tuple - the same segments queued by an
+			I2CTransaction. Read messages are read into their buffer.
+
+			:param segments: The messages to send
+
+			:return: None
+
+		"""
+		views = []
+		shape = []
+		for (address, flags, buffer) in segments:
+			view = _byte_view(buffer)
+			views.append(view)
+			shape.append((address, flags, view.nbytes))
+		shape = tuple(shape)
+
+		with self._lock:
+			rdwr = self._shapes.get(shape)
+			if rdwr is None:
+				if len(self._shapes) >= _kMaxTransferShapes:
+					self._shapes.clear()
+				rdwr = _RdwrShape(shape)
+				self._shapes[shape] = rdwr
+
+			msgViews = rdwr.views
+			for i in rdwr.writes:
+				msgViews[i][:] = views[i]
+
+			# Long reads go straight into the caller's buffer when it's writable
+			# and contiguous - the ctypes object keeps it from being resized 
+			# until the reads are done. Other reads land in the message's own
+			# buffer, and are copied.
+			copies = []
+			targets = []
+			msgs = rdwr.msgs
+			for i in rdwr.reads:
+				view = views[i]
+				if view.nbytes >= _kDirectReadMin:
+					try:
+						target = ctypes.c_char.from_buffer(view)
+						targets.append(target)
+						msgs[i].buf = ctypes.addressof(target)
+						continue
+					except TypeError:
+						pass
+
+				msgs[i].buf = rdwr.addresses[i]
+				copies.append(i)
+
+			ioctl(self.fd, _kI2CRdwr, rdwr.data)
+
+			for i in copies:
+				views[i][:] = msgViews[i]
@@ -34,6 +34,7 @@
 #==================================================================================
 
 from .i2c_driver import I2CDriver
+from .i2c_transaction import _kFlagRead, _kFlagStop, _as_write_buffer
 
 import sys
 
@@ -80,12 +81,16 @@ class MicroPythonI2C(I2CDriver):
 	name = _PLATFORM_NAME
 	_i2cbus = None
 
+	# Each write says whether it ends with a stop condition
+	_stopFlag = True
+
 	def __init__(self, sda=None, scl=None, freq=100000, *args, **argk):
 		I2CDriver.__init__(self) # init super
 
 		self._sda = sda
 		self._scl = scl
 		self._freq = freq
+		self._busKey = (sda, scl, freq)
 
 		self._i2cbus = _connectToI2CBus(sda=self._sda, scl=self._scl, freq=self._freq)
 
@@ -100,38 +105,27 @@ class MicroPythonI2C(I2CDriver):
 	def is_platform(cls):
 		return cls.isPlatform()
 
-#-------------------------------------------------------------------------		
-	# General get attribute method
-	#
-	# Used to intercept getting the I2C bus object - so we can perform a lazy
-	# connect ....
-	#
-	def __getattr__(self, name):
-
-		if(name == "i2cbus"):
-			return self._i2cbus
+	# Drivers are pooled by pins and frequency - see getI2CDriver()
+	@classmethod
+	def _pool_key(cls, sda=None, scl=None, freq=100000, *args, **argk):
+		return (sda, scl, freq)
 
-		else:
-			# Note - we call __getattribute__ to the super class (object).
-			return super(I2CDriver, self).__getattribute__(name)
+	def close(self):
+		if self._i2cbus is not None:
+			# Not every port can release the bus
+			if hasattr(self._i2cbus, "deinit"):
+				self._i2cbus.deinit()
+			self._i2cbus = None
 
-	#-------------------------------------------------------------------------
-	# General set attribute method
+	# read commands ----------------------------------------------------------
 	#
-	# Basically implemented to make the i2cbus attribute readonly to users 
-	# of this class. 
+	# Reads are retried, as allowed by the retry policy - see setRetryPolicy()
 	#
-	def __setattr__(self, name, value):
-
-		if(name != 'i2cbus'):
-			super(I2CDriver, self).__setattr__(name, value)
-
-	# read commands ----------------------------------------------------------
 	def readWord(self, address, commandCode):
 		if (commandCode == None):
-			buffer = self._i2cbus.readfrom(address, 2)
+			buffer = self._retry(address, False, self._i2cbus.readfrom, address, 2)
 		else:
-			buffer = self._i2cbus.readfrom_mem(address, commandCode, 2)
+			buffer = self._retry(address, False, self._i2cbus.readfrom_mem, address, commandCode, 2)
 
 		return (buffer[1] << 8 ) | buffer[0]
 
@@ -140,55 +134,171 @@ class MicroPythonI2C(I2CDriver):
 
 	def readByte(self, address, commandCode = None):
 		if (commandCode == None):
-			return self._i2cbus.readfrom(address, 1)[0]
+			return self._retry(address, False, self._i2cbus.readfrom, address, 1)[0]
 
-		return self._i2cbus.readfrom_mem(address, commandCode, 1)[0]
+		return self._retry(address, False, self._i2cbus.readfrom_mem, address, commandCode, 1)[0]
 
 	def read_byte(self, address, commandCode = None):
 		return self.readByte(address, commandCode)
 
 	def readBlock(self, address, commandCode, nBytes):
 		if (commandCode == None):
-			return self._i2cbus.readfrom(address, nBytes)
+			return self._retry(address, False, self._i2cbus.readfrom, address, nBytes)
 
-		return self._i2cbus.readfrom_mem(address, commandCode, nBytes)
+		return self._retry(address, False, self._i2cbus.readfrom_mem, address, commandCode, nBytes)
 
 	def read_block(self, address, commandCode, nBytes):
 		return self.readBlock(address, commandCode, nBytes)
 
+	def readBlockInto(self, address, commandCode, buf):
+		if (commandCode == None):
+			self._retry(address, False, self._i2cbus.readfrom_into, address, buf)
+		else:
+			self._retry(address, False, self._i2cbus.readfrom_mem_into, address, commandCode, buf)
+
+	def read_block_into(self, address, commandCode, buf):
+		return self.readBlockInto(address, commandCode, buf)
+
 	# write commands----------------------------------------------------------
+	#
+	# Writes are only retried if the retry policy allows it.
+	#
 	def writeCommand(self, address, commandCode):
-		self._i2cbus.writeto(address, commandCode.to_bytes(1, 'little'))
+		self._retry(address, True, self._i2cbus.writeto, address, commandCode.to_bytes(1, 'little'))
 
 	def write_command(self, address, commandCode):
 		return self.writeCommand(address, commandCode)
 
 	def writeWord(self, address, commandCode, value):
-		self._i2cbus.writeto_mem(address, commandCode, value.to_bytes(2, 'little'))
+		self._retry(address, True, self._i2cbus.writeto_mem, address, commandCode, value.to_bytes(2, 'little'))
 
 	def write_word(self, address, commandCode, value):
 		return self.writeWord(address, commandCode, value)
 
 	def writeByte(self, address, commandCode, value):
-		self._i2cbus.writeto_mem(address, commandCode, value.to_bytes(1, 'little'))
+		self._retry(address, True, self._i2cbus.writeto_mem, address, commandCode, value.to_bytes(1, 'little'))
 
 	def write_byte(self, address, commandCode, value):
 		return self.writeByte(address, commandCode, value)
 
-	def writeBlock(self, address, commandCode, value):
-		self._i2cbus.writeto_mem(address, commandCode, bytes(value))
+	# Block writes are split into pages by writeBlock() - see setPageSize()
+	def _write_block(self, address, commandCode, value):
+		# Any bytes-like object can be sent as is, without a copy
+		self._retry(address, True, self._i2cbus.writeto_mem, address, commandCode, _as_write_buffer(value))
 
 	def write_block(self, address, commandCode, value):
 		return self.writeBlock(address, commandCode, value)
 
 	def writeReadBlock(self, address, writeBytes, readNBytes):
 		# micropython I2C doesn't have a corresponding "i2c_rdwr" function like smbus2, so we will make our own by passing stop=False to not send stop bits between repeated transfers
-		self._i2cbus.writeto(address, bytes(writeBytes), False)
-		return self._i2cbus.readfrom(address, readNBytes)
+		buffer = bytearray(readNBytes)
+		self._retry(address, False, self._write_read_into, address, _as_write_buffer(writeBytes), buffer)
+		return bytes(buffer)
 	
 	def write_read_block(self, address, writeBytes, readNBytes):
 		return self.writeReadBlock(address, writeBytes, readNBytes)
 
+	# readfrom() and readfrom_mem() return bytes
+	def _block_result(self, buffer):
+		return bytes(buffer)
+
+	def _write_read_result(self, address, buffer):
+		return bytes(buffer)
+
+	def writeReadInto(self, address, writeBytes, buf):
+		self._retry(address, False, self._write_read_into, address, _as_write_buffer(writeBytes), buf)
+
+	def write_read_into(self, address, writeBytes, buf):
+		return self.writeReadInto(address, writeBytes, buf)
+
+	# Same as writeReadBlock(), no stop bit between the write and the read. 
+	# Retried as one operation
+	def _write_read_into(self, address, writeBytes, buf):
+		self._i2cbus.writeto(address, writeBytes, False)
+		self._i2cbus.readfrom_into(address, buf)
+
+	# fast path - see enableFastPath() ---------------------------------------
+	#
+	# Each operation is one small function that calls the bus directly
+	#
+	def _fast_path_methods(self):
+		bus = self._i2cbus
+		if bus is None:
+			return {}
+
+		readfrom = bus.readfrom
+		readfrom_into = bus.readfrom_into
+		readfrom_mem = bus.readfrom_mem
+		readfrom_mem_into = bus.readfrom_mem_into
+		writeto = bus.writeto
+		writeto_mem = bus.writeto_mem
+
+		def readByte(address, commandCode = None):
+			if commandCode is None:
+				return readfrom(address, 1)[0]
+			return readfrom_mem(address, commandCode, 1)[0]
+
+		def readWord(address, commandCode):
+			if commandCode is None:
+				buffer = readfrom(address, 2)
+			else:
+				buffer = readfrom_mem(address, commandCode, 2)
+			return (buffer[1] << 8) | buffer[0]
+
+		def readBlock(address, commandCode, nBytes):
+			if commandCode is None:
+				return readfrom(address, nBytes)
+			return readfrom_mem(address, commandCode, nBytes)
+
+		def readBlockInto(address, commandCode, buf):
+			if commandCode is None:
+				readfrom_into(address, buf)
+			else:
+				readfrom_mem_into(address, commandCode, buf)
+
+		def writeCommand(address, commandCode):
+			writeto(address, commandCode.to_bytes(1, 'little'))
+
+		def writeByte(address, commandCode, value):
+			writeto_mem(address, commandCode, value.to_bytes(1, 'little'))
+
+		def writeWord(address, commandCode, value):
+			writeto_mem(address, commandCode, value.to_bytes(2, 'little'))
+
+		def writeBlock(address, commandCode, value):
+			writeto_mem(address, commandCode, _as_write_buffer(value))
+
+		return {
+			"readByte": readByte, "read_byte": readByte,
+			"readWord": readWord, "read_word": readWord,
+			"readBlock": readBlock, "read_block": readBlock,
+			"readBlockInto": readBlockInto, "read_block_into": readBlockInto,
+			"writeCommand": writeCommand, "write_command": writeCommand,
+			"writeByte": writeByte, "write_byte": writeByte,
+			"writeWord": writeWord, "write_word": writeWord,
+			"writeBlock": writeBlock, "write_block": writeBlock
+		}
+
+	# transactions -----------------------------------------------------------
+	def _run_transaction(self, segments):
+		# If a segment fails, the whole transaction is retried
+		self._retry_transaction(self._send_segments, segments)
+
+	def _send_segments(self, segments):
+		# Like writeReadBlock(), a write followed by a read from the same device
+		# is sent without a stop bit in between. The whole queue is sent under 
+		# the bus lock, so other threads can't slip in between segments
+		nSegments = len(segments)
+		with self:
+			for i in range(nSegments):
+				address, flags, buffer = segments[i]
+
+				if flags & _kFlagRead:
+					self._i2cbus.readfrom_into(address, buffer)
+				else:
+					stop = (flags & _kFlagStop) != 0 or not (i + 1 < nSegments and segments[i + 1][0] == address and segments[i + 1][1] & _kFlagRead)
+					self._i2cbus.writeto(address, buffer, stop)
+
 	def isDeviceConnected(self, devAddress):
 		isConnected = False
 		try:
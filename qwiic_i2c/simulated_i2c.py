@@ -0,0 +1,802 @@
+#-----------------------------------------------------------------------------
+# simulated_i2c.py
+#
+# Simulated I2C bus, with pluggable device models, for benchmarks and CI.
+#
+# The simulated driver is a platform driver like the others, but it's only
+# selected by getI2CDriver() once it's enabled - by calling enable(), or by 
+# setting the QWIIC_I2C_SIMULATE environment variable. 
+#
+# Devices are attached to a simulated bus at an address. Each transaction can
+# take as long as it would on a real bus, using a latency model based on the
+# number of bytes sent and the bus frequency.
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics, May 2019
+#
+#
+# More information on qwiic is at https://www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+
+"""
+simulated_i2c
+=============
+A simulated I2C bus with pluggable device models - a register file, a FIFO 
+and an EEPROM with a write cycle delay. Used to benchmark and test bus code 
+without hardware.
+
+:example:
+
+	>>> import qwiic_i2c
+	>>> from qwiic_i2c import simulated_i2c
+	>>> simulated_i2c.enable()
+	>>> bus = simulated_i2c.getSimulatedBus(1)
+	>>> bus.attach(0x6B, simulated_i2c.SimRegisterDevice())
+	>>> bus.setLatency(simulated_i2c.SimLatency(freq = 400000))
+	>>> i2c = qwiic_i2c.getI2CDriver(1)
+	>>> i2c.writeByte(0x6B, 0x10, 0x40)
+
+"""
+
+import os
+import errno
+
+from .i2c_driver import I2CDriver
+from .i2c_transaction import _kFlagRead, _kFlagStop, _as_write_buffer
+from .i2c_clock import _monotonic_ns, _sleep_ns
+from .i2c_lock import _Lock
+
+_PLATFORM_NAME = "Simulated"
+
+# Set by enable(), or the environment variable
+_enabled = False
+_kEnableVariable = "QWIIC_I2C_SIMULATE"
+
+def enable(enable=True):
+	"""
+	.. function:: enable()
+
+		Makes getI2CDriver() return the simulated driver, instead of the driver 
+		for the platform.
+
+		:param enable: True to use the simulated driver, False to go back to the
+			platform driver.
+
+		:return: None
+
+	"""
+	global _enabled
+	_enabled = enable
+
+#-----------------------------------------------------------------------------
+# Internal function to wait for a number of nanoseconds. Sleeps for most of
+# the time, then busy waits, as sleep() isn't accurate for short times.
+def _wait_ns(nanoseconds):
+	deadline = _monotonic_ns() + nanoseconds
+	if nanoseconds > 1000000:
+		_sleep_ns(nanoseconds - 1000000)
+
+	while _monotonic_ns() < deadline:
+		pass
+
+#-----------------------------------------------------------------------------
+# SimLatency
+#
+class SimLatency(object):
+	"""
+	SimLatency
+
+		Latency model for a simulated bus. Each byte (including the address 
+		byte of each message) takes 9 clocks - 8 data bits and the ack - plus a 
+		start and stop condition per message and a fixed overhead per 
+		transaction (for the kernel call, or the bus driver).
+
+		:param freq: The bus frequency in Hz
+		:param transactionNs: The fixed time taken by each transaction, in 
+			nanoseconds
+		:param realTime: If True, transactions take the modelled time. If False
+			the time is only added to the bus's busyNs total.
+	"""
+
+	def __init__(self, freq=100000, transactionNs=0, realTime=True):
+		self.freq = freq
+		self.transactionNs = transactionNs
+		self.realTime = realTime
+
+	def messageNs(self, nBytes):
+		"""
+			Returns the time taken to send a message, in nanoseconds.
+
+			:param nBytes: The number of data bytes in the message
+
+			:return: The time taken, in nanoseconds
+			:rtype: int
+
+		"""
+		# The address byte, the data bytes and 2 clocks for the start and stop
+		clocks = (nBytes + 1) * 9 + 2
+		return (clocks * 1000000000) // self.freq
+
+	def message_ns(self, nBytes):
+		return self.messageNs(nBytes)
+
+#-----------------------------------------------------------------------------
+# Device models
+#
+# A device model implements:
+#
+#	acks()      - True if the device acknowledges its address
+#	write(data) - a write message was sent to the device
+#	read(buf)   - a read message from the device - fill buf
+#	stop()      - the end of a transaction that addressed the device
+#
+class SimRegisterDevice(object):
+	"""
+	SimRegisterDevice
+
+		A simulated device with a file of 8 bit registers. The first byte written
+		sets the register address, and the register address auto-increments as
+		data is written or read.
+
+		:param size: The number of registers
+		:param values: Initial register values - a dict of register: value, or a
+			bytes-like object of the values, starting from register 0
+
+		:example:
+
+		>>> device = SimRegisterDevice(values = {0x0F: 0x6A})
+		>>> device.registers[0x28] = 0x12
+	"""
+
+	def __init__(self, size=256, values=None):
+		#: The register values. Can be changed directly to simulate the device
+		self.registers = bytearray(size)
+		self._pointer = 0
+
+		if isinstance(values, dict):
+			for register in values:
+				self.registers[register] = values[register]
+		elif values is not None:
+			self.registers[:len(values)] = values
+
+	def acks(self):
+		return True
+
+	def write(self, data):
+		if len(data) == 0:
+			return
+
+		self._pointer = data[0] % len(self.registers)
+		for value in data[1:]:
+			self.writeRegister(self._pointer, value)
+			self._pointer = (self._pointer + 1) % len(self.registers)
+
+	def read(self, buf):
+		for i in range(len(buf)):
+			buf[i] = self.readRegister(self._pointer)
+			self._pointer = (self._pointer + 1) % len(self.registers)
+
+	def stop(self):
+		pass
+
+	def readRegister(self, register):
+		"""
+			Returns the value of a register when it's read over the bus. Override
+			to simulate registers the device changes.
+
+			:param register: The register address
+
+			:return: The register value
+			:rtype: int
+
+		"""
+		return self.registers[register]
+
+	def writeRegister(self, register, value):
+		"""
+			Stores a value written to a register over the bus. Override to 
+			simulate read only or command registers.
+
+			:param register: The register address
+			:param value: The value written
+
+			:return: None
+
+		"""
+		self.registers[register] = value
+
+class SimFifoDevice(SimRegisterDevice):
+	"""
+	SimFifoDevice
+
+		A simulated register device with a FIFO. Reading the data register pops
+		bytes from the FIFO (the register address doesn't auto-increment), and
+		the count register holds the number of bytes (or frames) waiting.
+
+		:param countRegister: The register holding the FIFO count
+		:param dataRegister: The register that pops data from the FIFO
+		:param frameSize: The number of bytes in each FIFO entry
+		:param depth: The maximum number of frames the FIFO holds. Frames pushed
+			to a full FIFO are dropped.
+		:param countBytes: The size of the count, in bytes
+		:param bigEndian: True if the count is big endian
+		:param countInFrames: True if the count is the number of frames, rather 
+			than bytes
+		:param size: The number of registers
+
+		:example:
+
+		>>> fifo = SimFifoDevice(0x3A, 0x3B, frameSize = 6, depth = 170)
+		>>> fifo.push(bytes(range(6)))
+	"""
+
+	def __init__(self, countRegister, dataRegister, frameSize, depth=32, countBytes=1, bigEndian=False, countInFrames=False, size=256):
+		SimRegisterDevice.__init__(self, size)
+
+		self._countRegister = countRegister
+		self._dataRegister = dataRegister
+		self._frameSize = frameSize
+		self._depth = depth
+		self._countBytes = countBytes
+		self._byteOrder = "big" if bigEndian else "little"
+		self._countInFrames = countInFrames
+
+		self._fifo = bytearray()
+
+		#: The number of frames dropped because the FIFO was full
+		self.overflows = 0
+
+	def push(self, frame):
+		"""
+			Adds a frame to the FIFO.
+
+			:param frame: The frame - frameSize bytes
+
+			:return: True if the frame was added, False if the FIFO was full
+			:rtype: bool
+
+		"""
+		if len(self._fifo) >= self._depth * self._frameSize:
+			self.overflows += 1
+			return False
+
+		self._fifo += frame
+		return True
+
+	def __len__(self):
+		return len(self._fifo) // self._frameSize
+
+	def read(self, buf):
+		if self._pointer == self._dataRegister:
+			# Pops from the FIFO - reads of an empty FIFO return zeros
+			nBytes = min(len(buf), len(self._fifo))
+			buf[:nBytes] = self._fifo[:nBytes]
+			for i in range(nBytes, len(buf)):
+				buf[i] = 0
+			del self._fifo[:nBytes]
+		else:
+			SimRegisterDevice.read(self, buf)
+
+	def readRegister(self, register):
+		countOffset = register - self._countRegister
+		if 0 <= countOffset < self._countBytes:
+			count = len(self._fifo)
+			if self._countInFrames:
+				count //= self._frameSize
+
+			return count.to_bytes(self._countBytes, self._byteOrder)[countOffset]
+
+		return self.registers[register]
+
+class SimEepromDevice(object):
+	"""
+	SimEepromDevice
+
+		A simulated EEPROM. The first addressBytes bytes written set the memory 
+		address (big endian), and any data that follows is written within the 
+		current page - wrapping at the page boundary, like a real part. After a 
+		write the device doesn't acknowledge its address until the write cycle 
+		is complete.
+
+		:param size: The size of the memory, in bytes
+		:param addressBytes: The size of the memory address, in bytes
+		:param pageSize: The size of a write page, in bytes
+		:param writeCycleNs: The time taken to complete a write, in nanoseconds
+	"""
+
+	def __init__(self, size=32768, addressBytes=2, pageSize=64, writeCycleNs=5000000):
+		#: The memory contents. Can be changed directly
+		self.memory = bytearray(b"\xff" * size)
+
+		self._addressBytes = addressBytes
+		self._pageSize = pageSize
+		self._writeCycleNs = writeCycleNs
+
+		self._pointer = 0
+		self._written = False
+		self._busyUntil = 0
+
+	def acks(self):
+		return _monotonic_ns() >= self._busyUntil
+
+	def write(self, data):
+		if len(data) < self._addressBytes:
+			return
+
+		self._pointer = int.from_bytes(bytes(data[:self._addressBytes]), "big") % len(self.memory)
+
+		pageStart = self._pointer - (self._pointer % self._pageSize)
+		for value in data[self._addressBytes:]:
+			self.memory[self._pointer] = value
+			self._pointer = pageStart + (self._pointer + 1 - pageStart) % self._pageSize
+			self._written = True
+
+	def read(self, buf):
+		size = len(self.memory)
+		for i in range(len(buf)):
+			buf[i] = self.memory[self._pointer]
+			self._pointer = (self._pointer + 1) % size
+
+	def stop(self):
+		# The write cycle starts at the stop condition
+		if self._written:
+			self._written = False
+			self._busyUntil = _monotonic_ns() + self._writeCycleNs
+
+class SimMuxDevice(object):
+	"""
+	SimMuxDevice
+
+		A simulated I2C mux, like the TCA9548A. Writing a byte to the mux sets 
+		its control register - one bit per channel - which takes effect at the
+		stop condition. Devices attached to the selected channels answer on the
+		bus as if they were attached to it.
+
+		:param channels: The number of channels
+
+		:example:
+
+		>>> mux = bus.attach(0x70, SimMuxDevice())
+		>>> mux.attach(3, 0x6B, SimRegisterDevice())
+	"""
+
+	def __init__(self, channels=8):
+		# One dict of address -> device model per channel
+		self._channels = [{} for i in range(channels)]
+
+		#: The control register - a bit for each selected channel
+		self.selected = 0
+		self._pending = None
+
+	def attach(self, channel, address, device):
+		"""
+			Attaches a device model to a channel of the mux.
+
+			:param channel: The channel number
+			:param address: The I2C address of the device
+			:param device: The device model
+
+			:return: The device model
+			:rtype: object
+
+		"""
+		self._channels[channel][address] = device
+		return device
+
+	def detach(self, channel, address):
+		"""
+			Removes a device from a channel of the mux.
+
+			:param channel: The channel number
+			:param address: The I2C address of the device
+
+			:return: None
+
+		"""
+		self._channels[channel].pop(address, None)
+
+	def acks(self):
+		return True
+
+	def write(self, data):
+		if len(data) > 0:
+			self._pending = data[-1]
+
+	def read(self, buf):
+		for i in range(len(buf)):
+			buf[i] = self.selected
+
+	def stop(self):
+		# The channel selection changes at the stop condition
+		if self._pending is not None:
+			self.selected = self._pending
+			self._pending = None
+
+	# Returns the device at an address on the selected channels, or None
+	def _find(self, address):
+		for channel in range(len(self._channels)):
+			if self.selected & (1 << channel):
+				device = self._channels[channel].get(address)
+				if device is not None:
+					return device
+
+		return None
+
+#-----------------------------------------------------------------------------
+# SimulatedBus
+#
+class SimulatedBus(object):
+	"""
+	SimulatedBus
+
+		A simulated I2C bus, shared by every simulated driver with the same bus 
+		id. Get one with getSimulatedBus().
+
+		:param busId: The bus id
+	"""
+
+	def __init__(self, busId):
+		self.busId = busId
+
+		# address -> device model, and the muxes attached (devices behind them 
+		# answer on the bus when their channel is selected)
+		self._devices = {}
+		self._muxes = []
+		self._latency = None
+
+		# Transactions on a bus run one at a time, like the kernel's adapter lock
+		self._lock = _Lock()
+
+		#: The number of transactions run on the bus
+		self.transactions = 0
+
+		#: The total modelled time the bus has been busy, in nanoseconds
+		self.busyNs = 0
+
+	def attach(self, address, device):
+		"""
+			Attaches a device model to the bus.
+
+			:param address: The I2C address of the device
+			:param device: The device model
+
+			:return: The device model
+			:rtype: object
+
+		"""
+		self.detach(address)
+		self._devices[address] = device
+
+		if hasattr(device, "_find"):
+			self._muxes.append(device)
+
+		return device
+
+	def detach(self, address):
+		"""
+			Removes a device from the bus.
+
+			:param address: The I2C address of the device
+
+			:return: None
+
+		"""
+		device = self._devices.pop(address, None)
+		if device in self._muxes:
+			self._muxes.remove(device)
+
+	def device(self, address):
+		"""
+			Returns the device model at an address, or None.
+
+			:param address: The I2C address of the device
+
+			:return: The device model
+			:rtype: object
+
+		"""
+		return self._devices.get(address)
+
+	def setLatency(self, latency):
+		"""
+			Sets the latency model of the bus.
+
+			:param latency: A SimLatency, or None for transactions that take no
+				time.
+
+			:return: None
+
+		"""
+		self._latency = latency
+
+	def set_latency(self, latency):
+		return self.setLatency(latency)
+
+	def resetStats(self):
+		"""
+			Resets the transaction count and busy time of the bus.
+
+			:return: None
+
+		"""
+		self.transactions = 0
+		self.busyNs = 0
+
+	def reset_stats(self):
+		return self.resetStats()
+
+	def acks(self, address):
+		"""
+			Returns True if a device acknowledges an address.
+
+			:param address: The I2C address
+
+			:return: True if a device acknowledges the address
+			:rtype: bool
+
+		"""
+		device = self._find(address)
+		return device is not None and device.acks()
+
+	# Returns the device that answers at an address, or None
+	def _find(self, address):
+		device = self._devices.get(address)
+		if device is None:
+			for mux in self._muxes:
+				device = mux._find(address)
+				if device is not None:
+					break
+
+		return device
+
+	def run(self, segments):
+		"""
+			Runs a transaction - a list of (address, flags, buffer) messages - on 
+			the bus, as one combined transfer with a single stop at the end, and
+			after any message with the _kFlagStop flag.
+
+			Raises OSError (EREMOTEIO) if a message isn't acknowledged. 
+
+			:param segments: The messages of the transaction
+
+			:return: None
+
+		"""
+		with self._lock:
+			latency = self._latency
+			busNs = latency.transactionNs if latency is not None else 0
+			addressed = []
+
+			try:
+				for (address, flags, buffer) in segments:
+					if latency is not None:
+						busNs += latency.messageNs(len(buffer))
+
+					device = self._find(address)
+					if device is None or not device.acks():
+						raise OSError(errno.EREMOTEIO, "No acknowledge from address 0x%02X" % (address,))
+
+					if device not in addressed:
+						addressed.append(device)
+
+					if flags & _kFlagRead:
+						device.read(buffer)
+					else:
+						device.write(buffer)
+
+					if flags & _kFlagStop:
+						while addressed:
+							addressed.pop().stop()
+			finally:
+				for device in addressed:
+					device.stop()
+
+				self.transactions += 1
+				self.busyNs += busNs
+
+				if latency is not None and latency.realTime:
+					_wait_ns(busNs)
+
+# bus id -> SimulatedBus
+_sim_buses = {}
+
+def getSimulatedBus(busId=1):
+	"""
+	.. function:: getSimulatedBus()
+
+		Returns the simulated bus with an id, creating it if needed.
+
+		:param busId: The bus id
+
+		:return: The simulated bus
+		:rtype: SimulatedBus
+
+	"""
+	bus = _sim_buses.get(busId)
+	if bus is None:
+		bus = SimulatedBus(busId)
+		_sim_buses[busId] = bus
+
+	return bus
+
+def get_simulated_bus(busId=1):
+	return getSimulatedBus(busId)
+
+#-----------------------------------------------------------------------------
+# SimulatedI2C
+#
+# Every operation is built on _run_transaction(), the same way the Linux 
+# driver sends them as i2c_rdwr messages.
+#
+class SimulatedI2C(I2CDriver):
+	"""
+	SimulatedI2C
+
+		I2C driver for a simulated bus. 
+
+		:param iBus: The simulated bus id
+
+		:return: The I2C Driver interface for the qwiic system.
+		:rtype: Object
+	"""
+
+	name = _PLATFORM_NAME
+
+	# SimulatedBus.run() stops after messages with _kFlagStop
+	_stopFlag = True
+
+	def __init__(self, iBus=1, *args, **argk):
+		I2CDriver.__init__(self)
+
+		self._iBus = iBus
+		self._busKey = ("simulated", iBus)
+		self._i2cbus = getSimulatedBus(iBus)
+
+		# Single byte write buffers for the command codes
+		self._commandBytes = [bytes((commandCode,)) for commandCode in range(256)]
+
+	@classmethod
+	def isPlatform(cls):
+		if _enabled:
+			return True
+
+		try:
+			return bool(os.environ.get(_kEnableVariable))
+		except AttributeError:
+			return False
+
+	@classmethod
+	def is_platform(cls):
+		return cls.isPlatform()
+
+	# Drivers are pooled by bus id - see getI2CDriver()
+	@classmethod
+	def _pool_key(cls, iBus=1, *args, **argk):
+		return iBus
+
+	def close(self):
+		self._i2cbus = None
+
+	#----------------------------------------------------------
+	# read Data Command
+
+	def readWord(self, address, commandCode):
+		buffer = bytearray(2)
+		self.readBlockInto(address, commandCode, buffer)
+		return (buffer[1] << 8) | buffer[0]
+
+	def read_word(self, address, commandCode):
+		return self.readWord(address, commandCode)
+
+	def readByte(self, address, commandCode = None):
+		buffer = bytearray(1)
+		self.readBlockInto(address, commandCode, buffer)
+		return buffer[0]
+
+	def read_byte(self, address, commandCode = None):
+		return self.readByte(address, commandCode)
+
+	def readBlock(self, address, commandCode, nBytes):
+		buffer = bytearray(nBytes)
+		self.readBlockInto(address, commandCode, buffer)
+		return list(buffer)
+
+	def read_block(self, address, commandCode, nBytes):
+		return self.readBlock(address, commandCode, nBytes)
+
+	def readBlockInto(self, address, commandCode, buf):
+		if commandCode == None:
+			self._run_transaction(((address, _kFlagRead, buf),))
+		else:
+			self._run_transaction(((address, 0, self._commandBytes[commandCode]), (address, _kFlagRead, buf)))
+
+	def read_block_into(self, address, commandCode, buf):
+		return self.readBlockInto(address, commandCode, buf)
+
+	#----------------------------------------------------------
+	# write Data Commands
+
+	def writeCommand(self, address, commandCode):
+		self._run_transaction(((address, 0, self._commandBytes[commandCode]),))
+
+	def write_command(self, address, commandCode):
+		return self.writeCommand(address, commandCode)
+
+	def writeWord(self, address, commandCode, value):
+		self._run_transaction(((address, 0, bytes((commandCode, value & 0xFF, (value >> 8) & 0xFF))),))
+
+	def write_word(self, address, commandCode, value):
+		return self.writeWord(address, commandCode, value)
+
+	def writeByte(self, address, commandCode, value):
+		self._run_transaction(((address, 0, bytes((commandCode, value & 0xFF))),))
+
+	def write_byte(self, address, commandCode, value):
+		return self.writeByte(address, commandCode, value)
+
+	# Block writes are split into pages by writeBlock() - see setPageSize()
+	def _write_block(self, address, commandCode, value):
+		self._run_transaction(((address, 0, self._commandBytes[commandCode] + _as_write_buffer(value)),))
+
+	def write_block(self, address, commandCode, value):
+		return self.writeBlock(address, commandCode, value)
+
+	def writeReadBlock(self, address, writeBytes, readNBytes):
+		buffer = bytearray(readNBytes)
+		self.writeReadInto(address, writeBytes, buffer)
+		return list(buffer)
+
+	def write_read_block(self, address, writeBytes, readNBytes):
+		return self.writeReadBlock(address, writeBytes, readNBytes)
+
+	def writeReadInto(self, address, writeBytes, buf):
+		self._run_transaction(((address, 0, _as_write_buffer(writeBytes)), (address, _kFlagRead, buf)))
+
+	def write_read_into(self, address, writeBytes, buf):
+		return self.writeReadInto(address, writeBytes, buf)
+
+	#----------------------------------------------------------
+	# Transactions
+
+	def _run_transaction(self, segments):
+		self._retry_transaction(self._i2cbus.run, segments)
+
+	#----------------------------------------------------------
+	# Device detection
+
+	def isDeviceConnected(self, devAddress):
+		return self._i2cbus.acks(devAddress)
+
+	def is_device_connected(self, devAddress):
+		return self.isDeviceConnected(devAddress)
+
+	def ping(self, devAddress):
+		return self.isDeviceConnected(devAddress)
+
+	def scan(self):
+		""" Returns a list of addresses for the devices connected to the I2C bus."""
+		return [address for address in range(0x08, 0x78) if self._i2cbus.acks(address)]